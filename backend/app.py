@@ -4,62 +4,168 @@ import uuid
 import datetime
 import sys
 import base64
-from flask import Flask, request, jsonify, session
+import hashlib
+import time
+from functools import partial
+from flask import Flask, Blueprint, current_app, request, jsonify, session, send_file, g
 from flask_cors import CORS
-from dotenv import load_dotenv
 from werkzeug.utils import secure_filename
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.http import is_resource_modified
+from werkzeug.security import generate_password_hash
 from flask_sqlalchemy import SQLAlchemy
-import numpy as np
+from flask_migrate import Migrate, stamp
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import object_session
+from sqlalchemy.exc import IntegrityError
 import re
-import sqlite3
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Create Flask app
-app = Flask(__name__)
-app.secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key')
-
-# Configure CORS
-CORS(app, supports_credentials=True, origins=['http://localhost:3000'])
-
-# Use absolute path for database file
-db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pension.db')
-print(f"Using database at: {db_path}")
-
-# Debug: Check the database schema
-try:
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("PRAGMA table_info(user)")
-    columns = cursor.fetchall()
-    print("User table schema:")
-    for column in columns:
-        print(f"  {column}")
-    conn.close()
-except Exception as e:
-    print(f"Failed to check schema: {e}")
-
-# Configure database - use absolute path
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-# Initialize database
-db = SQLAlchemy(app)
-
-# Configure file uploads
-UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
+from config import config_from_name
+from db_config import engine_options, configure_sqlite, describe_connection
+from services import ServiceRegistry, get_services, service
+from serialization import FastJSONProvider, Serializer, iso, project, stream_json_items
+from face_matching import face_library_available
+from job_queue import JobQueue, SUCCEEDED as JOB_SUCCEEDED
+from chunked_upload import ChunkedUploadStore, UploadError
+from photo_store import PhotoStore, hash_from_path
+from photo_screening import PhotoScreener, FACE_PHOTO, ID_PHOTO
+from user_cache import UserCache
+from due_schedule import DueSchedule
+from pagination import encode_cursor, decode_cursor, keyset_order, keyset_filter
+from metrics import MetricsRegistry, RequestProfiler, instrument_engine, request_state, start_request_state, timed
+from password_hashing import PasswordHasher, PasswordHasherBusy
+from bulk_import import BulkImporter, FORMATS as IMPORT_FORMATS, detect_format, iter_records
+from death_matching import DeathRegistryMatcher, RosterIndex, make_person
+from chain import ChainIndexer, ChainReader, PENSIONER_ROW_FIELDS, connect as connect_chain, http_session, pension_contract
+
+# Extensions, bound to an app by create_app()
+db = SQLAlchemy()
+migrate = Migrate()
+cors = CORS()
+
+# Routes and request hooks, registered on the app by create_app()
+api = Blueprint('api', __name__)
+
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
 
-# Create upload folder if it doesn't exist
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Services of the current app, created on first use (see create_app)
+photo_store = service('photo_store')
+photo_screener = service('photo_screener')
+user_cache = service('user_cache')
+upload_store = service('upload_store')
+password_hasher = service('password_hasher')
+face_matcher = service('face_matcher')
+face_index = service('face_index')
+job_queue = service('job_queue')
+due_schedule = service('due_schedule')
+request_profiler = service('request_profiler')
+
+# Request, SQL and hot-path metrics, exposed on /metrics
+metrics = MetricsRegistry()
+request_latency = metrics.histogram(
+    'http_request_duration_seconds', 'Request latency', ('method', 'endpoint', 'status'))
+request_queries = metrics.histogram(
+    'http_request_db_queries', 'SQL statements executed per request', ('endpoint',),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250, 1000))
+request_db_seconds = metrics.histogram(
+    'http_request_db_seconds', 'Time spent in SQL per request', ('endpoint',))
+request_body_bytes = metrics.counter(
+    'http_request_body_bytes_total', 'Request body bytes received, mostly photo uploads', ('endpoint',))
+db_query_seconds = metrics.histogram(
+    'db_query_duration_seconds', 'SQL statement latency', ('operation',))
+photo_store_seconds = metrics.histogram(
+    'photo_store_duration_seconds', 'Time to stream, normalize and store an uploaded photo', ('source',))
+face_check_seconds = metrics.histogram(
+    'face_check_duration_seconds', 'Face comparison latency', ('kind',))
+photo_screen_seconds = metrics.histogram(
+    'photo_screen_duration_seconds', 'Time to pre-screen an uploaded photo')
+photo_screen_rejections = metrics.counter(
+    'photo_screen_rejections_total', 'Photos rejected before face matching', ('kind', 'stage'))
+metrics.gauge('job_queue_jobs', 'Background jobs by status', lambda: job_queue.counts(), label='status')
+user_cache_lookups = metrics.counter(
+    'user_cache_lookups_total', 'User cache lookups by result', ('result',))
+
+@api.before_app_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    g.profiler = request_profiler.start()
+    start_request_state()
+
+@api.after_app_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    duration = time.perf_counter() - started
+    endpoint = request.endpoint or 'unmatched'
+    
+    request_latency.observe(duration, method=request.method, endpoint=endpoint, status=response.status_code)
+    request_queries.observe(request_state.queries, endpoint=endpoint)
+    request_db_seconds.observe(request_state.db_seconds, endpoint=endpoint)
+    if request.content_length:
+        request_body_bytes.inc(request.content_length, endpoint=endpoint)
+    request_state.queries = None
+    
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profile_path = request_profiler.finish(profiler, duration, endpoint)
+        if profile_path:
+            print(f"Slow request {request.method} {request.path} took {duration:.3f}s, profile saved to {profile_path}")
+    return response
+
+@api.app_errorhandler(413)
+def request_too_large(error):
+    return jsonify({
+        'success': False,
+        'message': f"Request body exceeds the {current_app.config['MAX_CONTENT_LENGTH']} byte limit"
+    }), 413
+
+def password_hasher_busy_response():
+    response = jsonify({
+        'success': False,
+        'message': 'Server is busy, please try again shortly'
+    })
+    response.headers['Retry-After'] = '1'
+    return response, 429
+
+def import_folder():
+    """Uploaded bulk import files and their error reports"""
+    folder = os.path.join(current_app.config['UPLOAD_FOLDER'], 'imports')
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+def start_background_workers(app):
+    """Per-process startup: share metrics with sibling workers, pick up queued jobs"""
+    if app.config['METRICS_MULTIPROC_DIR']:
+        metrics.share(app.config['METRICS_MULTIPROC_DIR'])
+    if app.config['ASYNC_VERIFICATION']:
+        get_services(app).get('job_queue').start()
 
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+def stop_background_workers(app, timeout=None):
+    """Per-process shutdown: drain the job queue and stop the face matching pool"""
+    if timeout is None:
+        timeout = app.config['JOB_DRAIN_TIMEOUT']
+    services = get_services(app)
+    queue = services.created('job_queue')
+    if queue is not None:
+        unfinished = queue.drain(timeout)
+        if unfinished:
+            print(f"{unfinished} background job(s) still running; another worker recovers them "
+                  f"if this process exits first")
+    matcher = services.created('face_matcher')
+    if matcher is not None:
+        matcher.shutdown(wait=True)
+    metrics.flush()
 
 # User model
 class User(db.Model):
     __tablename__ = 'user'
+    __table_args__ = (
+        db.Index('ix_user_role', 'role'),
+        db.Index('ix_user_pensioner_id', 'pensioner_id'),
+        # Admin pensioner listing: role filter plus sort column (id is implicit)
+        db.Index('ix_user_role_last_name', 'role', 'last_name'),
+        db.Index('ix_user_role_created_at', 'role', 'created_at'),
+        db.Index('ix_user_role_next_verification_date', 'role', 'next_verification_date'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), nullable=False, unique=True)
     password_hash = db.Column(db.String(256), nullable=True)
@@ -75,29 +181,54 @@ class User(db.Model):
     role = db.Column(db.String(20), nullable=False, default='pensioner')
     pensioner_id = db.Column(db.Integer, nullable=True)
     created_at = db.Column(db.DateTime, nullable=True, default=datetime.datetime.utcnow)
+    # Copied from the user's latest successful verification for listing queries
+    last_verified_at = db.Column(db.DateTime, nullable=True)
+    next_verification_date = db.Column(db.DateTime, nullable=True)
+    # active_history keeps the previous value for the pension_stats counters
+    pension_amount = db.column_property(db.Column(db.Float, nullable=True), active_history=True)
+    is_active = db.column_property(db.Column(db.Boolean, nullable=False, default=True), active_history=True)
+    is_deceased = db.column_property(db.Column(db.Boolean, nullable=False, default=False), active_history=True)
+    deceased_at = db.Column(db.DateTime, nullable=True)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'email': self.email,
-            'firstName': self.first_name,
-            'lastName': self.last_name,
-            'fullName': f"{self.first_name} {self.last_name}",
-            'phone': self.phone,
-            'dateOfBirth': self.date_of_birth.isoformat() if self.date_of_birth else None,
-            'address': self.address,
-            'city': self.city,
-            'postalCode': self.postal_code,
-            'country': self.country,
-            'walletAddress': self.wallet_address,
-            'role': self.role,
-            'pensionerID': self.pensioner_id,
-            'createdAt': self.created_at.isoformat() if self.created_at else None
-        }
+    @property
+    def full_name(self):
+        return f"{self.first_name} {self.last_name}"
+    
+    def to_dict(self, fields=None):
+        return user_serializer(self, fields)
+
+user_serializer = Serializer([
+    ('id', 'id'),
+    ('email', 'email'),
+    ('firstName', 'first_name'),
+    ('lastName', 'last_name'),
+    ('fullName', 'full_name'),
+    ('phone', 'phone'),
+    ('dateOfBirth', 'date_of_birth', iso),
+    ('address', 'address'),
+    ('city', 'city'),
+    ('postalCode', 'postal_code'),
+    ('country', 'country'),
+    ('walletAddress', 'wallet_address'),
+    ('role', 'role'),
+    ('pensionerID', 'pensioner_id'),
+    ('pensionAmount', 'pension_amount'),
+    ('isActive', 'is_active'),
+    ('isDeceased', 'is_deceased'),
+    ('createdAt', 'created_at', iso)
+])
 
 # Verification model
 class Verification(db.Model):
     __tablename__ = 'verification'
+    __table_args__ = (
+        # Verification history of a user, newest first
+        db.Index('ix_verification_user_id_id', 'user_id', 'id'),
+        db.Index('ix_verification_pensioner_id_created_at', 'pensioner_id', 'created_at'),
+        # Due-for-reverification sweeps
+        db.Index('ix_verification_status_next_verification_date', 'status', 'next_verification_date'),
+        db.Index('ix_verification_next_verification_date', 'next_verification_date'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     pensioner_id = db.Column(db.Integer, nullable=False)
     wallet_address = db.Column(db.String(42), nullable=False)
@@ -110,87 +241,594 @@ class Verification(db.Model):
     last_verified_at = db.Column(db.DateTime, nullable=True)
     next_verification_date = db.Column(db.DateTime, nullable=True)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'pensionerID': self.pensioner_id,
-            'walletAddress': self.wallet_address,
-            'idPhotoPath': self.id_photo_path,
-            'facePhotoPath': self.face_photo_path,
-            'status': self.status,
-            'createdAt': self.created_at.isoformat() if self.created_at else None,
-            'userID': self.user_id,
-            'lastVerifiedAt': self.last_verified_at.isoformat() if self.last_verified_at else None,
-            'nextVerificationDate': self.next_verification_date.isoformat() if self.next_verification_date else None
-        }
+    def to_dict(self, fields=None):
+        return verification_serializer(self, fields)
 
-def reset_db():
-    """Reset the database completely"""
-    # Remove existing database file if it exists
-    db_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pension.db')
-    if os.path.exists(db_file):
-        try:
-            os.remove(db_file)
-            print(f"Removed old database file: {db_file}")
-        except Exception as e:
-            print(f"Error removing database file: {e}")
-    
-    # Create all tables
-    with app.app_context():
-        db.create_all()
-        print("Database tables created successfully!")
+verification_serializer = Serializer([
+    ('id', 'id'),
+    ('pensionerID', 'pensioner_id'),
+    ('walletAddress', 'wallet_address'),
+    ('idPhotoPath', 'id_photo_path'),
+    ('facePhotoPath', 'face_photo_path'),
+    ('status', 'status'),
+    ('createdAt', 'created_at', iso),
+    ('userID', 'user_id'),
+    ('lastVerifiedAt', 'last_verified_at', iso),
+    ('nextVerificationDate', 'next_verification_date', iso)
+])
 
-# Add demo users
-def create_demo_users():
-    with app.app_context():
-        # Check if we already have users
-        if User.query.count() > 0:
-            print("Demo users already exist.")
-            return
-            
-        try:
-            print("Creating demo users...")
-            
-            # Create demo pensioner
-            pensioner = User(
-                email='pensioner@smartpension.com',
-                password_hash=generate_password_hash('password123'),
-                first_name='John',
-                last_name='Doe',
-                role='pensioner',
-                phone='123-456-7890',
-                wallet_address='0x3c44cdddb6a900fa2b585dd299e03d12fa4293bc'
+# Reference count of a content-addressed photo blob
+class PhotoBlob(db.Model):
+    __tablename__ = 'photo_blob'
+    hash = db.Column(db.String(64), primary_key=True)
+    path = db.Column(db.String(255), nullable=False, unique=True)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+
+def _verification_photo_paths(verification):
+    return [path for path in (verification.id_photo_path, verification.face_photo_path)
+            if path and hash_from_path(path)]
+
+# Keep blob reference counts in step with the verification rows that use them
+@db.event.listens_for(Verification, 'after_insert')
+def retain_verification_photos(mapper, connection, target):
+    for path in _verification_photo_paths(target):
+        connection.execute(
+            sqlite_insert(PhotoBlob.__table__)
+            .values(hash=hash_from_path(path), path=path, ref_count=1,
+                    created_at=datetime.datetime.utcnow())
+            .on_conflict_do_update(
+                index_elements=['hash'],
+                set_={'ref_count': PhotoBlob.__table__.c.ref_count + 1}
             )
-            
-            # Create demo admin
-            admin = User(
-                email='admin@smartpension.com',
-                password_hash=generate_password_hash('admin123'),
-                first_name='Admin',
-                last_name='User',
-                role='admin',
-                wallet_address='0xf39fd6e51aad88f6f4ce6ab8827279cfffb92266'
+        )
+
+@db.event.listens_for(Verification, 'after_delete')
+def release_verification_photos(mapper, connection, target):
+    for path in _verification_photo_paths(target):
+        connection.execute(
+            PhotoBlob.__table__.update()
+            .where(PhotoBlob.__table__.c.hash == hash_from_path(path))
+            .values(ref_count=PhotoBlob.__table__.c.ref_count - 1)
+        )
+
+def collect_photo_garbage(grace_seconds=86400):
+    """Remove photo blobs that no verification references any more"""
+    referenced = [row.path for row in
+                  db.session.query(PhotoBlob.path).filter(PhotoBlob.ref_count > 0)]
+    removed = photo_store.collect_garbage(referenced, grace_seconds)
+    db.session.query(PhotoBlob).filter(PhotoBlob.ref_count <= 0).delete()
+    db.session.commit()
+    expired = upload_store.expire(current_app.config['UPLOAD_EXPIRY_SECONDS'])
+    print(f"Removed {removed} unreferenced photo files and {expired} abandoned uploads")
+    return removed
+
+# Statuses that count as a successful verification
+VERIFIED_STATUSES = ('verified', 'approved')
+
+def load_due_dates():
+    """Latest successful next_verification_date of every living pensioner"""
+    return db.session.query(User.id, User.next_verification_date).filter(
+        User.role == 'pensioner',
+        User.is_deceased.is_(False)
+    ).all()
+
+# Copy successful verification dates onto the user, and collect due date
+# changes during a flush to apply them to the schedule once committed
+@db.event.listens_for(Verification, 'after_insert')
+def track_due_date(mapper, connection, target):
+    if target.status in VERIFIED_STATUSES and target.next_verification_date:
+        user_table = User.__table__
+        connection.execute(
+            user_table.update()
+            .where(user_table.c.id == target.user_id)
+            .where(db.or_(
+                user_table.c.next_verification_date.is_(None),
+                user_table.c.next_verification_date < target.next_verification_date
+            ))
+            .values(
+                last_verified_at=target.last_verified_at,
+                next_verification_date=target.next_verification_date
             )
+        )
+        session_ = object_session(target)
+        session_.info.setdefault('due_updates', []).append((target.user_id, target.next_verification_date))
+
+@db.event.listens_for(User, 'after_insert')
+def track_new_pensioner(mapper, connection, target):
+    if target.role == 'pensioner':
+        object_session(target).info.setdefault('new_pensioners', []).append(target.id)
+
+@db.event.listens_for(db.session, 'after_commit')
+def apply_due_updates(session_):
+    new_pensioners = session_.info.pop('new_pensioners', [])
+    due_updates = session_.info.pop('due_updates', [])
+    deceased_pensioners = session_.info.pop('deceased_pensioners', [])
+    # A schedule that has not been built yet loads these changes with everything else
+    schedule = get_services().created('due_schedule')
+    if schedule is None:
+        return
+    for user_id in new_pensioners:
+        schedule.add_user(user_id)
+    for user_id, due in due_updates:
+        schedule.update(user_id, due)
+    for user_id in deceased_pensioners:
+        schedule.remove_user(user_id)
+
+@db.event.listens_for(db.session, 'after_rollback')
+def discard_due_updates(session_):
+    session_.info.pop('new_pensioners', None)
+    session_.info.pop('due_updates', None)
+    session_.info.pop('deceased_pensioners', None)
+
+# Materialized pensioner counters, kept as a single row
+class PensionStats(db.Model):
+    __tablename__ = 'pension_stats'
+    id = db.Column(db.Integer, primary_key=True)
+    total_pensioners = db.Column(db.Integer, nullable=False, default=0)
+    active_pensioners = db.Column(db.Integer, nullable=False, default=0)
+    inactive_pensioners = db.Column(db.Integer, nullable=False, default=0)
+    deceased_pensioners = db.Column(db.Integer, nullable=False, default=0)
+    active_monthly_amount = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+STATS_ROW_ID = 1
+
+def pensioner_counters(role, is_active, is_deceased, pension_amount):
+    """Counter contributions of one user in the given state"""
+    if role != 'pensioner':
+        return {}
+    if is_deceased:
+        counters = {'deceased_pensioners': 1}
+    elif is_active is False:
+        counters = {'inactive_pensioners': 1}
+    else:
+        counters = {'active_pensioners': 1, 'active_monthly_amount': pension_amount or 0.0}
+    counters['total_pensioners'] = 1
+    return counters
+
+def apply_stats_delta(connection, old_state, new_state):
+    """Add the difference between two user states to the counters row"""
+    delta = {}
+    for name, value in pensioner_counters(*new_state).items():
+        delta[name] = delta.get(name, 0) + value
+    for name, value in pensioner_counters(*old_state).items():
+        delta[name] = delta.get(name, 0) - value
+    delta = {name: value for name, value in delta.items() if value}
+    if not delta:
+        return
+    
+    stats_table = PensionStats.__table__
+    values = {name: stats_table.c[name] + value for name, value in delta.items()}
+    values['updated_at'] = datetime.datetime.utcnow()
+    connection.execute(stats_table.update().where(stats_table.c.id == STATS_ROW_ID).values(**values))
+
+def _user_state(target, previous=False):
+    """(role, is_active, is_deceased, pension_amount) before or after a flush"""
+    state = db.inspect(target)
+    values = []
+    for name in ('role', 'is_active', 'is_deceased', 'pension_amount'):
+        history = state.attrs[name].history
+        if previous and history.deleted:
+            values.append(history.deleted[0])
+        else:
+            values.append(getattr(target, name))
+    return tuple(values)
+
+# Keep the counters row in step with every pensioner write
+@db.event.listens_for(User, 'after_insert')
+def count_new_user(mapper, connection, target):
+    apply_stats_delta(connection, (None, None, None, None), _user_state(target))
+
+@db.event.listens_for(User, 'after_update')
+def count_updated_user(mapper, connection, target):
+    old_state = _user_state(target, previous=True)
+    new_state = _user_state(target)
+    apply_stats_delta(connection, old_state, new_state)
+    if new_state[2] and not old_state[2]:
+        object_session(target).info.setdefault('deceased_pensioners', []).append(target.id)
+
+@db.event.listens_for(User, 'after_delete')
+def count_deleted_user(mapper, connection, target):
+    apply_stats_delta(connection, _user_state(target, previous=True), (None, None, None, None))
+
+def recompute_stats():
+    """Rebuild the counters row from the user table"""
+    pensioners = db.session.query(
+        db.func.count(User.id),
+        db.func.sum(db.case((User.is_deceased.is_(True), 1), else_=0)),
+        db.func.sum(db.case((db.and_(User.is_deceased.is_(False), User.is_active.is_(True)), 1), else_=0)),
+        db.func.sum(db.case((db.and_(User.is_deceased.is_(False), User.is_active.is_(True)), User.pension_amount), else_=0))
+    ).filter(User.role == 'pensioner').one()
+    total, deceased, active, amount = (value or 0 for value in pensioners)
+    
+    stats = db.session.get(PensionStats, STATS_ROW_ID) or PensionStats(id=STATS_ROW_ID)
+    stats.total_pensioners = total
+    stats.deceased_pensioners = deceased
+    stats.active_pensioners = active
+    stats.inactive_pensioners = total - deceased - active
+    stats.active_monthly_amount = float(amount)
+    stats.updated_at = datetime.datetime.utcnow()
+    db.session.add(stats)
+    db.session.commit()
+    return stats
+
+# Record of an offline verification synced under a client-supplied key
+class SyncReceipt(db.Model):
+    __tablename__ = 'sync_receipt'
+    __table_args__ = (db.UniqueConstraint('user_id', 'client_key'),)
+    id = db.Column(db.Integer, primary_key=True)
+    client_key = db.Column(db.String(64), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    verification_id = db.Column(db.Integer, db.ForeignKey('verification.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+
+# Reference face encoding model
+class FaceEmbedding(db.Model):
+    __tablename__ = 'face_embedding'
+    id = db.Column(db.Integer, primary_key=True)
+    verification_id = db.Column(db.Integer, db.ForeignKey('verification.id'), nullable=False, unique=True)
+    pensioner_id = db.Column(db.Integer, nullable=True, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    encoding = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+
+    def to_dict(self, fields=None):
+        return face_embedding_serializer(self, fields)
+
+face_embedding_serializer = Serializer([
+    ('id', 'id'),
+    ('verificationID', 'verification_id'),
+    ('pensionerID', 'pensioner_id'),
+    ('userID', 'user_id'),
+    ('createdAt', 'created_at', iso)
+])
+
+def get_face_index():
+    """
+    Return the face embedding index, first adding the embeddings stored
+    since the last call (possibly by another worker process). SQLite
+    commits writes in ID order, so rows above synced_through are all new.
+    """
+    from embedding_store import encoding_from_bytes
+
+    rows = db.session.query(
+        FaceEmbedding.verification_id,
+        FaceEmbedding.pensioner_id,
+        FaceEmbedding.user_id,
+        FaceEmbedding.encoding
+    ).filter(
+        FaceEmbedding.verification_id > face_index.synced_through
+    ).order_by(FaceEmbedding.verification_id).all()
+    if rows:
+        face_index.extend(
+            (row.verification_id, row.pensioner_id, row.user_id, encoding_from_bytes(row.encoding))
+            for row in rows
+        )
+    return face_index
+
+def load_reference_encoding(user_id):
+    """Latest stored reference encoding of a user, read from the database, or None"""
+    from embedding_store import encoding_from_bytes
+
+    embedding = db.session.query(FaceEmbedding.encoding).filter(
+        FaceEmbedding.user_id == user_id
+    ).order_by(FaceEmbedding.verification_id.desc()).first()
+    return encoding_from_bytes(embedding.encoding) if embedding else None
+
+def store_reference_embedding(verification, encoding):
+    """Persist a reference encoding for a verification; the search index picks it up on its next sync"""
+    from embedding_store import encoding_to_bytes
+
+    embedding = FaceEmbedding(
+        verification_id=verification.id,
+        pensioner_id=verification.pensioner_id,
+        user_id=verification.user_id,
+        encoding=encoding_to_bytes(encoding)
+    )
+    db.session.add(embedding)
+    return embedding
+
+# Local mirror of the contract's pensioner records, maintained by the chain indexer
+class ChainPensioner(db.Model):
+    __tablename__ = 'chain_pensioner'
+    __table_args__ = (
+        db.Index('ix_chain_pensioner_status', 'is_deceased', 'is_active'),
+    )
+    pensioner_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    wallet_address = db.Column(db.String(42), nullable=True, index=True)
+    name = db.Column(db.String(200), nullable=True)
+    pension_amount = db.Column(db.String(78), nullable=True)  # uint256 wei, as decimal text
+    last_verification_at = db.Column(db.DateTime, nullable=True)
+    is_active = db.Column(db.Boolean, nullable=True)
+    is_deceased = db.Column(db.Boolean, nullable=True)
+    deceased_at = db.Column(db.DateTime, nullable=True)
+    updated_block = db.Column(db.Integer, nullable=True)
+
+    def to_dict(self, fields=None):
+        return chain_pensioner_serializer(self, fields)
+
+chain_pensioner_serializer = Serializer([
+    ('pensionerID', 'pensioner_id'),
+    ('wallet', 'wallet_address'),
+    ('name', 'name'),
+    ('pensionAmount', 'pension_amount'),
+    ('lastVerificationDate', 'last_verification_at', iso),
+    ('isActive', 'is_active'),
+    ('isDeceased', 'is_deceased'),
+    ('deceasedAt', 'deceased_at', iso),
+    ('updatedBlock', 'updated_block')
+])
+
+# Last block the chain indexer has applied (single row)
+class ChainCheckpoint(db.Model):
+    __tablename__ = 'chain_checkpoint'
+    id = db.Column(db.Integer, primary_key=True)
+    contract_address = db.Column(db.String(42), nullable=False)
+    block_number = db.Column(db.Integer, nullable=False)
+    block_hash = db.Column(db.String(66), nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+CHECKPOINT_ROW_ID = 1
+
+class ChainMirrorStore:
+    """Persists indexer batches into chain_pensioner for one contract address"""
+
+    def __init__(self, contract_address):
+        self.contract_address = contract_address.lower()
+
+    def load_checkpoint(self):
+        checkpoint = db.session.get(ChainCheckpoint, CHECKPOINT_ROW_ID)
+        if checkpoint is None:
+            return None
+        if checkpoint.contract_address != self.contract_address:
+            # Indexing a different deployment; its state starts from scratch
+            self.reset()
+            return None
+        return checkpoint.block_number, checkpoint.block_hash
+
+    def mark_synced(self):
+        """Move the checkpoint's updated_at to now, after a sync reached the chain head"""
+        db.session.query(ChainCheckpoint).filter(ChainCheckpoint.id == CHECKPOINT_ROW_ID).update(
+            {'updated_at': datetime.datetime.utcnow()})
+        db.session.commit()
+
+    def apply_batch(self, changes, block_number, block_hash):
+        """Upsert a batch of changes and move the checkpoint in one transaction"""
+        try:
+            pensioner_table = ChainPensioner.__table__
+            for change in changes:
+                updates = {name: value for name, value in change.items() if name != 'pensioner_id'}
+                db.session.execute(
+                    sqlite_insert(pensioner_table)
+                    .values(**change)
+                    .on_conflict_do_update(index_elements=['pensioner_id'], set_=updates)
+                )
             
-            # Create demo doctor
-            doctor = User(
-                email='doctor@smartpension.com',
-                password_hash=generate_password_hash('doctor123'),
-                first_name='Dr',
-                last_name='Smith',
-                role='doctor',
-                wallet_address='0x70997970c51812dc3a010c7d01b50e0d17dc79c8'
+            db.session.execute(
+                sqlite_insert(ChainCheckpoint.__table__)
+                .values(id=CHECKPOINT_ROW_ID, contract_address=self.contract_address,
+                        block_number=block_number, block_hash=block_hash,
+                        updated_at=datetime.datetime.utcnow())
+                .on_conflict_do_update(
+                    index_elements=['id'],
+                    set_={'contract_address': self.contract_address, 'block_number': block_number,
+                          'block_hash': block_hash, 'updated_at': datetime.datetime.utcnow()}
+                )
             )
-            
-            db.session.add(pensioner)
-            db.session.add(admin)
-            db.session.add(doctor)
             db.session.commit()
-            
-            print("Demo users created successfully!")
-        except Exception as e:
+        except Exception:
             db.session.rollback()
-            print(f"Error creating demo users: {str(e)}")
+            raise
+
+    def reset(self):
+        ChainPensioner.query.delete()
+        ChainCheckpoint.query.delete()
+        db.session.commit()
+
+def create_chain_indexer():
+    """Chain indexer for the configured RPC endpoint and contract"""
+    w3 = connect_chain(current_app.config['CHAIN_RPC_URL'])
+    return ChainIndexer(
+        pension_contract(w3, current_app.config['CHAIN_CONTRACT_ADDRESS']),
+        ChainMirrorStore(current_app.config['CHAIN_CONTRACT_ADDRESS']),
+        batch_size=current_app.config['CHAIN_BATCH_SIZE'],
+        confirmations=current_app.config['CHAIN_CONFIRMATIONS'],
+        start_block=current_app.config['CHAIN_START_BLOCK']
+    )
+
+def create_chain_reader(app):
+    """Batched contract reader; created on first use so web3 is only needed when called"""
+    session_pool = http_session(app.config['CHAIN_RPC_POOL_SIZE'])
+    w3 = connect_chain(app.config['CHAIN_RPC_URL'], session=session_pool)
+    return ChainReader(
+        pension_contract(w3, app.config['CHAIN_CONTRACT_ADDRESS']),
+        rpc_url=app.config['CHAIN_RPC_URL'],
+        session=session_pool,
+        max_workers=app.config['CHAIN_READ_WORKERS']
+    )
+
+def get_chain_reader():
+    return get_services().get('chain_reader')
+
+def run_chain_indexer(once=False):
+    """Index contract events into the local mirror, once or continuously"""
+    db.create_all()
+    indexer = create_chain_indexer()
+    if once:
+        print(f"Indexed {indexer.sync_once()} contract events")
+    else:
+        print(f"Indexing {current_app.config['CHAIN_CONTRACT_ADDRESS']} via {current_app.config['CHAIN_RPC_URL']}...")
+        indexer.run(poll_interval=current_app.config['CHAIN_POLL_INTERVAL'])
+
+def load_payment_roster():
+    """Roster of the chain mirror as column arrays, ordered by pensioner ID"""
+    from payment_run import Roster
+    rows = db.session.query(
+        ChainPensioner.pensioner_id,
+        ChainPensioner.wallet_address,
+        ChainPensioner.name,
+        ChainPensioner.pension_amount,
+        db.cast(db.func.strftime('%s', ChainPensioner.last_verification_at), db.Integer),
+        ChainPensioner.is_active,
+        ChainPensioner.is_deceased
+    ).order_by(ChainPensioner.pensioner_id).all()
+    return Roster.from_rows(rows)
+
+def run_payments(as_of=None, output_dir=None, allow_stale=False):
+    """
+    Evaluate the whole chain mirror for payment as of a naive UTC datetime
+    (default: now) and write the disbursement file and blocked-list report.
+    Refuses to run (MirrorLagError) when the chain indexer has not been up
+    to date within PAYMENT_MAX_INDEX_LAG_SECONDS, since pensioners flagged
+    deceased on chain after that would still be paid; allow_stale overrides
+    the check. The indexed block is recorded in the summary and file names.
+    """
+    from payment_run import PaymentRun, MirrorLagError
+    as_of = as_of or datetime.datetime.utcnow()
+    output_dir = output_dir or current_app.config['PAYMENT_RUN_DIR']
+
+    checkpoint = db.session.get(ChainCheckpoint, CHECKPOINT_ROW_ID)
+    max_lag = current_app.config['PAYMENT_MAX_INDEX_LAG_SECONDS']
+    if checkpoint is None or checkpoint.updated_at is None:
+        problem = 'The chain mirror has never been indexed'
+    elif (datetime.datetime.utcnow() - checkpoint.updated_at).total_seconds() > max_lag:
+        problem = (f'The chain mirror was last synced at {checkpoint.updated_at.isoformat()} '
+                   f'(block {checkpoint.block_number}), more than {max_lag} seconds ago')
+    else:
+        problem = None
+    if problem and not allow_stale:
+        raise MirrorLagError(problem)
+    if problem:
+        print(f"Warning: {problem}; running anyway")
+    os.makedirs(output_dir, exist_ok=True)
+
+    run = PaymentRun(
+        load_payment_roster(),
+        as_of,
+        current_app.config['PAYMENT_VERIFICATION_PERIOD_DAYS'] * 86400
+    )
+    indexed_block = checkpoint.block_number if checkpoint else None
+    stamp = f"{as_of.strftime('%Y%m%d')}-block{indexed_block if indexed_block is not None else 'none'}"
+    disbursements_path = os.path.join(output_dir, f'disbursements-{stamp}.csv')
+    blocked_path = os.path.join(output_dir, f'blocked-{stamp}.csv')
+    run.write_disbursements(disbursements_path)
+    run.write_blocked(blocked_path)
+
+    summary = run.summary()
+    summary['indexedBlock'] = indexed_block
+    summary['indexedAt'] = checkpoint.updated_at.isoformat() if checkpoint and checkpoint.updated_at else None
+    summary['disbursementFile'] = disbursements_path
+    summary['blockedReport'] = blocked_path
+    return summary
+
+def print_schema():
+    """Print the user table schema and the effective SQLite settings"""
+    with db.engine.connect() as connection:
+        print("User table schema:")
+        for column in connection.exec_driver_sql("PRAGMA table_info(user)"):
+            print(f"  {tuple(column)}")
+        print(f"SQLite settings: {describe_connection(connection)}")
+
+def reset_db():
+    """
+    Delete the database and create the schema from the models. The new
+    database is stamped with the latest migration, so later
+    `flask db upgrade` runs start from there.
+    """
+    # Close pooled connections before removing the files under them
+    db.engine.dispose()
+    
+    # Remove existing database file (and its WAL side files) if it exists
+    db_file = current_app.config['DATABASE_PATH']
+    for path in (db_file, f'{db_file}-wal', f'{db_file}-shm'):
+        if os.path.exists(path):
+            try:
+                os.remove(path)
+                print(f"Removed old database file: {path}")
+            except Exception as e:
+                print(f"Error removing database file: {e}")
+    
+    # Create all tables
+    db.create_all()
+    stamp()
+    print("Database tables created successfully!")
+
+# Add demo users
+def create_demo_users():
+    # Check if we already have users
+    if User.query.count() > 0:
+        print("Demo users already exist.")
+        return
+        
+    try:
+        print("Creating demo users...")
+        
+        # Create demo pensioner
+        pensioner = User(
+            email='pensioner@smartpension.com',
+            password_hash=generate_password_hash('password123'),
+            first_name='John',
+            last_name='Doe',
+            role='pensioner',
+            phone='123-456-7890',
+            wallet_address='0x3c44cdddb6a900fa2b585dd299e03d12fa4293bc'
+        )
+        
+        # Create demo admin
+        admin = User(
+            email='admin@smartpension.com',
+            password_hash=generate_password_hash('admin123'),
+            first_name='Admin',
+            last_name='User',
+            role='admin',
+            wallet_address='0xf39fd6e51aad88f6f4ce6ab8827279cfffb92266'
+        )
+        
+        # Create demo doctor
+        doctor = User(
+            email='doctor@smartpension.com',
+            password_hash=generate_password_hash('doctor123'),
+            first_name='Dr',
+            last_name='Smith',
+            role='doctor',
+            wallet_address='0x70997970c51812dc3a010c7d01b50e0d17dc79c8'
+        )
+        
+        db.session.add(pensioner)
+        db.session.add(admin)
+        db.session.add(doctor)
+        db.session.commit()
+        
+        print("Demo users created successfully!")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error creating demo users: {str(e)}")
+
+# Helper functions to look up users through the user cache
+def load_user_dict(user_id):
+    user = db.session.get(User, user_id)
+    return user.to_dict() if user else None
+
+def get_cached_user(user_id):
+    """Return the serialized user for user_id, or None if it does not exist"""
+    return user_cache.get(user_id, load_user_dict)
+
+def get_admin_user():
+    """Return the logged-in user if it is an admin, otherwise None"""
+    user_id = session.get('user_id')
+    user = get_cached_user(user_id) if user_id else None
+    if not user or user['role'] != 'admin':
+        return None
+    return user
+
+def get_death_registrar():
+    """Return the logged-in user if they may register deaths (admin or doctor), otherwise None"""
+    user_id = session.get('user_id')
+    user = get_cached_user(user_id) if user_id else None
+    if not user or user['role'] not in ('admin', 'doctor'):
+        return None
+    return user
 
 # Helper function to check if file extension is allowed
 def allowed_file(filename):
@@ -198,29 +836,52 @@ def allowed_file(filename):
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 # Helper function to save uploaded file
+@timed(photo_store_seconds, source='upload')
 def save_file(file):
+    """Store an uploaded photo in the photo store and return its relative path"""
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        # Generate unique filename to prevent overwrites
-        unique_filename = f"{uuid.uuid4()}_{filename}"
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-        file.save(file_path)
-        return unique_filename
+        return photo_store.ingest_stream(file.stream)
     return None
 
-# Simulate face recognition check - in a real app, you would use real face recognition
-def check_face_verification(face_image_path, id_image_path, user_data):
+# Reject unusable photos before they are stored and face matched
+@timed(photo_screen_seconds)
+def screen_file(file, kind):
+    """Run an uploaded photo through the pre-screening cascade (see photo_screening)"""
+    if not current_app.config['PHOTO_SCREENING']:
+        return {'accepted': True, 'stage': None, 'message': None}
+    result = photo_screener.screen(file.stream, kind)
+    if not result['accepted']:
+        photo_screen_rejections.inc(kind=kind, stage=result['stage'])
+    return result
+
+# Run the face checks of a batch of verifications
+@timed(face_check_seconds, kind='batch')
+def match_verification_photos(pairs, references):
     """
-    Compare the face in the current photo with the ID document photo
-    In a real implementation, this would use facial recognition to compare the two photos
+    Compare live face photos with ID document photos ((face_path, id_path)
+    pairs) and with stored reference encodings ((face_path, encoding)
+    pairs). Each list is encoded in one pass over the face matcher's process
+    pool, not on the request thread. Returns (pair_results, reference_results),
+    the matcher results in input order; pair results include the ID photo
+    encoding when available.
     """
-    # This is a mock implementation - replace with actual face recognition
-    # For development, we'll always return True (verified)
-    print(f"Checking face verification: Face={face_image_path}, ID={id_image_path}")
-    return True
+    print(f"Checking face verifications: {len(pairs)} ID photo pairs, "
+          f"{len(references)} reference comparisons")
+    if not face_library_available():
+        # Development fallback when dlib/face_recognition is not installed
+        print("face_recognition is not installed - skipping face comparison")
+        return ([{'match': True, 'distance': None, 'face_encoding': None, 'id_encoding': None} for _ in pairs],
+                [{'match': True, 'distance': None, 'face_encoding': None} for _ in references])
+
+    pair_results = face_matcher.verify_batch(pairs) if pairs else []
+    reference_results = face_matcher.match_references(
+        [face_path for face_path, _ in references],
+        [encoding for _, encoding in references]
+    ) if references else []
+    return pair_results, reference_results
 
 # Routes
-@app.route('/api/register', methods=['POST'])
+@api.route('/api/register', methods=['POST'])
 def register():
     try:
         data = request.get_json()
@@ -262,7 +923,8 @@ def register():
             address=data.get('address'),
             city=data.get('city'),
             postal_code=data.get('postalCode'),
-            country=data.get('country')
+            country=data.get('country'),
+            pension_amount=float(data['pensionAmount']) if data.get('pensionAmount') is not None else None
         )
         
         # Parse date of birth if provided
@@ -275,11 +937,12 @@ def register():
         
         # Hash password if provided
         if data.get('password'):
-            new_user.password_hash = generate_password_hash(data['password'])
+            new_user.password_hash = password_hasher.hash(data['password'])
         
         # Save user to database
         db.session.add(new_user)
         db.session.commit()
+        user_cache.invalidate(new_user.id)
         
         return jsonify({
             'success': True,
@@ -287,6 +950,9 @@ def register():
             'user': new_user.to_dict()
         }), 201
         
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return password_hasher_busy_response()
     except Exception as e:
         db.session.rollback()
         print(f"Registration error: {str(e)}")
@@ -295,7 +961,7 @@ def register():
             'message': f'Registration failed: {str(e)}'
         }), 500
 
-@app.route('/api/login', methods=['POST'])
+@api.route('/api/login', methods=['POST'])
 def login():
     try:
         data = request.get_json()
@@ -331,11 +997,20 @@ def login():
                     'message': 'Account exists but has no password set. Try logging in with MetaMask.'
                 }), 401
             
-            if not check_password_hash(user.password_hash, data['password']):
+            if not password_hasher.verify(user.password_hash, data['password']):
                 return jsonify({
                     'success': False,
                     'message': 'Invalid email or password'
                 }), 401
+            
+            # Upgrade hashes made with older cost parameters while the password is at hand
+            if password_hasher.needs_rehash(user.password_hash):
+                try:
+                    user.password_hash = password_hasher.hash(data['password'])
+                    db.session.commit()
+                except PasswordHasherBusy:
+                    # Not worth failing the login over; retried at the next one
+                    pass
         
         else:
             return jsonify({
@@ -347,13 +1022,18 @@ def login():
         session['user_id'] = user.id
         session['auth_method'] = auth_method
         
+        user_data = user.to_dict()
+        user_cache.set(user.id, user_data)
+        
         return jsonify({
             'success': True,
             'message': 'Login successful',
-            'user': user.to_dict(),
+            'user': user_data,
             'authMethod': auth_method
         })
         
+    except PasswordHasherBusy:
+        return password_hasher_busy_response()
     except Exception as e:
         print(f"Login error: {str(e)}")
         return jsonify({
@@ -361,7 +1041,7 @@ def login():
             'message': f'Login failed: {str(e)}'
         }), 500
 
-@app.route('/api/user', methods=['GET'])
+@api.route('/api/user', methods=['GET'])
 def get_current_user():
     try:
         user_id = session.get('user_id')
@@ -372,7 +1052,8 @@ def get_current_user():
                 'message': 'Not authenticated'
             }), 401
         
-        user = User.query.get(user_id)
+        fields = user_serializer.parse_fields(request.args.get('fields'))
+        user = get_cached_user(user_id)
         
         if not user:
             # Clear invalid session
@@ -384,10 +1065,15 @@ def get_current_user():
         
         return jsonify({
             'success': True,
-            'user': user.to_dict(),
+            'user': project(user, fields),
             'authMethod': session.get('auth_method')
         })
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         print(f"Get current user error: {str(e)}")
         return jsonify({
@@ -395,7 +1081,7 @@ def get_current_user():
             'message': f'Error fetching user data: {str(e)}'
         }), 500
 
-@app.route('/api/logout', methods=['POST'])
+@api.route('/api/logout', methods=['POST'])
 def logout():
     try:
         session.clear()
@@ -410,8 +1096,163 @@ def logout():
             'message': f'Logout failed: {str(e)}'
         }), 500
 
+# Run face checks on saved verification photos and record the results
+def process_verifications(payloads):
+    """
+    Verify pensioners from photos already saved in UPLOAD_FOLDER and store
+    their Verification records. The face checks of all payloads run as one
+    batch, then each record is committed on its own. Returns one result per
+    payload, or the exception raised for it so the job queue can retry only
+    that job.
+    """
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    outcomes = [None] * len(payloads)
+    users = [None] * len(payloads)
+    checks = [None] * len(payloads)
+    pairs = []
+    references = []
+    
+    for index, payload in enumerate(payloads):
+        try:
+            user = db.session.get(User, payload['user_id'])
+            if not user:
+                outcomes[index] = {
+                    'success': False,
+                    'message': 'User not found'
+                }
+                continue
+            users[index] = user
+            
+            id_photo_path = payload['id_photo_path']
+            face_photo_path = payload['face_photo_path']
+            
+            # If both photos are available, compare the face with the ID photo
+            if id_photo_path and face_photo_path:
+                checks[index] = ('pair', len(pairs))
+                pairs.append((
+                    os.path.join(upload_folder, face_photo_path),
+                    os.path.join(upload_folder, id_photo_path)
+                ))
+            
+            # With only a face photo, compare against the stored reference encoding
+            elif face_photo_path:
+                stored_reference = load_reference_encoding(user.id)
+                if stored_reference is not None:
+                    checks[index] = ('reference', len(references))
+                    references.append((os.path.join(upload_folder, face_photo_path), stored_reference))
+        except Exception as e:
+            db.session.rollback()
+            outcomes[index] = e
+    
+    pair_results, reference_results = [], []
+    if pairs or references:
+        pair_results, reference_results = match_verification_photos(pairs, references)
+    
+    for index, payload in enumerate(payloads):
+        if outcomes[index] is not None:
+            continue
+        match_result = None
+        if checks[index]:
+            kind, position = checks[index]
+            match_result = (pair_results if kind == 'pair' else reference_results)[position]
+        try:
+            outcomes[index] = record_verification(users[index], payload, match_result)
+        except Exception as e:
+            db.session.rollback()
+            outcomes[index] = e
+    return outcomes
+
+def record_verification(user, payload, match_result):
+    """
+    Store the Verification record for one payload. match_result is the face
+    check result, or None when no check could run; first-time verifications
+    only require the photos to be uploaded.
+    """
+    pensioner_id = payload['pensioner_id']
+    wallet_address = payload['wallet_address']
+    id_photo_path = payload['id_photo_path']
+    face_photo_path = payload['face_photo_path']
+    
+    # Set pensioner ID if not provided
+    if pensioner_id == '0' and user.pensioner_id:
+        pensioner_id = str(user.pensioner_id)
+    
+    verification_successful = match_result['match'] if match_result else True
+    reference_encoding = match_result.get('id_encoding') if match_result else None
+    if match_result:
+        print(f"Face verification for pensioner {pensioner_id}: "
+              f"match={match_result['match']} distance={match_result['distance']}")
+    
+    # Calculate next verification date (180 days from now)
+    verification_date = datetime.datetime.utcnow()
+    next_verification_date = verification_date + datetime.timedelta(days=180)
+    
+    # Create verification record
+    verification = Verification(
+        pensioner_id=int(pensioner_id),
+        wallet_address=wallet_address,
+        id_photo_path=id_photo_path,
+        face_photo_path=face_photo_path,
+        status='verified' if verification_successful else 'rejected',
+        user_id=user.id,
+        last_verified_at=verification_date,
+        next_verification_date=next_verification_date
+    )
+    
+    db.session.add(verification)
+    
+    if verification_successful:
+        # Update user's pensioner ID if verification is successful
+        user_changed = not user.pensioner_id and pensioner_id != '0'
+        if user_changed:
+            user.pensioner_id = int(pensioner_id)
+        
+        # Keep the ID photo encoding so later checks can skip re-encoding it
+        if reference_encoding is not None:
+            db.session.flush()
+            store_reference_embedding(verification, reference_encoding)
+        
+        db.session.commit()
+        
+        if user_changed:
+            user_cache.invalidate(user.id)
+        
+        return {
+            'success': True,
+            'message': 'Verification successful',
+            'verification': verification.to_dict(),
+            'nextVerificationDate': next_verification_date.isoformat()
+        }
+    else:
+        db.session.commit()
+        return {
+            'success': False,
+            'message': 'Verification failed',
+            'verification': verification.to_dict()
+        }
+
+def process_verification(payload):
+    """
+    Verify a single payload inline (see process_verifications); exceptions
+    propagate to the caller.
+    """
+    outcome = process_verifications([payload])[0]
+    if isinstance(outcome, Exception):
+        raise outcome
+    return outcome
+
+# Background job handler for batches of queued verifications
+def run_verification_jobs(app, payloads):
+    with app.app_context():
+        try:
+            return process_verifications(payloads)
+        except Exception as e:
+            # The batched face check failed; retry every job of the batch
+            db.session.rollback()
+            return [e] * len(payloads)
+
 # API route to verify pensioner identity with facial recognition
-@app.route('/api/verify-pensioner', methods=['POST'])
+@api.route('/api/verify-pensioner', methods=['POST'])
 def verify_pensioner():
     try:
         # Check authentication
@@ -422,7 +1263,7 @@ def verify_pensioner():
                 'message': 'Not authenticated'
             }), 401
         
-        user = User.query.get(user_id)
+        user = get_cached_user(user_id)
         if not user:
             return jsonify({
                 'success': False,
@@ -460,6 +1301,19 @@ def verify_pensioner():
                 'message': 'At least one photo is required for verification'
             }), 400
         
+        # Reject unusable photos before storing them or queueing face checks
+        for kind, photo_file in ((ID_PHOTO, id_photo_file), (FACE_PHOTO, face_photo_file)):
+            if not photo_file:
+                continue
+            screening = screen_file(photo_file, kind)
+            if not screening['accepted']:
+                return jsonify({
+                    'success': False,
+                    'message': screening['message'],
+                    'photo': kind,
+                    'stage': screening['stage']
+                }), 400
+        
         # Save images
         id_photo_path = None
         face_photo_path = None
@@ -470,65 +1324,26 @@ def verify_pensioner():
         if face_photo_file:
             face_photo_path = save_file(face_photo_file)
         
-        # Set pensioner ID if not provided
-        if pensioner_id == '0' and user.pensioner_id:
-            pensioner_id = str(user.pensioner_id)
-        
-        # For first-time verification, we only require the photos to be uploaded
-        # For subsequent verifications, we'll check face against the registered image
-        verification_successful = True
-        
-        # If both photos are available, perform face verification
-        if id_photo_path and face_photo_path:
-            # Get paths to saved files
-            id_photo_full_path = os.path.join(app.config['UPLOAD_FOLDER'], id_photo_path)
-            face_photo_full_path = os.path.join(app.config['UPLOAD_FOLDER'], face_photo_path)
-            
-            # Perform verification
-            verification_successful = check_face_verification(
-                face_photo_full_path,
-                id_photo_full_path,
-                {'pensionerID': pensioner_id}
-            )
-        
-        # Calculate next verification date (180 days from now)
-        verification_date = datetime.datetime.utcnow()
-        next_verification_date = verification_date + datetime.timedelta(days=180)
-        
-        # Create verification record
-        verification = Verification(
-            pensioner_id=int(pensioner_id),
-            wallet_address=wallet_address,
-            id_photo_path=id_photo_path,
-            face_photo_path=face_photo_path,
-            status='verified' if verification_successful else 'rejected',
-            user_id=user.id,
-            last_verified_at=verification_date,
-            next_verification_date=next_verification_date
-        )
-        
-        db.session.add(verification)
+        payload = {
+            'user_id': user['id'],
+            'pensioner_id': pensioner_id,
+            'wallet_address': wallet_address,
+            'id_photo_path': id_photo_path,
+            'face_photo_path': face_photo_path
+        }
         
-        if verification_successful:
-            # Update user's pensioner ID if verification is successful
-            if not user.pensioner_id and pensioner_id != '0':
-                user.pensioner_id = int(pensioner_id)
-            
-            db.session.commit()
-            
+        # Hand the face checks to the background workers
+        if current_app.config['ASYNC_VERIFICATION']:
+            job_id = job_queue.enqueue('verify_pensioner', payload)
             return jsonify({
                 'success': True,
-                'message': 'Verification successful',
-                'verification': verification.to_dict(),
-                'nextVerificationDate': next_verification_date.isoformat()
-            })
-        else:
-            db.session.commit()
-            return jsonify({
-                'success': False,
-                'message': 'Verification failed',
-                'verification': verification.to_dict()
-            }), 400
+                'message': 'Verification queued',
+                'jobId': job_id,
+                'statusUrl': f'/api/verification-jobs/{job_id}'
+            }), 202
+        
+        result = process_verification(payload)
+        return jsonify(result), (200 if result['success'] else 400)
         
     except Exception as e:
         db.session.rollback()
@@ -538,8 +1353,66 @@ def verify_pensioner():
             'message': f'Verification process failed: {str(e)}'
         }), 500
 
+# API route to poll the status of a queued verification
+@api.route('/api/verification-jobs/<job_id>', methods=['GET'])
+def get_verification_job(job_id):
+    try:
+        user_id = session.get('user_id')
+        if not user_id:
+            return jsonify({
+                'success': False,
+                'message': 'Not authenticated'
+            }), 401
+        
+        job = job_queue.get(job_id)
+        if not job or job['kind'] != 'verify_pensioner':
+            return jsonify({
+                'success': False,
+                'message': 'Verification job not found'
+            }), 404
+        
+        # Only the owner of the job or an admin may see it
+        if job['payload']['user_id'] != user_id:
+            user = get_cached_user(user_id)
+            if not user or user['role'] != 'admin':
+                return jsonify({
+                    'success': False,
+                    'message': 'Verification job not found'
+                }), 404
+        
+        return jsonify({
+            'success': True,
+            'job': {
+                'id': job['id'],
+                'status': job['status'],
+                'attempts': job['attempts'],
+                'maxAttempts': job['max_attempts'],
+                'result': job['result'],
+                'error': job['error'],
+                'createdAt': datetime.datetime.utcfromtimestamp(job['created_at']).isoformat(),
+                'updatedAt': datetime.datetime.utcfromtimestamp(job['updated_at']).isoformat()
+            }
+        })
+        
+    except Exception as e:
+        print(f"Get verification job error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error fetching verification job: {str(e)}'
+        }), 500
+
+def pensioner_data_validators(response, etag):
+    """
+    Cache validators of /api/pensioner-data; clients must revalidate every
+    time. There is no Last-Modified: profile, status and amount changes
+    have no timestamp, so only the ETag covers every change.
+    """
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 # API route to get pensioner data for the current user
-@app.route('/api/pensioner-data', methods=['GET'])
+@api.route('/api/pensioner-data', methods=['GET'])
 def get_pensioner_data():
     try:
         # Check authentication
@@ -551,7 +1424,7 @@ def get_pensioner_data():
             }), 401
         
         # Get user
-        user = User.query.get(user_id)
+        user = get_cached_user(user_id)
         if not user:
             return jsonify({
                 'success': False,
@@ -559,50 +1432,93 @@ def get_pensioner_data():
             }), 404
             
         # Check if user is a pensioner
-        if user.role != 'pensioner':
+        if user['role'] != 'pensioner':
             return jsonify({
                 'success': False,
                 'message': 'User is not a pensioner'
             }), 403
             
         # Get wallet address
-        wallet_address = user.wallet_address
+        wallet_address = user['walletAddress']
         if not wallet_address:
             return jsonify({
                 'success': False,
                 'message': 'No wallet address associated with user'
             }), 400
             
-        # Get pensioner verifications
-        verifications = Verification.query.filter_by(user_id=user.id).all()
+        limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+        cursor = request.args.get('cursor')
+        # Sparse field set of the embedded verifications
+        fields = verification_serializer.parse_fields(request.args.get('fields'))
+        
+        # Verifications are only ever inserted, so the newest ID and the count
+        # identify the history; both come from the (user_id, id) index
+        verification_count, latest_id = db.session.query(
+            db.func.count(Verification.id),
+            db.func.max(Verification.id)
+        ).filter(Verification.user_id == user['id']).one()
+        
+        # The user dict covers profile, status and amount changes
+        etag = hashlib.sha256(json.dumps(
+            [user, verification_count, latest_id, limit, cursor, fields], sort_keys=True, default=str
+        ).encode()).hexdigest()
+        
+        # Unchanged since the client's copy: skip loading and serializing the history
+        if not is_resource_modified(request.environ, etag=etag):
+            response = current_app.response_class(status=304)
+            return pensioner_data_validators(response, etag)
+        
+        # One page of the history, newest first
+        query = Verification.query.filter(Verification.user_id == user['id'])
+        if cursor:
+            _, last_id = decode_cursor(cursor)
+            query = query.filter(keyset_filter(Verification.id, Verification.id, last_id, last_id, descending=True))
+        verifications = query.order_by(*keyset_order(Verification.id, Verification.id, descending=True)).limit(limit + 1).all()
+        has_more = len(verifications) > limit
+        verifications = verifications[:limit]
+        next_cursor = encode_cursor(verifications[-1].id, verifications[-1].id) if has_more else None
+        
+        # Dates of the latest successful verification
+        last_success = Verification.query.filter(
+            Verification.user_id == user['id'],
+            Verification.status.in_(VERIFIED_STATUSES)
+        ).order_by(Verification.id.desc()).first()
         
         # Create pensioner data object
         pensioner_data = {
-            'id': user.pensioner_id,
-            'name': f"{user.first_name} {user.last_name}",
-            'firstName': user.first_name,
-            'lastName': user.last_name,
+            'id': user['pensionerID'],
+            'name': user['fullName'],
+            'firstName': user['firstName'],
+            'lastName': user['lastName'],
             'wallet': wallet_address,
-            'email': user.email,
-            'phone': user.phone,
-            'address': user.address,
-            'city': user.city,
-            'country': user.country,
-            'postalCode': user.postal_code,
-            'pensionAmount': '1.5',  # Default mock amount
-            'lastVerificationDate': datetime.datetime.utcnow(),
-            'isActive': True,
-            'isDeceased': False,
-            'nextVerificationDate': datetime.datetime.utcnow() + datetime.timedelta(days=180),
+            'email': user['email'],
+            'phone': user['phone'],
+            'address': user['address'],
+            'city': user['city'],
+            'country': user['country'],
+            'postalCode': user['postalCode'],
+            'pensionAmount': str(user['pensionAmount']) if user['pensionAmount'] is not None else None,
+            'lastVerificationDate': last_success.last_verified_at.isoformat() if last_success and last_success.last_verified_at else None,
+            'isActive': user['isActive'],
+            'isDeceased': user['isDeceased'],
+            'nextVerificationDate': last_success.next_verification_date.isoformat() if last_success and last_success.next_verification_date else None,
             'verificationStatus': 'active',
-            'verifications': [v.to_dict() for v in verifications]
+            'verifications': verification_serializer.many(verifications, fields),
+            'verificationCount': verification_count,
+            'verificationsNextCursor': next_cursor
         }
         
-        return jsonify({
+        response = jsonify({
             'success': True,
             'pensioner': pensioner_data
         })
+        return pensioner_data_validators(response, etag)
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         print(f"Get pensioner data error: {str(e)}")
         return jsonify({
@@ -610,147 +1526,1475 @@ def get_pensioner_data():
             'message': f'Error fetching pensioner data: {str(e)}'
         }), 500
 
-@app.route('/api/sync-verification', methods=['POST'])
-def sync_verification():
+# Save one photo of an offline verification and return its stored filename
+@timed(photo_store_seconds, source='sync')
+def save_sync_photo(prefix, file=None, upload_id=None, data_url=None, owner_id=None):
     """
-    Endpoint to sync offline verifications
+    Store a synced photo in the photo store. The photo can arrive as a
+    multipart file part, a completed chunked upload, or a legacy base64
+    data URL. Files and uploads are streamed to disk without being read
+    into memory as a whole.
     """
-    # Check if user is authenticated
-    user_id = session.get('user_id')
+    if upload_id:
+        upload = upload_store.get(upload_id)
+        if not upload or upload['ownerID'] != owner_id:
+            raise UploadError('Upload not found')
+        staged_path = os.path.join(photo_store.tmp_dir, f"{prefix}_{uuid.uuid4()}")
+        upload_store.complete(upload_id, staged_path)
+        return photo_store.ingest_path(staged_path)
+    
+    if file and file.filename:
+        return photo_store.ingest_stream(file.stream)
+    
+    if data_url and data_url.startswith('data:image'):
+        # Decode only the payload after the header
+        _, _, image_data = data_url.partition(',')
+        data = base64.b64decode(image_data, validate=True)
+        if not data:
+            raise ValueError('Empty photo')
+        return photo_store.ingest_bytes(data)
+    
+    return None
+
+# Create the Verification row for one synced offline verification
+def create_synced_verification(user, item, files=None, file_suffix=''):
+    """
+    Validate a synced verification item, store its photos and add the
+    Verification to the session. The user is the cached user dict.
+    Returns the verification (uncommitted). Raises ValueError when the
+    item is invalid or one of its photos cannot be stored, so the item
+    fails and the client keeps it queued.
+    """
+    files = files or {}
+    
+    # Validate required fields
+    if not item.get('firstName') or not item.get('lastName') or not item.get('walletAddress'):
+        raise ValueError('Missing required fields')
+    
+    id_photo_path = None
+    face_photo_path = None
+    for prefix, field in (('id', 'idPhoto'), ('face', 'facePhoto')):
+        file = files.get(f'{field}{file_suffix}')
+        upload_id = item.get(f'{field}UploadId')
+        data_url = item.get(field)
+        if not ((file and file.filename) or upload_id or data_url):
+            continue
+        try:
+            path = save_sync_photo(prefix, file=file, upload_id=upload_id, data_url=data_url,
+                                   owner_id=user['id'])
+        except Exception as e:
+            print(f"Error saving {field}: {str(e)}")
+            path = None
+        if not path:
+            raise ValueError(f'Could not store {field}')
+        if prefix == 'id':
+            id_photo_path = path
+        else:
+            face_photo_path = path
+    
+    if not id_photo_path and not face_photo_path:
+        raise ValueError('At least one photo is required for verification')
+    
+    # Calculate verification dates
+    verification_date = datetime.datetime.utcnow()
+    next_verification_date = verification_date + datetime.timedelta(days=180)
+    
+    # Create a verification entry
+    verification = Verification(
+        pensioner_id=user['pensionerID'] or 0,  # Use existing ID or placeholder
+        wallet_address=item['walletAddress'],
+        id_photo_path=id_photo_path,
+        face_photo_path=face_photo_path,
+        status='approved',  # Auto-approve for demo purposes
+        user_id=user['id'],
+        last_verified_at=verification_date,
+        next_verification_date=next_verification_date
+    )
+    db.session.add(verification)
+    return verification
+
+# Sync a batch of offline verifications in one transaction
+def sync_verification_batch(user, items, files=None, indexed_files=True):
+    """
+    Insert many synced verifications with a single commit. Items carrying a
+    client-supplied 'clientKey' are idempotent: a key that was already synced
+    returns the original verification instead of creating a new one.
+    File parts are named <field>_<index> unless indexed_files is False.
+    Returns one result dict per item, in order.
+    """
+    files = files or {}
+    
+    # Look up every already-synced key of the batch in one query
+    keys = {item.get('clientKey') for item in items if isinstance(item, dict) and item.get('clientKey')}
+    synced = {}
+    if keys:
+        rows = db.session.query(SyncReceipt.client_key, Verification).join(
+            Verification, Verification.id == SyncReceipt.verification_id
+        ).filter(
+            SyncReceipt.user_id == user['id'],
+            SyncReceipt.client_key.in_(keys)
+        ).all()
+        synced = {key: verification for key, verification in rows}
+    
+    results = []
+    created = []
+    for index, item in enumerate(items):
+        key = item.get('clientKey') if isinstance(item, dict) else None
+        result = {'index': index, 'clientKey': key}
+        
+        if key and key in synced:
+            result.update({'success': True, 'duplicate': True, 'verification': synced[key]})
+            results.append(result)
+            continue
+        
+        try:
+            if not isinstance(item, dict):
+                raise ValueError('Invalid verification item')
+            suffix = f'_{index}' if indexed_files else ''
+            verification = create_synced_verification(user, item, files, suffix)
+        except ValueError as e:
+            result.update({'success': False, 'message': str(e)})
+            results.append(result)
+            continue
+        
+        created.append((key, verification))
+        if key:
+            # Repeated keys within the same batch resolve to the first item
+            synced[key] = verification
+        result.update({'success': True, 'duplicate': False, 'verification': verification})
+        results.append(result)
+    
+    if created:
+        # One flush inserts all new rows, then their receipts, then one commit
+        db.session.flush()
+        db.session.add_all([
+            SyncReceipt(client_key=key, user_id=user['id'], verification_id=verification.id)
+            for key, verification in created if key
+        ])
+    db.session.commit()
+    
+    for result in results:
+        if 'verification' in result:
+            result['verification'] = result['verification'].to_dict()
+    return results
+
+# Read the verification item(s) of a sync request
+def read_sync_request():
+    """
+    Return (items, files, is_batch) for a sync request. Multipart requests
+    carry their metadata as a JSON 'metadata' field (one object or a list)
+    and their photos as file parts; JSON requests carry base64 data URLs.
+    """
+    if request.mimetype == 'multipart/form-data':
+        if 'metadata' in request.form:
+            metadata = json.loads(request.form['metadata'])
+        else:
+            metadata = request.form.to_dict()
+        files = request.files
+    else:
+        metadata = request.get_json(silent=True)
+        files = {}
+    
+    if isinstance(metadata, dict) and isinstance(metadata.get('verifications'), list):
+        metadata = metadata['verifications']
+    if isinstance(metadata, list):
+        return metadata, files, True
+    return ([metadata] if metadata else []), files, False
+
+@api.route('/api/sync-verification', methods=['POST'])
+def sync_verification():
+    """
+    Endpoint to sync one offline verification; batches go to
+    /api/sync-verifications, which caps their size
+    """
+    # Check if user is authenticated
+    user_id = session.get('user_id')
     if not user_id:
         return jsonify({
             'success': False,
             'message': 'Authentication required'
         }), 401
     
-    # Get verification data from request
-    data = request.get_json()
-    if not data:
+    try:
+        # Get verification data from request
+        items, files, is_batch = read_sync_request()
+        if not items:
+            return jsonify({
+                'success': False,
+                'message': 'No data provided'
+            }), 400
+        if is_batch:
+            return jsonify({
+                'success': False,
+                'message': 'Sync batches of verifications through /api/sync-verifications'
+            }), 400
+        
+        # Find the user
+        user = get_cached_user(user_id)
+        if not user:
+            return jsonify({
+                'success': False,
+                'message': 'User not found'
+            }), 404
+        
+        result = sync_verification_batch(user, items, files, indexed_files=False)[0]
+        if not result['success']:
+            return jsonify({
+                'success': False,
+                'message': result['message']
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'message': 'Verification synced successfully',
+            'verification': result['verification'],
+            'nextVerificationDate': result['verification']['nextVerificationDate']
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error syncing verification: {str(e)}")
         return jsonify({
             'success': False,
-            'message': 'No data provided'
-        }), 400
+            'message': f'Server error: {str(e)}'
+        }), 500
+
+# API route to sync many offline verifications in one transaction
+@api.route('/api/sync-verifications', methods=['POST'])
+def sync_verifications():
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({
+            'success': False,
+            'message': 'Authentication required'
+        }), 401
     
     try:
-        # Extract data from request
-        first_name = data.get('firstName')
-        last_name = data.get('lastName')
-        date_of_birth = data.get('dateOfBirth')
-        national_id = data.get('nationalId')
-        wallet_address = data.get('walletAddress')
-        id_photo = data.get('idPhoto')
-        face_photo = data.get('facePhoto')
-        
-        # Validate required fields
-        if not first_name or not last_name or not wallet_address:
+        items, files, _ = read_sync_request()
+        if not items:
             return jsonify({
                 'success': False,
-                'message': 'Missing required fields'
+                'message': 'No data provided'
             }), 400
         
-        # Find or create the user
-        user = User.query.get(user_id)
+        max_items = current_app.config['SYNC_BATCH_MAX_ITEMS']
+        if len(items) > max_items:
+            return jsonify({
+                'success': False,
+                'message': f'Too many verifications in one batch (max {max_items})'
+            }), 413
+        
+        user = get_cached_user(user_id)
         if not user:
             return jsonify({
                 'success': False,
                 'message': 'User not found'
             }), 404
         
-        # Save ID photo if provided
-        id_photo_path = None
-        if id_photo and id_photo.startswith('data:image'):
-            try:
-                # Extract base64 data
-                image_data = id_photo.split(',')[1]
-                binary_data = base64.b64decode(image_data)
-                
-                # Generate a filename
-                filename = f"id_{uuid.uuid4()}.jpg"
-                photo_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                
-                # Save the file
-                with open(photo_path, 'wb') as f:
-                    f.write(binary_data)
-                
-                # Use relative path for storage
-                id_photo_path = filename
-            except Exception as e:
-                print(f"Error saving ID photo: {str(e)}")
-        
-        # Save face photo if provided
-        face_photo_path = None
-        if face_photo and face_photo.startswith('data:image'):
-            try:
-                # Extract base64 data
-                image_data = face_photo.split(',')[1]
-                binary_data = base64.b64decode(image_data)
-                
-                # Generate a filename
-                filename = f"face_{uuid.uuid4()}.jpg"
-                photo_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                
-                # Save the file
-                with open(photo_path, 'wb') as f:
-                    f.write(binary_data)
-                
-                # Use relative path for storage
-                face_photo_path = filename
-            except Exception as e:
-                print(f"Error saving face photo: {str(e)}")
-        
-        # Calculate verification dates
-        verification_date = datetime.datetime.utcnow()
-        next_verification_date = verification_date + datetime.timedelta(days=180)
-        
-        # Create a verification entry
-        verification = Verification(
-            pensioner_id=user.pensioner_id or 0,  # Use existing ID or placeholder
-            wallet_address=wallet_address,
-            id_photo_path=id_photo_path,
-            face_photo_path=face_photo_path,
-            status='approved',  # Auto-approve for demo purposes
-            user_id=user_id,
-            last_verified_at=verification_date,
-            next_verification_date=next_verification_date
+        results = sync_verification_batch(user, items, files)
+        synced = sum(1 for result in results if result['success'])
+        return jsonify({
+            'success': synced == len(results),
+            'message': f'Synced {synced} of {len(results)} verifications',
+            'results': results
+        })
+    
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error syncing verification batch: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Server error: {str(e)}'
+        }), 500
+
+# API route to start a resumable chunked photo upload
+@api.route('/api/uploads', methods=['POST'])
+def create_upload():
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({
+            'success': False,
+            'message': 'Authentication required'
+        }), 401
+    
+    try:
+        data = request.get_json() or {}
+        upload = upload_store.create(
+            int(data.get('length', 0)),
+            filename=secure_filename(data.get('filename') or '') or None,
+            owner_id=user_id
         )
+        return jsonify({
+            'success': True,
+            'upload': upload
+        }), 201
+    except (UploadError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+
+# API route to query and append to a chunked upload
+@api.route('/api/uploads/<upload_id>', methods=['GET', 'PATCH', 'DELETE'])
+def chunked_upload(upload_id):
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({
+            'success': False,
+            'message': 'Authentication required'
+        }), 401
+    
+    # Malformed IDs are unknown uploads; nothing below has to handle them
+    upload = upload_store.get(upload_id) if upload_store.is_valid_id(upload_id) else None
+    if not upload or upload['ownerID'] != user_id:
+        return jsonify({
+            'success': False,
+            'message': 'Upload not found'
+        }), 404
+    
+    try:
+        if request.method == 'DELETE':
+            upload_store.discard(upload_id)
+            return jsonify({
+                'success': True,
+                'message': 'Upload discarded'
+            })
         
-        db.session.add(verification)
-        db.session.commit()
+        if request.method == 'PATCH':
+            # The chunk body is streamed from the request straight to disk
+            offset = int(request.headers.get('Upload-Offset', -1))
+            upload = upload_store.append(upload_id, offset, request.stream)
+        else:
+            upload = upload_store.status(upload_id)
+        
+        response = jsonify({
+            'success': True,
+            'upload': upload
+        })
+        response.headers['Upload-Offset'] = str(upload['offset'])
+        response.headers['Upload-Length'] = str(upload['length'])
+        return response
+    
+    except (UploadError, ValueError) as e:
+        status = upload_store.status(upload_id)
+        response = jsonify({
+            'success': False,
+            'message': str(e),
+            'upload': status
+        })
+        if status:
+            response.headers['Upload-Offset'] = str(status['offset'])
+        return response, 409
+
+# Admin API route to search the face index for a pensioner's closest matches
+@api.route('/api/admin/face-search/<int:user_id>', methods=['GET'])
+def face_search(user_id):
+    try:
+        admin = get_admin_user()
+        if not admin:
+            return jsonify({
+                'success': False,
+                'message': 'Admin access required'
+            }), 403
+        
+        reference = load_reference_encoding(user_id)
+        if reference is None:
+            return jsonify({
+                'success': False,
+                'message': 'No reference face encoding for this user'
+            }), 404
+        
+        limit = max(1, min(request.args.get('limit', 5, type=int), 100))
+        max_distance = request.args.get('maxDistance', type=float)
+        matches = get_face_index().search(reference, k=limit, max_distance=max_distance, exclude_user_id=user_id)
         
         return jsonify({
             'success': True,
-            'message': 'Verification synced successfully',
-            'verification': verification.to_dict(),
-            'nextVerificationDate': next_verification_date.isoformat()
+            'userID': user_id,
+            'matches': matches
         })
         
     except Exception as e:
-        db.session.rollback()
-        print(f"Error syncing verification: {str(e)}")
+        print(f"Face search error: {str(e)}")
         return jsonify({
             'success': False,
-            'message': f'Server error: {str(e)}'
+            'message': f'Face search failed: {str(e)}'
         }), 500
 
-if __name__ == '__main__':
-    command = sys.argv[1] if len(sys.argv) > 1 else None
+# Admin API route listing different users whose faces look the same
+@api.route('/api/admin/duplicate-faces', methods=['GET'])
+def duplicate_faces():
+    try:
+        admin = get_admin_user()
+        if not admin:
+            return jsonify({
+                'success': False,
+                'message': 'Admin access required'
+            }), 403
+        
+        max_distance = request.args.get('maxDistance', 0.45, type=float)
+        duplicates = get_face_index().find_duplicates(max_distance)
+        
+        return jsonify({
+            'success': True,
+            'maxDistance': max_distance,
+            'duplicates': duplicates
+        })
+        
+    except Exception as e:
+        print(f"Duplicate face check error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Duplicate face check failed: {str(e)}'
+        }), 500
+
+# Sortable columns of the admin pensioner listing
+PENSIONER_SORT_COLUMNS = {
+    'id': User.id,
+    'lastName': User.last_name,
+    'createdAt': User.created_at,
+    'nextVerificationDate': User.next_verification_date
+}
+
+# Verification status filters of the admin pensioner listing
+def pensioner_status_filter(status, now):
+    if status == 'verified':
+        return User.next_verification_date > now
+    if status == 'dueSoon':
+        return db.and_(User.next_verification_date > now,
+                       User.next_verification_date <= now + datetime.timedelta(days=30))
+    if status == 'overdue':
+        return User.next_verification_date <= now
+    if status == 'neverVerified':
+        return User.next_verification_date.is_(None)
+    if status == 'active':
+        return db.and_(User.is_active.is_(True), User.is_deceased.is_(False))
+    if status == 'inactive':
+        return db.and_(User.is_active.is_(False), User.is_deceased.is_(False))
+    if status == 'deceased':
+        return User.is_deceased.is_(True)
+    raise ValueError(f'Unknown status filter: {status}')
+
+# Admin API route listing pensioners with search, filters and keyset pagination
+@api.route('/api/admin/pensioners', methods=['GET'])
+def list_pensioners():
+    try:
+        if not get_admin_user():
+            return jsonify({
+                'success': False,
+                'message': 'Admin access required'
+            }), 403
+        
+        now = datetime.datetime.utcnow()
+        sort = request.args.get('sort', 'id')
+        descending = request.args.get('order', 'asc') == 'desc'
+        limit = max(1, min(request.args.get('limit', 50, type=int), 500))
+        search = (request.args.get('q') or '').strip()
+        status = request.args.get('status')
+        
+        if sort not in PENSIONER_SORT_COLUMNS:
+            return jsonify({
+                'success': False,
+                'message': f'Cannot sort by {sort}'
+            }), 400
+        sort_column = PENSIONER_SORT_COLUMNS[sort]
+        
+        # Select only the listed columns instead of full User entities
+        query = db.session.query(
+            User.id, User.pensioner_id, User.first_name, User.last_name, User.email,
+            User.wallet_address, User.created_at, User.last_verified_at, User.next_verification_date,
+            User.is_active, User.is_deceased
+        ).filter(User.role == 'pensioner')
+        
+        if status:
+            query = query.filter(pensioner_status_filter(status, now))
+        
+        # Search: pensioner ID, wallet address prefix, or name/email prefix
+        if search:
+            # Wildcards typed by the admin match themselves
+            prefix = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            if search.isdigit():
+                query = query.filter(User.pensioner_id == int(search))
+            elif search.lower().startswith('0x'):
+                query = query.filter(User.wallet_address.like(prefix, escape='\\'))
+            else:
+                query = query.filter(db.or_(
+                    User.last_name.like(prefix, escape='\\'),
+                    User.first_name.like(prefix, escape='\\'),
+                    User.email.like(prefix, escape='\\')
+                ))
+        
+        if request.args.get('cursor'):
+            last_value, last_id = decode_cursor(request.args['cursor'])
+            query = query.filter(keyset_filter(sort_column, User.id, last_value, last_id, descending))
+        
+        # Fetch one extra row to know whether another page exists
+        rows = query.order_by(*keyset_order(sort_column, User.id, descending)).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        items = []
+        for row in rows:
+            if row.next_verification_date is None:
+                row_status = 'neverVerified'
+            elif row.next_verification_date <= now:
+                row_status = 'overdue'
+            else:
+                row_status = 'verified'
+            items.append({
+                'id': row.id,
+                'pensionerID': row.pensioner_id,
+                'name': f"{row.first_name} {row.last_name}",
+                'email': row.email,
+                'wallet': row.wallet_address,
+                'lastVerifiedAt': row.last_verified_at.isoformat() if row.last_verified_at else None,
+                'nextVerificationDate': row.next_verification_date.isoformat() if row.next_verification_date else None,
+                'status': row_status,
+                'isActive': row.is_active,
+                'isDeceased': row.is_deceased
+            })
+        
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            next_cursor = encode_cursor(getattr(last, sort_column.key), last.id)
+        
+        return jsonify({
+            'success': True,
+            'items': items,
+            'nextCursor': next_cursor
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        print(f"List pensioners error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error listing pensioners: {str(e)}'
+        }), 500
+
+# Set-based uniqueness check for a chunk of imported pensioners
+def find_existing_users(emails, wallets):
+    existing_emails = set()
+    existing_wallets = set()
+    if emails:
+        existing_emails = {row.email for row in db.session.query(User.email).filter(User.email.in_(emails))}
+    if wallets:
+        existing_wallets = {
+            row.wallet_address
+            for row in db.session.query(User.wallet_address).filter(User.wallet_address.in_(wallets))
+        }
+    return existing_emails, existing_wallets
+
+def insert_user_chunk(rows):
+    """Insert a chunk of users in one transaction; returns {index: error} for rejected rows"""
+    try:
+        db.session.add_all([User(**values) for values in rows])
+        db.session.commit()
+        return {}
+    except IntegrityError:
+        db.session.rollback()
     
-    if command == '--reset-db':
-        reset_db()
-        create_demo_users()
-        print("Database reset and demo users created successfully!")
-        sys.exit(0)
-    elif command == '--demo':
-        create_demo_users()
+    # Someone registered one of these users meanwhile; insert one by one to find out who
+    failures = {}
+    for index, values in enumerate(rows):
+        try:
+            db.session.add(User(**values))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            failures[index] = 'Email or wallet address already registered'
+    return failures
+
+def import_pensioners(path, file_format, dry_run=False, report_path=None):
+    """Import pensioners from a CSV/JSONL file and return the report as a dict"""
+    importer = BulkImporter(
+        find_existing_users,
+        insert_user_chunk,
+        password_hasher.hash_background,
+        chunk_size=current_app.config['IMPORT_CHUNK_SIZE'],
+        hash_workers=current_app.config['IMPORT_HASH_WORKERS']
+    )
+    with open(path, 'rb') as f:
+        report = importer.run(iter_records(f, file_format), dry_run=dry_run, report_path=report_path)
     
-    # Create tables if they don't exist
+    result = report.to_dict()
+    result['dryRun'] = dry_run
+    result['errorReport'] = bool(report_path and report.failed)
+    return result
+
+def run_import_job(app, payload):
     with app.app_context():
+        try:
+            return import_pensioners(
+                payload['path'],
+                payload['format'],
+                dry_run=payload['dry_run'],
+                report_path=payload['report_path']
+            )
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            if os.path.exists(payload['path']):
+                os.remove(payload['path'])
+
+def get_import_job(job_id):
+    job = job_queue.get(job_id)
+    if not job or job['kind'] != 'import_pensioners':
+        return None
+    return job
+
+# Admin API route starting a bulk pensioner import from a CSV or JSONL file
+@api.route('/api/admin/pensioners/import', methods=['POST'])
+def start_pensioner_import():
+    try:
+        if not get_admin_user():
+            return jsonify({
+                'success': False,
+                'message': 'Admin access required'
+            }), 403
+        
+        upload = request.files.get('file')
+        if not upload:
+            return jsonify({
+                'success': False,
+                'message': 'Missing import file'
+            }), 400
+        
+        file_format = request.form.get('format') or detect_format(upload.filename or '')
+        if file_format not in IMPORT_FORMATS:
+            return jsonify({
+                'success': False,
+                'message': 'Import file must be CSV or JSONL'
+            }), 400
+        
+        import_id = str(uuid.uuid4())
+        path = os.path.join(import_folder(), f'{import_id}.{file_format}')
+        upload.save(path)
+        
+        # Imports hash thousands of passwords, so they always run in the background
+        job_id = job_queue.enqueue('import_pensioners', {
+            'path': path,
+            'format': file_format,
+            'dry_run': request.form.get('dryRun') in ('1', 'true'),
+            'report_path': os.path.join(import_folder(), f'{import_id}.errors.csv')
+        }, max_attempts=1)
+        
+        return jsonify({
+            'success': True,
+            'message': 'Import started',
+            'jobId': job_id,
+            'statusUrl': f'/api/admin/pensioners/import/{job_id}'
+        }), 202
+        
+    except Exception as e:
+        print(f"Pensioner import error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Failed to start import: {str(e)}'
+        }), 500
+
+# Admin API route reporting the progress and result of a bulk import
+@api.route('/api/admin/pensioners/import/<job_id>', methods=['GET'])
+def get_pensioner_import(job_id):
+    try:
+        if not get_admin_user():
+            return jsonify({
+                'success': False,
+                'message': 'Admin access required'
+            }), 403
+        
+        job = get_import_job(job_id)
+        if not job:
+            return jsonify({
+                'success': False,
+                'message': 'Import not found'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'import': {
+                'id': job['id'],
+                'status': job['status'],
+                'report': job['result'],
+                'error': job['error'],
+                'createdAt': datetime.datetime.utcfromtimestamp(job['created_at']).isoformat(),
+                'updatedAt': datetime.datetime.utcfromtimestamp(job['updated_at']).isoformat()
+            }
+        })
+        
+    except Exception as e:
+        print(f"Get pensioner import error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error fetching import: {str(e)}'
+        }), 500
+
+# Admin API route downloading every rejected row of a bulk import as CSV
+@api.route('/api/admin/pensioners/import/<job_id>/errors', methods=['GET'])
+def get_pensioner_import_errors(job_id):
+    try:
+        if not get_admin_user():
+            return jsonify({
+                'success': False,
+                'message': 'Admin access required'
+            }), 403
+        
+        job = get_import_job(job_id)
+        if not job or not (job['result'] or {}).get('errorReport'):
+            return jsonify({
+                'success': False,
+                'message': 'No error report for this import'
+            }), 404
+        
+        return send_file(
+            job['payload']['report_path'],
+            mimetype='text/csv',
+            as_attachment=True,
+            download_name=f'import-{job_id}-errors.csv'
+        )
+        
+    except Exception as e:
+        print(f"Pensioner import errors error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error fetching error report: {str(e)}'
+        }), 500
+
+# Living pensioners under their blocking keys for death registry matching
+def load_death_match_index():
+    index = RosterIndex(max_block_size=current_app.config['DEATH_MATCH_MAX_BLOCK_SIZE'])
+    rows = db.session.query(
+        User.id, User.pensioner_id, User.first_name, User.last_name, User.date_of_birth, User.postal_code
+    ).filter(User.role == 'pensioner', User.is_deceased.is_(False)).yield_per(5000)
+    for row in rows:
+        index.add(
+            make_person(row.id, row.first_name, row.last_name, row.date_of_birth, row.postal_code),
+            (row.pensioner_id or '', row.first_name, row.last_name, iso(row.date_of_birth) or '', row.postal_code or '')
+        )
+    return index
+
+def match_death_registry(path, file_format, report_path):
+    """Match a CSV/JSONL death registry extract against the roster; candidates go to report_path"""
+    matcher = DeathRegistryMatcher(
+        load_death_match_index(),
+        min_score=current_app.config['DEATH_MATCH_MIN_SCORE'],
+        max_candidates=current_app.config['DEATH_MATCH_MAX_CANDIDATES']
+    )
+    with open(path, 'rb') as f:
+        report = matcher.run(iter_records(f, file_format), report_path)
+    result = report.to_dict()
+    result['rosterSize'] = len(matcher.index)
+    return result
+
+def run_death_match_job(app, payload):
+    with app.app_context():
+        try:
+            return match_death_registry(payload['path'], payload['format'], payload['report_path'])
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            if os.path.exists(payload['path']):
+                os.remove(payload['path'])
+
+def get_death_match_job(job_id):
+    job = job_queue.get(job_id)
+    if not job or job['kind'] != 'match_death_registry':
+        return None
+    return job
+
+# API route matching a death registry extract against the roster (admins and doctors)
+@api.route('/api/admin/death-registry/matches', methods=['POST'])
+def start_death_registry_match():
+    try:
+        if not get_death_registrar():
+            return jsonify({
+                'success': False,
+                'message': 'Admin or doctor access required'
+            }), 403
+        
+        upload = request.files.get('file')
+        if not upload:
+            return jsonify({
+                'success': False,
+                'message': 'Missing registry file'
+            }), 400
+        
+        file_format = request.form.get('format') or detect_format(upload.filename or '')
+        if file_format not in IMPORT_FORMATS:
+            return jsonify({
+                'success': False,
+                'message': 'Registry file must be CSV or JSONL'
+            }), 400
+        
+        match_id = str(uuid.uuid4())
+        path = os.path.join(import_folder(), f'{match_id}.registry.{file_format}')
+        upload.save(path)
+        
+        # Extracts hold hundreds of thousands of records, so matching runs in the background
+        job_id = job_queue.enqueue('match_death_registry', {
+            'path': path,
+            'format': file_format,
+            'report_path': os.path.join(import_folder(), f'{match_id}.candidates.csv')
+        }, max_attempts=1)
+        
+        return jsonify({
+            'success': True,
+            'message': 'Registry matching started',
+            'jobId': job_id,
+            'statusUrl': f'/api/admin/death-registry/matches/{job_id}'
+        }), 202
+        
+    except Exception as e:
+        print(f"Death registry match error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Failed to start registry matching: {str(e)}'
+        }), 500
+
+# API route reporting the progress and result of a death registry match
+@api.route('/api/admin/death-registry/matches/<job_id>', methods=['GET'])
+def get_death_registry_match(job_id):
+    try:
+        if not get_death_registrar():
+            return jsonify({
+                'success': False,
+                'message': 'Admin or doctor access required'
+            }), 403
+        
+        job = get_death_match_job(job_id)
+        if not job:
+            return jsonify({
+                'success': False,
+                'message': 'Registry match not found'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'match': {
+                'id': job['id'],
+                'status': job['status'],
+                'report': job['result'],
+                'error': job['error'],
+                'candidatesUrl': f'/api/admin/death-registry/matches/{job_id}/candidates',
+                'createdAt': datetime.datetime.utcfromtimestamp(job['created_at']).isoformat(),
+                'updatedAt': datetime.datetime.utcfromtimestamp(job['updated_at']).isoformat()
+            }
+        })
+        
+    except Exception as e:
+        print(f"Get death registry match error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error fetching registry match: {str(e)}'
+        }), 500
+
+# API route downloading the ranked match candidates as CSV, for confirmation via register-death
+@api.route('/api/admin/death-registry/matches/<job_id>/candidates', methods=['GET'])
+def get_death_registry_candidates(job_id):
+    try:
+        if not get_death_registrar():
+            return jsonify({
+                'success': False,
+                'message': 'Admin or doctor access required'
+            }), 403
+        
+        job = get_death_match_job(job_id)
+        if not job or job['status'] != JOB_SUCCEEDED:
+            return jsonify({
+                'success': False,
+                'message': 'No candidates for this registry match'
+            }), 404
+        
+        return send_file(
+            job['payload']['report_path'],
+            mimetype='text/csv',
+            as_attachment=True,
+            download_name=f'death-registry-{job_id}-candidates.csv'
+        )
+        
+    except Exception as e:
+        print(f"Death registry candidates error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error fetching candidates: {str(e)}'
+        }), 500
+
+# API route to record a pensioner's death (admins and doctors)
+@api.route('/api/admin/register-death', methods=['POST'])
+def register_death():
+    try:
+        user_id = session.get('user_id')
+        current = get_cached_user(user_id) if user_id else None
+        if not current or current['role'] not in ('admin', 'doctor'):
+            return jsonify({
+                'success': False,
+                'message': 'Admin or doctor access required'
+            }), 403
+        
+        data = request.get_json() or {}
+        if not data.get('pensionerID'):
+            return jsonify({
+                'success': False,
+                'message': 'Missing required field: pensionerID'
+            }), 400
+        
+        pensioner = User.query.filter_by(pensioner_id=int(data['pensionerID']), role='pensioner').first()
+        if not pensioner:
+            return jsonify({
+                'success': False,
+                'message': 'Pensioner not found'
+            }), 404
+        
+        if pensioner.is_deceased:
+            return jsonify({
+                'success': False,
+                'message': 'Pensioner already marked as deceased'
+            }), 400
+        
+        pensioner.is_deceased = True
+        pensioner.is_active = False
+        pensioner.deceased_at = datetime.datetime.utcnow()
+        db.session.commit()
+        user_cache.invalidate(pensioner.id)
+        
+        return jsonify({
+            'success': True,
+            'message': 'Death registered successfully',
+            'pensioner': pensioner.to_dict()
+        })
+        
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'Invalid pensioner ID'
+        }), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"Register death error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Failed to register death: {str(e)}'
+        }), 500
+
+# Admin API route serving the dashboard counters
+@api.route('/api/admin/stats', methods=['GET'])
+def admin_stats():
+    try:
+        if not get_admin_user():
+            return jsonify({
+                'success': False,
+                'message': 'Admin access required'
+            }), 403
+        
+        stats = db.session.get(PensionStats, STATS_ROW_ID) or recompute_stats()
+        
+        # Time-dependent figures come from the in-memory due schedule
+        due = due_schedule.summary()
+        eligible = due['total']
+        verified = eligible - due['neverVerified'] - due['overdue']
+        
+        response = jsonify({
+            'success': True,
+            'stats': {
+                'totalPensioners': stats.total_pensioners,
+                'activePensioners': stats.active_pensioners,
+                'inactivePensioners': stats.inactive_pensioners,
+                'deceasedPensioners': stats.deceased_pensioners,
+                'totalAmountMonthly': round(stats.active_monthly_amount, 2),
+                'verificationRate': round(verified * 100 / eligible) if eligible else 100,
+                'alertsCount': due['overdue'] + due['dueWithin30Days'],
+                'updatedAt': stats.updated_at.isoformat() if stats.updated_at else None
+            }
+        })
+        
+        # Clients revalidate with If-None-Match and get a 304 while nothing changed
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.add_etag()
+        return response.make_conditional(request)
+        
+    except Exception as e:
+        print(f"Admin stats error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error fetching stats: {str(e)}'
+        }), 500
+
+# Admin API route listing pensioners due for re-verification, soonest first
+@api.route('/api/admin/due-verifications', methods=['GET'])
+def due_verifications():
+    try:
+        if not get_admin_user():
+            return jsonify({
+                'success': False,
+                'message': 'Admin access required'
+            }), 403
+        
+        now = datetime.datetime.utcnow()
+        within_days = request.args.get('withinDays', 30, type=int)
+        limit = max(1, min(request.args.get('limit', 50, type=int), 500))
+        
+        # Cursor is "<due timestamp>:<user id>" of the last entry of the previous page
+        after = None
+        if request.args.get('cursor'):
+            due, _, user_id = request.args['cursor'].partition(':')
+            after = (float(due), int(user_id))
+        
+        page, has_more = due_schedule.due_before(
+            now + datetime.timedelta(days=within_days),
+            after=after,
+            limit=limit
+        )
+        
+        users = {}
+        if page:
+            users = {user.id: user for user in User.query.filter(User.id.in_([user_id for user_id, _ in page]))}
+        
+        items = []
+        for user_id, due in page:
+            user = users.get(user_id)
+            if not user:
+                continue
+            items.append({
+                'userID': user.id,
+                'pensionerID': user.pensioner_id,
+                'fullName': f"{user.first_name} {user.last_name}",
+                'email': user.email,
+                'walletAddress': user.wallet_address,
+                'nextVerificationDate': due.isoformat() if due else None,
+                'daysUntilDue': (due - now).days if due else None
+            })
+        
+        next_cursor = None
+        if has_more and page:
+            last_user_id, last_due = page[-1]
+            last_timestamp = last_due.replace(tzinfo=datetime.timezone.utc).timestamp() if last_due else 0.0
+            next_cursor = f"{last_timestamp}:{last_user_id}"
+        
+        return jsonify({
+            'success': True,
+            'items': items,
+            'nextCursor': next_cursor
+        })
+        
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'Invalid cursor'
+        }), 400
+    except Exception as e:
+        print(f"Due verifications error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error fetching due verifications: {str(e)}'
+        }), 500
+
+# Admin API route with counts of overdue and soon-due pensioners
+@api.route('/api/admin/due-verifications/summary', methods=['GET'])
+def due_verifications_summary():
+    try:
+        if not get_admin_user():
+            return jsonify({
+                'success': False,
+                'message': 'Admin access required'
+            }), 403
+        
+        return jsonify({
+            'success': True,
+            'summary': due_schedule.summary()
+        })
+        
+    except Exception as e:
+        print(f"Due verifications summary error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error fetching due verifications summary: {str(e)}'
+        }), 500
+
+# API route reading one pensioner from the chain mirror
+@api.route('/api/chain/pensioners/<int:pensioner_id>', methods=['GET'])
+def get_chain_pensioner(pensioner_id):
+    try:
+        if not session.get('user_id'):
+            return jsonify({
+                'success': False,
+                'message': 'Not logged in'
+            }), 401
+        
+        fields = chain_pensioner_serializer.parse_fields(request.args.get('fields'))
+        pensioner = db.session.get(ChainPensioner, pensioner_id)
+        if not pensioner:
+            return jsonify({
+                'success': False,
+                'message': 'Pensioner not found on chain'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'pensioner': pensioner.to_dict(fields)
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        print(f"Chain pensioner error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error fetching pensioner: {str(e)}'
+        }), 500
+
+# API route listing the chain mirror with keyset pagination
+@api.route('/api/chain/pensioners', methods=['GET'])
+def list_chain_pensioners():
+    try:
+        # The whole roster with wallets and amounts; admins only
+        if not get_admin_user():
+            return jsonify({
+                'success': False,
+                'message': 'Admin access required'
+            }), 403
+        
+        limit = max(min(request.args.get('limit', 100, type=int), 1000), 1)
+        status = request.args.get('status')
+        serialize = chain_pensioner_serializer.compiled(
+            chain_pensioner_serializer.parse_fields(request.args.get('fields'))
+        )
+        
+        query = ChainPensioner.query
+        if status == 'active':
+            query = query.filter(ChainPensioner.is_active.is_(True), ChainPensioner.is_deceased.is_(False))
+        elif status == 'blocked':
+            query = query.filter(ChainPensioner.is_active.is_(False), ChainPensioner.is_deceased.is_(False))
+        elif status == 'deceased':
+            query = query.filter(ChainPensioner.is_deceased.is_(True))
+        elif status:
+            return jsonify({
+                'success': False,
+                'message': f'Unknown status filter: {status}'
+            }), 400
+        
+        if request.args.get('cursor'):
+            _, last_id = decode_cursor(request.args['cursor'])
+            query = query.filter(ChainPensioner.pensioner_id > last_id)
+        
+        checkpoint = db.session.get(ChainCheckpoint, CHECKPOINT_ROW_ID)
+        indexed_block = checkpoint.block_number if checkpoint else None
+        
+        # The page is fetched and serialized before the response starts, so
+        # any error still becomes a 500 instead of a truncated 200 body; only
+        # the encoding is streamed. The extra row tells whether another page exists
+        rows = query.order_by(ChainPensioner.pensioner_id).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        items = [serialize(row) for row in rows]
+        next_cursor = encode_cursor(None, rows[-1].pensioner_id) if has_more else None
+        
+        return stream_json_items(
+            current_app.json,
+            items,
+            head={'success': True, 'indexedBlock': indexed_block},
+            tail=lambda: {'nextCursor': next_cursor}
+        )
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        print(f"Chain pensioners error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error listing pensioners: {str(e)}'
+        }), 500
+
+# API route reading many pensioners from the contract in one call
+@api.route('/api/chain/pensioners:batchGet', methods=['POST'])
+def batch_get_chain_pensioners():
+    try:
+        if not session.get('user_id'):
+            return jsonify({
+                'success': False,
+                'message': 'Not logged in'
+            }), 401
+        
+        data = request.get_json() or {}
+        pensioner_ids = data.get('ids')
+        if not isinstance(pensioner_ids, list) or not pensioner_ids:
+            return jsonify({
+                'success': False,
+                'message': 'Missing required field: ids'
+            }), 400
+        
+        max_ids = current_app.config['CHAIN_BATCH_GET_MAX_IDS']
+        if len(pensioner_ids) > max_ids:
+            return jsonify({
+                'success': False,
+                'message': f'At most {max_ids} IDs per request'
+            }), 400
+        
+        try:
+            pensioner_ids = [int(pensioner_id) for pensioner_id in pensioner_ids]
+        except (TypeError, ValueError):
+            return jsonify({
+                'success': False,
+                'message': 'ids must be a list of pensioner IDs'
+            }), 400
+        
+        block_number, rows = get_chain_reader().get_pensioners(pensioner_ids)
+        
+        # Rows are arrays in the order of fields; unknown IDs are null
+        return jsonify({
+            'success': True,
+            'block': block_number,
+            'fields': list(PENSIONER_ROW_FIELDS),
+            'pensioners': rows
+        })
+        
+    except Exception as e:
+        print(f"Chain batch get error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error reading pensioners from chain: {str(e)}'
+        }), 502
+
+# API route reporting how far the chain mirror has indexed
+@api.route('/api/chain/status', methods=['GET'])
+def chain_status():
+    try:
+        if not session.get('user_id'):
+            return jsonify({
+                'success': False,
+                'message': 'Not logged in'
+            }), 401
+        
+        checkpoint = db.session.get(ChainCheckpoint, CHECKPOINT_ROW_ID)
+        return jsonify({
+            'success': True,
+            'contractAddress': checkpoint.contract_address if checkpoint else None,
+            'indexedBlock': checkpoint.block_number if checkpoint else None,
+            'indexedAt': checkpoint.updated_at.isoformat() if checkpoint and checkpoint.updated_at else None,
+            'totalPensioners': ChainPensioner.query.count()
+        })
+        
+    except Exception as e:
+        print(f"Chain status error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error fetching chain status: {str(e)}'
+        }), 500
+
+# Prometheus scrape endpoint
+@api.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    token = current_app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({
+            'success': False,
+            'message': 'Invalid metrics token'
+        }), 401
+    
+    return current_app.response_class(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# Service factories; each runs the first time its service is used
+def create_job_queue(app):
+    queue = JobQueue(
+        app.config['JOB_QUEUE_PATH'],
+        workers=app.config['JOB_WORKERS'],
+        max_attempts=app.config['JOB_MAX_ATTEMPTS'],
+        backoff_base=app.config['JOB_BACKOFF_BASE'],
+        heartbeat_interval=app.config['JOB_HEARTBEAT_INTERVAL'],
+        heartbeat_timeout=app.config['JOB_HEARTBEAT_TIMEOUT'],
+        retention_days=app.config['JOB_RETENTION_DAYS']
+    )
+    queue.register_batch('verify_pensioner', partial(run_verification_jobs, app),
+                         max_batch=app.config['JOB_VERIFY_BATCH_SIZE'])
+    queue.register('import_pensioners', partial(run_import_job, app))
+    queue.register('match_death_registry', partial(run_death_match_job, app))
+    return queue
+
+def create_face_index(app):
+    from embedding_store import EmbeddingIndex
+    return EmbeddingIndex()
+
+def create_face_matcher(app):
+    from face_matching import FaceMatcher
+    return FaceMatcher(
+        max_workers=app.config['FACE_MATCH_WORKERS'],
+        tolerance=app.config['FACE_MATCH_TOLERANCE']
+    )
+
+SERVICE_FACTORIES = {
+    'photo_store': lambda app: PhotoStore(
+        app.config['UPLOAD_FOLDER'],
+        max_dimension=app.config['PHOTO_MAX_DIMENSION'],
+        jpeg_quality=app.config['PHOTO_JPEG_QUALITY']
+    ),
+    'photo_screener': lambda app: PhotoScreener(
+        min_bytes=app.config['PHOTO_MIN_BYTES'],
+        max_bytes=app.config['MAX_UPLOAD_BYTES'],
+        min_dimension=app.config['PHOTO_MIN_DIMENSION'],
+        max_pixels=app.config['PHOTO_MAX_PIXELS'],
+        screen_dimension=app.config['PHOTO_SCREEN_DIMENSION'],
+        min_sharpness=app.config['PHOTO_MIN_SHARPNESS'],
+        min_brightness=app.config['PHOTO_MIN_BRIGHTNESS'],
+        max_brightness=app.config['PHOTO_MAX_BRIGHTNESS'],
+        max_clipped=app.config['PHOTO_MAX_CLIPPED'],
+        face_gate=app.config['PHOTO_FACE_GATE']
+    ),
+    'user_cache': lambda app: UserCache(
+        ttl=app.config['USER_CACHE_TTL'],
+        max_size=app.config['USER_CACHE_SIZE'],
+        redis_url=app.config['USER_CACHE_REDIS_URL'],
+        on_lookup=lambda result: user_cache_lookups.inc(result=result)
+    ),
+    'upload_store': lambda app: ChunkedUploadStore(
+        os.path.join(app.config['UPLOAD_FOLDER'], '.partial'),
+        max_length=app.config['MAX_UPLOAD_BYTES']
+    ),
+    'password_hasher': lambda app: PasswordHasher(
+        method=app.config['PASSWORD_HASH_METHOD'],
+        max_workers=app.config['PASSWORD_HASH_WORKERS'],
+        max_queued=app.config['PASSWORD_HASH_MAX_QUEUED'],
+        queue_timeout=app.config['PASSWORD_HASH_QUEUE_TIMEOUT'],
+        background_workers=app.config['IMPORT_HASH_WORKERS']
+    ),
+    'face_matcher': create_face_matcher,
+    'face_index': create_face_index,
+    'job_queue': create_job_queue,
+    'due_schedule': lambda app: DueSchedule(
+        load_due_dates,
+        refresh_interval=app.config['DUE_SCHEDULE_REFRESH']
+    ),
+    'request_profiler': lambda app: RequestProfiler(
+        app.config['PROFILE_DIR'],
+        sample_rate=app.config['PROFILE_SAMPLE_RATE'],
+        slow_seconds=app.config['PROFILE_SLOW_SECONDS']
+    ),
+    'chain_reader': create_chain_reader
+}
+
+def create_app(config_name=None, overrides=None):
+    """
+    Build a configured app. Nothing touches the database, the upload folder
+    or the job queue here; services are created when first used and the
+    background job workers are started by start_background_workers().
+    """
+    app = Flask(__name__)
+    app.config.from_object(config_from_name(config_name))
+    if overrides:
+        app.config.update(overrides)
+    
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{app.config['DATABASE_PATH']}"
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLITE_SETTINGS'])
+    
+    app.json = FastJSONProvider(app, use_orjson=app.config['JSON_ENCODER'] != 'stdlib')
+    
+    db.init_app(app)
+    # Batch mode so SQLite can alter tables
+    migrate.init_app(app, db, directory=app.config['MIGRATIONS_DIR'], render_as_batch=True)
+    cors.init_app(app, supports_credentials=True, origins=app.config['CORS_ORIGINS'])
+    
+    # Creating the engine does not connect; the pragmas apply to each new connection
+    with app.app_context():
+        configure_sqlite(db.engine, app.config['SQLITE_SETTINGS'])
+        instrument_engine(db.engine, db_query_seconds)
+    
+    services = ServiceRegistry(app)
+    for name, factory in SERVICE_FACTORIES.items():
+        services.register(name, factory)
+    
+    app.register_blueprint(api)
+    return app
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    app = create_app()
+    print(f"Using database at: {app.config['DATABASE_PATH']}")
+    
+    with app.app_context():
+        if command == '--reset-db':
+            reset_db()
+            create_demo_users()
+            print("Database reset and demo users created successfully!")
+            sys.exit(0)
+        elif command == '--demo':
+            create_demo_users()
+        elif command == '--show-schema':
+            print_schema()
+            sys.exit(0)
+        elif command == '--recompute-stats':
+            recompute_stats()
+            print("Dashboard counters recomputed.")
+            sys.exit(0)
+        elif command == '--import-pensioners':
+            path = sys.argv[2]
+            file_format = detect_format(path)
+            if file_format is None:
+                print("Import file must be .csv or .jsonl")
+                sys.exit(1)
+            report_path = f'{path}.errors.csv'
+            result = import_pensioners(path, file_format, dry_run='--dry-run' in sys.argv,
+                                       report_path=report_path)
+            print(f"Imported {result['imported']} of {result['total']} rows, {result['failed']} rejected.")
+            if result['errorReport']:
+                print(f"Rejected rows written to {report_path}")
+            sys.exit(0)
+        elif command == '--match-deaths':
+            path = sys.argv[2]
+            file_format = detect_format(path)
+            if file_format is None:
+                print("Registry file must be .csv or .jsonl")
+                sys.exit(1)
+            report_path = f'{path}.candidates.csv'
+            result = match_death_registry(path, file_format, report_path)
+            print(f"{result['matched']} of {result['total']} registry records have candidates "
+                  f"among {result['rosterSize']} pensioners, {result['failed']} rejected.")
+            print(f"Ranked candidates written to {report_path}")
+            sys.exit(0)
+        elif command == '--index-chain':
+            run_chain_indexer(once='--once' in sys.argv)
+            sys.exit(0)
+        elif command == '--payment-run':
+            # Optional evaluation date (YYYY-MM-DD, UTC midnight); defaults to now
+            as_of = None
+            if len(sys.argv) > 2 and not sys.argv[2].startswith('--'):
+                as_of = datetime.datetime.strptime(sys.argv[2], '%Y-%m-%d')
+            from payment_run import MirrorLagError
+            try:
+                summary = run_payments(as_of, allow_stale='--allow-stale' in sys.argv)
+            except MirrorLagError as e:
+                print(f"{e}. Run the chain indexer first, or pass --allow-stale to pay anyway.")
+                sys.exit(1)
+            print(f"Chain mirror indexed up to block {summary['indexedBlock']} at {summary['indexedAt']}.")
+            print(f"{summary['eligible']} of {summary['pensioners']} pensioners eligible, "
+                  f"{summary['totalAmountWei']} wei to disburse.")
+            for reason, blocked in summary['blocked'].items():
+                print(f"  blocked ({reason}): {blocked['count']}")
+            print(f"Disbursements written to {summary['disbursementFile']}")
+            print(f"Blocked pensioners written to {summary['blockedReport']}")
+            sys.exit(0)
+        elif command == '--gc-photos':
+            collect_photo_garbage()
+            sys.exit(0)
+        
+        # Create tables if they don't exist
         try:
             db.create_all()
             print("Database tables checked/created.")
         except Exception as e:
             print(f"Database initialization error: {str(e)}")
     
+    # Development server only; production runs under gunicorn (see gunicorn.conf.py)
     port = int(os.environ.get('PORT', 5000))
-    print(f"Starting server on port {port}...")
-    app.run(debug=True, host='0.0.0.0', port=port) 
\ No newline at end of file
+    print(f"Starting development server on port {port}...")
+    app.run(debug=app.config.get('DEBUG', False), host='0.0.0.0', port=port) 
\ No newline at end of file
@@ -0,0 +1,371 @@
+"""
+Benchmark suite for the backend API.
+
+Seeds a synthetic pensioner population into a temporary SQLite database,
+then drives the main endpoints through the Flask test client in-process,
+once per concurrency level (each concurrent client is a thread with its
+own session). Reports throughput and p50/p95/p99 latency per scenario as
+JSON so runs can be compared, e.g. before and after an upgrade:
+
+    python benchmark.py --users 5000 --output before.json
+    python benchmark.py --users 5000 --output after.json --compare before.json
+
+The synthetic photos are noise without a face, so by default the
+benchmark turns off the face gate of the photo pre-screening; otherwise
+every verify request would be rejected with "No face found" once
+face_recognition is installed. --photo-screening selects the path and the
+results record which one was measured.
+
+Nothing outside the temporary directory is touched.
+"""
+import io
+import os
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import argparse
+import platform
+import datetime
+import tempfile
+import threading
+import contextlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+SCENARIOS = ('login', 'user', 'pensioner_data', 'verify', 'sync')
+
+# --photo-screening choices -> (PHOTO_SCREENING, PHOTO_FACE_GATE)
+PHOTO_SCREENING_MODES = {'full': ('1', '1'), 'no-face-gate': ('1', '0'), 'off': ('0', '0')}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark the SmartPension backend API')
+    parser.add_argument('--users', type=int, default=1000, help='number of synthetic pensioners')
+    parser.add_argument('--history', type=int, default=3, help='past verifications per pensioner')
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario and concurrency level')
+    parser.add_argument('--concurrency', default='1,8', help='comma-separated numbers of concurrent clients')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='comma-separated scenarios to run')
+    parser.add_argument('--async-verification', action='store_true',
+                        help='measure /api/verify-pensioner with background jobs (202) instead of inline')
+    parser.add_argument('--photo-screening', choices=sorted(PHOTO_SCREENING_MODES), default='no-face-gate',
+                        help='photo pre-screening for verify; "full" rejects the faceless synthetic photos '
+                             'when face_recognition is installed')
+    parser.add_argument('--seed', type=int, default=42, help='random seed for the synthetic data')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--compare', help='baseline results file to compare against')
+    parser.add_argument('--keep', action='store_true', help='keep the temporary directory')
+    parser.add_argument('--verbose', action='store_true', help='show the application log output')
+    return parser.parse_args()
+
+
+def configure_environment(directory, args):
+    """Point the application at the temporary directory; must run before importing app"""
+    os.environ['DATABASE_PATH'] = os.path.join(directory, 'pension.db')
+    os.environ['UPLOAD_FOLDER'] = os.path.join(directory, 'uploads')
+    os.environ['JOB_QUEUE_PATH'] = os.path.join(directory, 'jobs.db')
+    os.environ['ASYNC_VERIFICATION'] = '1' if args.async_verification else '0'
+    os.environ['PHOTO_SCREENING'], os.environ['PHOTO_FACE_GATE'] = PHOTO_SCREENING_MODES[args.photo_screening]
+
+
+def verify_path(photo_screening, face_library):
+    """What the verify scenario measures with the synthetic photos"""
+    if not face_library:
+        return 'screening and storage; face matching skipped (face_recognition not installed)'
+    if photo_screening == 'full':
+        return 'rejection at the face gate (synthetic photos have no face)'
+    return 'face matching of photos without a face (verification recorded as rejected)'
+
+
+def synthetic_photos(count, seed):
+    """JPEG-encoded noise images; distinct so the photo store cannot deduplicate them"""
+    from PIL import Image
+
+    rng = random.Random(seed)
+    photos = []
+    for _ in range(count):
+        image = Image.frombytes('RGB', (320, 240), bytes(rng.getrandbits(8) for _ in range(320 * 240 * 3)))
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=85)
+        photos.append(buffer.getvalue())
+    return photos
+
+
+def seed_population(app_module, app, users, history, seed):
+    """Insert pensioners and their verification history with bulk inserts"""
+    db, User, Verification = app_module.db, app_module.User, app_module.Verification
+    rng = random.Random(seed)
+    now = datetime.datetime.utcnow()
+
+    with app.app_context():
+        # One hash for everybody: hashing each seeded password would dominate setup time
+        password_hash = app_module.password_hasher.generate(BENCHMARK_PASSWORD)
+        db.create_all()
+        user_rows = []
+        for index in range(users):
+            last_verified = now - datetime.timedelta(days=rng.randint(0, 200)) if history else None
+            user_rows.append({
+                'email': f'pensioner{index}@benchmark.test',
+                'password_hash': password_hash,
+                'first_name': f'First{index}',
+                'last_name': f'Last{index}',
+                'wallet_address': f'0x{index + 1:040x}',
+                'role': 'pensioner',
+                'pensioner_id': index + 1,
+                'pension_amount': round(rng.uniform(500, 3000), 2),
+                'is_active': True,
+                'is_deceased': False,
+                'created_at': now - datetime.timedelta(days=rng.randint(200, 2000)),
+                'last_verified_at': last_verified,
+                'next_verification_date': last_verified + datetime.timedelta(days=180) if last_verified else None
+            })
+        db.session.execute(db.insert(User), user_rows)
+
+        verification_rows = []
+        for index, user in enumerate(user_rows):
+            for step in range(history):
+                verified_at = user['last_verified_at'] - datetime.timedelta(days=180 * step)
+                verification_rows.append({
+                    'pensioner_id': index + 1,
+                    'wallet_address': user['wallet_address'],
+                    'status': 'approved',
+                    'created_at': verified_at,
+                    'user_id': index + 1,
+                    'last_verified_at': verified_at,
+                    'next_verification_date': verified_at + datetime.timedelta(days=180)
+                })
+        if verification_rows:
+            db.session.execute(db.insert(Verification), verification_rows)
+        db.session.commit()
+        app_module.recompute_stats()
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Scenarios:
+    """One method per scenario; each issues a single request and returns its status code"""
+
+    def __init__(self, app, users, photos):
+        self.app = app
+        self.users = users
+        self.photos = photos
+
+    def client_for(self, user_index):
+        client = self.app.test_client()
+        response = client.post('/api/login', json={
+            'email': f'pensioner{user_index}@benchmark.test',
+            'password': BENCHMARK_PASSWORD
+        })
+        if response.status_code != 200:
+            raise RuntimeError(f'Benchmark login failed with {response.status_code}')
+        return client
+
+    def _photo(self, rng):
+        return io.BytesIO(rng.choice(self.photos))
+
+    def login(self, client, user_index, rng):
+        return client.post('/api/login', json={
+            'email': f'pensioner{user_index}@benchmark.test',
+            'password': BENCHMARK_PASSWORD
+        }).status_code
+
+    def user(self, client, user_index, rng):
+        return client.get('/api/user').status_code
+
+    def pensioner_data(self, client, user_index, rng):
+        return client.get('/api/pensioner-data').status_code
+
+    def verify(self, client, user_index, rng):
+        return client.post('/api/verify-pensioner', data={
+            'pensionerID': str(user_index + 1),
+            'walletAddress': f'0x{user_index + 1:040x}',
+            'idPhoto': (self._photo(rng), 'id.jpg'),
+            'facePhoto': (self._photo(rng), 'face.jpg')
+        }, content_type='multipart/form-data').status_code
+
+    def sync(self, client, user_index, rng):
+        metadata = {
+            'firstName': f'First{user_index}',
+            'lastName': f'Last{user_index}',
+            'walletAddress': f'0x{user_index + 1:040x}',
+            'clientKey': f'benchmark-{user_index}-{rng.getrandbits(64)}'
+        }
+        return client.post('/api/sync-verification', data={
+            'metadata': json.dumps(metadata),
+            'idPhoto': (self._photo(rng), 'id.jpg'),
+            'facePhoto': (self._photo(rng), 'face.jpg')
+        }, content_type='multipart/form-data').status_code
+
+
+def run_scenario(scenarios, name, requests, concurrency, seed):
+    """Run requests calls of one scenario spread over concurrency client threads"""
+    action = getattr(scenarios, name)
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    per_client = [requests // concurrency + (1 if index < requests % concurrency else 0)
+                  for index in range(concurrency)]
+
+    def client_loop(client_index):
+        rng = random.Random(seed + client_index)
+        # Spread clients over distinct pensioners
+        user_index = (client_index * 7919) % scenarios.users
+        client = scenarios.client_for(user_index)
+        local_latencies = []
+        local_statuses = {}
+        ready.wait()
+        for _ in range(per_client[client_index]):
+            started = time.perf_counter()
+            status = action(client, user_index, rng)
+            local_latencies.append(time.perf_counter() - started)
+            local_statuses[status] = local_statuses.get(status, 0) + 1
+        with lock:
+            latencies.extend(local_latencies)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    ready = threading.Event()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(client_loop, index) for index in range(concurrency)]
+        # Let every client log in before the clock starts
+        time.sleep(0.1)
+        started = time.perf_counter()
+        ready.set()
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if status >= 400)
+    return {
+        'scenario': name,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': errors,
+        'statusCodes': {str(status): count for status, count in sorted(statuses.items())},
+        'durationSeconds': round(elapsed, 4),
+        'throughputRps': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'latencyMs': {
+            'mean': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else None,
+            'p50': round(percentile(latencies, 0.50) * 1000, 3) if latencies else None,
+            'p95': round(percentile(latencies, 0.95) * 1000, 3) if latencies else None,
+            'p99': round(percentile(latencies, 0.99) * 1000, 3) if latencies else None,
+            'max': round(latencies[-1] * 1000, 3) if latencies else None
+        }
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    baseline_index = {}
+    if baseline:
+        baseline_index = {(item['scenario'], item['concurrency']): item for item in baseline['results']}
+
+    header = f"{'scenario':<16}{'conc':>5}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}"
+    if baseline_index:
+        header += f"{'p95 vs base':>13}"
+    print(header)
+    for item in results['results']:
+        latency = item['latencyMs']
+        line = (f"{item['scenario']:<16}{item['concurrency']:>5}{item['throughputRps']:>10}"
+                f"{latency['p50']:>10}{latency['p95']:>10}{latency['p99']:>10}{item['errors']:>8}")
+        base = baseline_index.get((item['scenario'], item['concurrency']))
+        if base and base['latencyMs']['p95']:
+            change = (latency['p95'] - base['latencyMs']['p95']) / base['latencyMs']['p95'] * 100
+            line += f"{change:>+12.1f}%"
+        print(line)
+
+
+def main():
+    args = parse_args()
+    scenario_names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenario_names) - set(SCENARIOS)
+    if unknown:
+        print(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        sys.exit(1)
+    concurrency_levels = [int(level) for level in args.concurrency.split(',')]
+
+    directory = tempfile.mkdtemp(prefix='smartpension-benchmark-')
+    configure_environment(directory, args)
+    log_output = None if args.verbose else open(os.devnull, 'w')
+
+    try:
+        with contextlib.redirect_stdout(log_output) if log_output else contextlib.nullcontext():
+            import app as app_module
+            app = app_module.create_app()
+
+            seed_started = time.perf_counter()
+            seed_population(app_module, app, args.users, args.history, args.seed)
+            seed_seconds = time.perf_counter() - seed_started
+            scenarios = Scenarios(app, args.users, synthetic_photos(16, args.seed))
+
+            results = []
+            for name in scenario_names:
+                for concurrency in concurrency_levels:
+                    results.append(run_scenario(scenarios, name, args.requests, concurrency, args.seed))
+
+            app_module.stop_background_workers(app, timeout=5)
+
+        output = {
+            'meta': {
+                'timestamp': datetime.datetime.utcnow().isoformat(),
+                'gitRevision': git_revision(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpuCount': os.cpu_count(),
+                'users': args.users,
+                'history': args.history,
+                'requestsPerRun': args.requests,
+                'asyncVerification': args.async_verification,
+                'faceRecognition': app_module.face_library_available(),
+                'photoScreening': args.photo_screening,
+                'verifyPath': verify_path(args.photo_screening, app_module.face_library_available()),
+                'seedSeconds': round(seed_seconds, 3)
+            },
+            'results': results
+        }
+
+        baseline = None
+        if args.compare:
+            with open(args.compare) as f:
+                baseline = json.load(f)
+        print(f"verify measures: {output['meta']['verifyPath']}")
+        print_results(output, baseline)
+
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(output, f, indent=2)
+            print(f"Results written to {args.output}")
+        else:
+            print(json.dumps(output, indent=2))
+    finally:
+        if log_output:
+            log_output.close()
+        if args.keep:
+            print(f"Benchmark data kept in {directory}")
+        else:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
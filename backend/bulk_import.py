@@ -0,0 +1,287 @@
+"""
+Streaming bulk import of pensioners from CSV or JSONL files.
+
+Records are parsed incrementally and processed in chunks: each chunk is
+validated, checked for duplicate emails and wallets with one set-based
+lookup (instead of two queries per user), has its passwords hashed by a
+few concurrent submitters and is inserted in a single transaction. Every
+rejected row is written to the error report file as it is found, with its
+row number and reasons; only the first few are kept in memory for the API.
+
+Database access is supplied by the caller:
+    find_existing(emails, wallets) -> (existing_emails, existing_wallets)
+    insert_chunk(rows) -> {index: error} for rows that could not be inserted
+"""
+import io
+import re
+import csv
+import json
+import datetime
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+# Accepted column names (API field names and snake_case) -> User attributes
+FIELD_NAMES = {
+    'firstName': 'first_name',
+    'lastName': 'last_name',
+    'email': 'email',
+    'phone': 'phone',
+    'walletAddress': 'wallet_address',
+    'dateOfBirth': 'date_of_birth',
+    'address': 'address',
+    'city': 'city',
+    'postalCode': 'postal_code',
+    'country': 'country',
+    'pensionAmount': 'pension_amount',
+    'pensionerID': 'pensioner_id',
+    'password': 'password',
+    'role': 'role'
+}
+FIELD_NAMES.update({attribute: attribute for attribute in list(FIELD_NAMES.values())})
+
+REQUIRED_FIELDS = ('first_name', 'last_name', 'email')
+
+# Maximum length of each string column, as declared on the User model
+MAX_LENGTHS = {
+    'first_name': 100, 'last_name': 100, 'email': 120, 'phone': 20, 'wallet_address': 42,
+    'address': 200, 'city': 100, 'postal_code': 20, 'country': 100
+}
+
+FORMATS = ('csv', 'jsonl')
+
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+
+def detect_format(filename):
+    """File format from the file name extension, or None"""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension == 'csv':
+        return 'csv'
+    if extension in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    return None
+
+
+def iter_records(stream, file_format):
+    """
+    Yield (row_number, record, error) for each record of a binary stream,
+    reading it line by line. record is a dict, or None when the line could
+    not be parsed (error then says why).
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if file_format == 'csv':
+        reader = csv.DictReader(text)
+        for record in reader:
+            # Header is line 1
+            yield reader.line_num, record, None
+    elif file_format == 'jsonl':
+        for row_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield row_number, None, f'Invalid JSON: {e}'
+                continue
+            if not isinstance(record, dict):
+                yield row_number, None, 'Each line must be a JSON object'
+                continue
+            yield row_number, record, None
+    else:
+        raise ValueError(f'Unsupported import format: {file_format}')
+
+
+def parse_record(record):
+    """
+    Convert a raw record to User attributes (plus 'password'). Returns
+    (values, errors); values is None when the record is invalid.
+    """
+    values = {}
+    errors = []
+    for name, value in record.items():
+        attribute = FIELD_NAMES.get((name or '').strip())
+        if attribute is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        if value in ('', None):
+            continue
+        values[attribute] = value
+
+    for attribute in REQUIRED_FIELDS:
+        if not values.get(attribute):
+            errors.append(f'Missing required field: {attribute}')
+
+    for attribute, max_length in MAX_LENGTHS.items():
+        if attribute in values:
+            values[attribute] = str(values[attribute])
+            if len(values[attribute]) > max_length:
+                errors.append(f'{attribute} is longer than {max_length} characters')
+
+    if values.get('email') and not EMAIL_PATTERN.match(values['email']):
+        errors.append('Invalid email address')
+
+    if values.setdefault('role', 'pensioner') != 'pensioner':
+        errors.append('Only pensioners can be imported')
+
+    if 'date_of_birth' in values:
+        try:
+            values['date_of_birth'] = datetime.date.fromisoformat(str(values['date_of_birth'])[:10])
+        except ValueError:
+            errors.append('Invalid dateOfBirth, expected YYYY-MM-DD')
+
+    if 'pension_amount' in values:
+        try:
+            values['pension_amount'] = float(values['pension_amount'])
+        except (TypeError, ValueError):
+            errors.append('Invalid pensionAmount')
+
+    if 'pensioner_id' in values:
+        try:
+            values['pensioner_id'] = int(values['pensioner_id'])
+        except (TypeError, ValueError):
+            errors.append('Invalid pensionerID')
+
+    if errors:
+        return None, errors
+    return values, []
+
+
+class ImportReport:
+    """
+    Counts of one import run. Rejected rows are streamed to a CSV file at
+    report_path (created on the first one); the first max_listed_errors
+    are also kept for to_dict().
+    """
+
+    def __init__(self, report_path=None, max_listed_errors=100):
+        self.total = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.report_path = report_path
+        self.max_listed_errors = max_listed_errors
+        self._file = None
+        self._writer = None
+
+    def add_error(self, row_number, email, messages):
+        error = (row_number, email or '', '; '.join(messages))
+        self.failed += 1
+        if len(self.errors) < self.max_listed_errors:
+            self.errors.append(error)
+        if self.report_path:
+            if self._writer is None:
+                self._file = open(self.report_path, 'w', newline='', encoding='utf-8')
+                self._writer = csv.writer(self._file)
+                self._writer.writerow(['row', 'email', 'error'])
+            self._writer.writerow(error)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def to_dict(self):
+        return {
+            'total': self.total,
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': [
+                {'row': row_number, 'email': email, 'error': message}
+                for row_number, email, message in self.errors
+            ]
+        }
+
+
+class BulkImporter:
+    """
+    Runs the import pipeline over (row_number, record, error) tuples as
+    produced by iter_records.
+    """
+
+    def __init__(self, find_existing, insert_chunk, hash_password,
+                 chunk_size=500, hash_workers=4):
+        self.find_existing = find_existing
+        self.insert_chunk = insert_chunk
+        self.hash_password = hash_password
+        self.chunk_size = chunk_size
+        self.hash_workers = hash_workers
+
+    def run(self, records, dry_run=False, report_path=None):
+        report = ImportReport(report_path)
+        # Emails and wallets seen earlier in the same file
+        seen_emails = set()
+        seen_wallets = set()
+
+        with ThreadPoolExecutor(max_workers=self.hash_workers) as executor, contextlib.closing(report):
+            chunk = []
+            for row_number, record, error in records:
+                report.total += 1
+                if error:
+                    report.add_error(row_number, None, [error])
+                    continue
+
+                values, errors = parse_record(record)
+                if errors:
+                    report.add_error(row_number, record.get('email'), errors)
+                    continue
+
+                duplicates = []
+                if values['email'] in seen_emails:
+                    duplicates.append('Duplicate email in file')
+                if values.get('wallet_address') and values['wallet_address'] in seen_wallets:
+                    duplicates.append('Duplicate wallet address in file')
+                if duplicates:
+                    report.add_error(row_number, values['email'], duplicates)
+                    continue
+                seen_emails.add(values['email'])
+                if values.get('wallet_address'):
+                    seen_wallets.add(values['wallet_address'])
+
+                chunk.append((row_number, values))
+                if len(chunk) >= self.chunk_size:
+                    self._process_chunk(chunk, report, executor, dry_run)
+                    chunk = []
+
+            if chunk:
+                self._process_chunk(chunk, report, executor, dry_run)
+
+        return report
+
+    def _process_chunk(self, chunk, report, executor, dry_run):
+        existing_emails, existing_wallets = self.find_existing(
+            [values['email'] for _, values in chunk],
+            [values['wallet_address'] for _, values in chunk if values.get('wallet_address')]
+        )
+
+        accepted = []
+        for row_number, values in chunk:
+            errors = []
+            if values['email'] in existing_emails:
+                errors.append('Email already registered')
+            if values.get('wallet_address') in existing_wallets:
+                errors.append('Wallet address already registered')
+            if errors:
+                report.add_error(row_number, values['email'], errors)
+            else:
+                accepted.append((row_number, values))
+
+        if dry_run:
+            report.imported += len(accepted)
+            return
+
+        # Hashing dominates the cost of an import; pbkdf2 releases the GIL.
+        # hash_password is expected to bound how much CPU imports may take.
+        passwords = [values.pop('password', None) for _, values in accepted]
+        hashes = executor.map(lambda password: self.hash_password(password) if password else None, passwords)
+        rows = []
+        for (_, values), password_hash in zip(accepted, hashes):
+            values['password_hash'] = password_hash
+            rows.append(values)
+
+        failures = self.insert_chunk(rows) if rows else {}
+        for index, (row_number, values) in enumerate(accepted):
+            if index in failures:
+                report.add_error(row_number, values['email'], [failures[index]])
+            else:
+                report.imported += 1
@@ -0,0 +1,412 @@
+"""
+Access to the SmartPension contract and an indexer mirroring its state.
+
+The frontend reads pensioners one getPensioner(id) call at a time. The
+indexer instead tails the contract's events in block-range batches and
+hands the resulting per-pensioner changes, together with the last indexed
+block, to a store that upserts them into the local database in one
+transaction. Listing pensioners then becomes a query against an indexed
+table instead of N RPC round trips.
+
+The store passed to ChainIndexer provides:
+    load_checkpoint() -> (block_number, block_hash) or None
+    apply_batch(changes, block_number, block_hash)
+    mark_synced()    record that the mirror is up to date with the chain head
+    reset()
+
+ChainReader serves batched getPensioner/shouldBlockPayment reads: all
+calls of a request go to the node as JSON-RPC batches pinned to one block,
+and results are cached per block number, since state at a block never
+changes.
+
+web3 is only imported when connecting, so the rest of the backend runs
+without it.
+"""
+import time
+import datetime
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Subset of the SmartPension ABI used by the backend
+SMART_PENSION_ABI = [
+    {
+        'type': 'event', 'name': 'PensionerRegistered', 'anonymous': False,
+        'inputs': [
+            {'name': 'pensionerID', 'type': 'uint256', 'indexed': True},
+            {'name': 'wallet', 'type': 'address', 'indexed': True},
+            {'name': 'name', 'type': 'string', 'indexed': False}
+        ]
+    },
+    {
+        'type': 'event', 'name': 'VerificationCompleted', 'anonymous': False,
+        'inputs': [
+            {'name': 'pensionerID', 'type': 'uint256', 'indexed': True},
+            {'name': 'timestamp', 'type': 'uint256', 'indexed': False}
+        ]
+    },
+    {
+        'type': 'event', 'name': 'PensionerDeceased', 'anonymous': False,
+        'inputs': [
+            {'name': 'pensionerID', 'type': 'uint256', 'indexed': True},
+            {'name': 'timestamp', 'type': 'uint256', 'indexed': False}
+        ]
+    },
+    {
+        'type': 'event', 'name': 'PaymentBlocked', 'anonymous': False,
+        'inputs': [
+            {'name': 'pensionerID', 'type': 'uint256', 'indexed': True},
+            {'name': 'timestamp', 'type': 'uint256', 'indexed': False}
+        ]
+    },
+    {
+        'type': 'event', 'name': 'PaymentUnblocked', 'anonymous': False,
+        'inputs': [
+            {'name': 'pensionerID', 'type': 'uint256', 'indexed': True},
+            {'name': 'timestamp', 'type': 'uint256', 'indexed': False}
+        ]
+    },
+    {
+        'type': 'function', 'name': 'getPensioner', 'stateMutability': 'view',
+        'inputs': [{'name': '_pensionerID', 'type': 'uint256'}],
+        'outputs': [
+            {'name': 'wallet', 'type': 'address'},
+            {'name': 'name', 'type': 'string'},
+            {'name': 'pensionAmount', 'type': 'uint256'},
+            {'name': 'lastVerificationDate', 'type': 'uint256'},
+            {'name': 'isActive', 'type': 'bool'},
+            {'name': 'isDeceased', 'type': 'bool'}
+        ]
+    },
+    {
+        'type': 'function', 'name': 'shouldBlockPayment', 'stateMutability': 'view',
+        'inputs': [{'name': '_pensionerID', 'type': 'uint256'}],
+        'outputs': [{'name': '', 'type': 'bool'}]
+    },
+    {
+        'type': 'function', 'name': 'totalPensioners', 'stateMutability': 'view',
+        'inputs': [],
+        'outputs': [{'name': '', 'type': 'uint256'}]
+    }
+]
+
+INDEXED_EVENTS = (
+    'PensionerRegistered',
+    'VerificationCompleted',
+    'PensionerDeceased',
+    'PaymentBlocked',
+    'PaymentUnblocked'
+)
+
+
+def http_session(pool_size=10):
+    """requests session keeping up to pool_size keep-alive connections per host"""
+    import requests
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def connect(rpc_url, pool_size=10, timeout=10, session=None):
+    """
+    Web3 client over a pooled HTTP session, so concurrent calls reuse
+    keep-alive connections instead of opening one per request.
+    """
+    from web3 import Web3
+
+    session = session or http_session(pool_size)
+    return Web3(Web3.HTTPProvider(rpc_url, request_kwargs={'timeout': timeout}, session=session))
+
+
+def pension_contract(w3, address):
+    return w3.eth.contract(address=w3.to_checksum_address(address), abi=SMART_PENSION_ABI)
+
+
+def from_chain_timestamp(value):
+    """Contract timestamps (seconds) as naive UTC datetimes, like the rest of the DB"""
+    if not value:
+        return None
+    return datetime.datetime.utcfromtimestamp(value)
+
+
+def pensioner_fields(result):
+    """Mirror columns from a getPensioner() result tuple"""
+    wallet, name, pension_amount, last_verification, is_active, is_deceased = result
+    return {
+        'wallet_address': wallet.lower(),
+        'name': name,
+        # uint256 wei amounts do not fit SQLite integers
+        'pension_amount': str(pension_amount),
+        'last_verification_at': from_chain_timestamp(last_verification),
+        'is_active': is_active,
+        'is_deceased': is_deceased
+    }
+
+
+class ChainIndexer:
+    """
+    Indexes the contract's events from the checkpoint up to the chain head
+    (minus a number of confirmations) in batches of batch_size blocks.
+    """
+
+    def __init__(self, contract, store, batch_size=2000, confirmations=0, start_block=0):
+        self.contract = contract
+        self.w3 = contract.w3
+        self.store = store
+        self.batch_size = batch_size
+        self.confirmations = confirmations
+        self.start_block = start_block
+        self._events_by_topic = {}
+        for name in INDEXED_EVENTS:
+            event = getattr(self.contract.events, name)()
+            topic = self.w3.keccak(text=self._event_signature(event.abi))
+            self._events_by_topic[bytes(topic)] = event
+
+    @staticmethod
+    def _event_signature(abi):
+        return f"{abi['name']}({','.join(item['type'] for item in abi['inputs'])})"
+
+    def _resume_block(self):
+        """First block to index; resets the mirror if the checkpoint left the chain"""
+        checkpoint = self.store.load_checkpoint()
+        if checkpoint is None:
+            return self.start_block
+
+        block_number, block_hash = checkpoint
+        try:
+            current_hash = self.w3.eth.get_block(block_number)['hash'].hex()
+        except Exception:
+            # Block no longer exists, e.g. a restarted dev chain
+            current_hash = None
+        if current_hash != block_hash:
+            print(f"Chain checkpoint at block {block_number} is no longer canonical; reindexing")
+            self.store.reset()
+            return self.start_block
+        return block_number + 1
+
+    def sync_once(self):
+        """Index all confirmed blocks after the checkpoint; returns the number of events"""
+        from_block = self._resume_block()
+        head = self.w3.eth.block_number - self.confirmations
+        batch_size = self.batch_size
+        indexed = 0
+
+        while from_block <= head:
+            to_block = min(from_block + batch_size - 1, head)
+            try:
+                changes = self.fetch_changes(from_block, to_block)
+            except ValueError:
+                # Nodes cap the size of eth_getLogs responses; retry with a smaller range
+                if batch_size == 1:
+                    raise
+                batch_size = max(1, batch_size // 2)
+                continue
+
+            block_hash = self.w3.eth.get_block(to_block)['hash'].hex()
+            self.store.apply_batch(changes, to_block, block_hash)
+            indexed += len(changes)
+            from_block = to_block + 1
+
+        # Caught up; the payment run relies on the time of the last check
+        self.store.mark_synced()
+        return indexed
+
+    def fetch_changes(self, from_block, to_block):
+        """
+        Fetch the contract's events in a block range with one eth_getLogs
+        call and turn them into per-pensioner column updates, in chain order.
+        """
+        logs = self.w3.eth.get_logs({
+            'address': self.contract.address,
+            'fromBlock': from_block,
+            'toBlock': to_block,
+            'topics': [list(self._events_by_topic)]
+        })
+
+        changes = []
+        for log in logs:
+            event = self._events_by_topic.get(bytes(log['topics'][0]))
+            if event is None:
+                continue
+            changes.append(self._change_for(event.process_log(log)))
+        return changes
+
+    def _change_for(self, event):
+        args = event['args']
+        change = {'pensioner_id': args['pensionerID'], 'updated_block': event['blockNumber']}
+        name = event['event']
+
+        if name == 'PensionerRegistered':
+            # The event lacks the amount; read the struct as of that block
+            result = self.contract.functions.getPensioner(args['pensionerID']).call(
+                block_identifier=event['blockNumber'])
+            change.update(pensioner_fields(result))
+            change['wallet_address'] = args['wallet'].lower()
+            change['name'] = args['name']
+        elif name == 'VerificationCompleted':
+            change['last_verification_at'] = from_chain_timestamp(args['timestamp'])
+        elif name == 'PensionerDeceased':
+            change.update(is_deceased=True, is_active=False,
+                          deceased_at=from_chain_timestamp(args['timestamp']))
+        elif name == 'PaymentBlocked':
+            change['is_active'] = False
+        elif name == 'PaymentUnblocked':
+            change['is_active'] = True
+        return change
+
+    def run(self, poll_interval=5, stop_event=None):
+        """Keep the mirror up to date until stop_event is set"""
+        while stop_event is None or not stop_event.is_set():
+            try:
+                indexed = self.sync_once()
+                if indexed:
+                    print(f"Indexed {indexed} contract events")
+            except Exception as e:
+                print(f"Chain indexer error: {str(e)}")
+            if stop_event is not None:
+                stop_event.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+
+
+# Column order of the rows returned by ChainReader.get_pensioners
+PENSIONER_ROW_FIELDS = (
+    'pensionerID', 'wallet', 'name', 'pensionAmount', 'lastVerificationDate',
+    'isActive', 'isDeceased', 'shouldBlockPayment'
+)
+
+ZERO_ADDRESS = '0x' + '0' * 40
+
+
+class ChainReader:
+    """
+    Batched pensioner reads. With rpc_url and session, each request's calls
+    are sent as JSON-RPC batches of batch_size calls; otherwise (or if the
+    node rejects batches) they run concurrently on max_workers threads.
+    """
+
+    def __init__(self, contract, rpc_url=None, session=None, batch_size=100,
+                 max_workers=8, cached_blocks=4, timeout=10):
+        self.contract = contract
+        self.w3 = contract.w3
+        self.rpc_url = rpc_url
+        self.session = session
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.cached_blocks = cached_blocks
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._functions = {
+            name: next(item for item in contract.abi if item.get('name') == name)
+            for name in ('getPensioner', 'shouldBlockPayment')
+        }
+
+    def get_pensioners(self, pensioner_ids):
+        """
+        Return (block_number, rows) with one row per requested ID, in
+        request order, as tuples in PENSIONER_ROW_FIELDS order. IDs without
+        a registered pensioner map to None.
+        """
+        block_number = self.w3.eth.block_number
+        with self._lock:
+            block_cache = self._cache.setdefault(block_number, {})
+            self._cache.move_to_end(block_number)
+            while len(self._cache) > self.cached_blocks:
+                self._cache.popitem(last=False)
+            missing = [pensioner_id for pensioner_id in dict.fromkeys(pensioner_ids)
+                       if pensioner_id not in block_cache]
+
+        if missing:
+            fetched = self._fetch(missing, block_number)
+            with self._lock:
+                block_cache.update(fetched)
+
+        return block_number, [block_cache.get(pensioner_id) for pensioner_id in pensioner_ids]
+
+    def _fetch(self, pensioner_ids, block_number):
+        calls = []
+        for pensioner_id in pensioner_ids:
+            calls.append(('getPensioner', pensioner_id))
+            calls.append(('shouldBlockPayment', pensioner_id))
+
+        results = None
+        if self.rpc_url and self.session is not None:
+            try:
+                results = self._call_batched(calls, block_number)
+            except (ValueError, OSError) as e:
+                print(f"JSON-RPC batch failed, falling back to concurrent calls: {e}")
+        if results is None:
+            results = list(self._executor.map(
+                lambda call: self._call_single(call, block_number), calls))
+
+        rows = {}
+        for index, pensioner_id in enumerate(pensioner_ids):
+            pensioner, should_block = results[2 * index], results[2 * index + 1]
+            if pensioner is None or should_block is None:
+                # Failed call; left out so it is not cached for the block
+                continue
+            rows[pensioner_id] = self._row(pensioner_id, pensioner, should_block)
+        return rows
+
+    def _row(self, pensioner_id, pensioner, should_block):
+        if pensioner[0] == ZERO_ADDRESS:
+            return None
+        fields = pensioner_fields(pensioner)
+        last_verification = fields['last_verification_at']
+        return (
+            pensioner_id,
+            fields['wallet_address'],
+            fields['name'],
+            fields['pension_amount'],
+            last_verification.isoformat() if last_verification else None,
+            fields['is_active'],
+            fields['is_deceased'],
+            should_block[0]
+        )
+
+    def _call_single(self, call, block_number):
+        name, pensioner_id = call
+        try:
+            result = getattr(self.contract.functions, name)(pensioner_id).call(
+                block_identifier=block_number)
+        except Exception as e:
+            print(f"Contract call {name}({pensioner_id}) failed: {e}")
+            return None
+        return result if isinstance(result, (list, tuple)) else (result,)
+
+    def _call_batched(self, calls, block_number):
+        """eth_call every (function, id) pair, batch_size calls per HTTP request"""
+        address = self.contract.address
+        block = hex(block_number)
+        results = []
+
+        for start in range(0, len(calls), self.batch_size):
+            chunk = calls[start:start + self.batch_size]
+            payload = [
+                {
+                    'jsonrpc': '2.0',
+                    'id': index,
+                    'method': 'eth_call',
+                    'params': [{'to': address, 'data': self.contract.encodeABI(fn_name=name, args=[pensioner_id])}, block]
+                }
+                for index, (name, pensioner_id) in enumerate(chunk)
+            ]
+            response = self.session.post(self.rpc_url, json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            replies = response.json()
+            if not isinstance(replies, list):
+                raise ValueError('Node does not support JSON-RPC batches')
+
+            by_id = {reply.get('id'): reply for reply in replies}
+            for index, (name, _) in enumerate(chunk):
+                reply = by_id.get(index, {})
+                if 'result' not in reply:
+                    results.append(None)
+                    continue
+                output_types = [output['type'] for output in self._functions[name]['outputs']]
+                results.append(self.w3.codec.decode(output_types, bytes.fromhex(reply['result'][2:])))
+        return results
@@ -0,0 +1,215 @@
+"""
+Resumable chunked uploads written straight to disk.
+
+A client creates an upload with its total length, then sends the bytes in
+one or more chunks, each tagged with the offset it starts at. Chunks are
+copied from the request stream to a partial file in fixed-size blocks, so
+a photo is never held in memory as a whole. If a connection drops, the
+client asks for the current offset and resumes from there.
+
+Several server processes can receive chunks of the same upload, so the
+offset check and the write happen under an exclusive lock on the partial
+file (flock, where the platform has it). Uploads that receive no chunk
+for the expiry period are deleted by expire().
+"""
+import os
+import json
+import time
+import uuid
+import shutil
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines; a thread lock is used instead
+    fcntl = None
+
+# Size of the blocks copied from a request stream to disk
+COPY_BLOCK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """Raised for invalid or out-of-order upload requests"""
+
+
+def copy_stream(stream, destination, max_bytes=None, block_size=COPY_BLOCK_SIZE):
+    """
+    Copy a readable stream into an open binary file block by block.
+    Returns the number of bytes written.
+    """
+    written = 0
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        written += len(block)
+        if max_bytes is not None and written > max_bytes:
+            raise UploadError('Upload exceeds the declared length')
+        destination.write(block)
+    return written
+
+
+def save_stream(stream, path, block_size=COPY_BLOCK_SIZE):
+    """Write a readable stream to a new file at path"""
+    with open(path, 'wb') as f:
+        return copy_stream(stream, f, block_size=block_size)
+
+
+class ChunkedUploadStore:
+    """
+    Tracks in-progress uploads as <id>.part data files plus <id>.json
+    metadata files in a staging directory.
+    """
+
+    def __init__(self, directory, max_length=20 * 1024 * 1024):
+        self.directory = directory
+        self.max_length = max_length
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _data_path(self, upload_id):
+        return os.path.join(self.directory, f'{upload_id}.part')
+
+    def _meta_path(self, upload_id):
+        return os.path.join(self.directory, f'{upload_id}.json')
+
+    @contextmanager
+    def _locked(self, upload_id):
+        """Open the partial file for appending, locked against other processes and threads"""
+        with open(self._data_path(upload_id), 'ab') as f:
+            if fcntl is None:
+                with self._lock:
+                    yield f
+                return
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield f
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def is_valid_id(upload_id):
+        """Check that upload_id is a UUID, as issued by create()"""
+        try:
+            uuid.UUID(upload_id)
+        except (ValueError, TypeError, AttributeError):
+            return False
+        return True
+
+    def _check_id(self, upload_id):
+        if not self.is_valid_id(upload_id):
+            raise UploadError('Invalid upload ID')
+        return str(uuid.UUID(upload_id))
+
+    def create(self, length, filename=None, owner_id=None):
+        """Register a new upload and return its metadata"""
+        if length <= 0 or length > self.max_length:
+            raise UploadError(f'Upload length must be between 1 and {self.max_length} bytes')
+
+        upload_id = str(uuid.uuid4())
+        meta = {
+            'id': upload_id,
+            'length': length,
+            'filename': filename,
+            'ownerID': owner_id
+        }
+        with open(self._meta_path(upload_id), 'w') as f:
+            json.dump(meta, f)
+        open(self._data_path(upload_id), 'wb').close()
+        return self.status(upload_id)
+
+    def get(self, upload_id):
+        """Return upload metadata, or None if the upload does not exist"""
+        upload_id = self._check_id(upload_id)
+        try:
+            with open(self._meta_path(upload_id)) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        return meta
+
+    def status(self, upload_id):
+        """Return upload metadata with the current offset and completion flag"""
+        meta = self.get(upload_id)
+        if meta is None:
+            return None
+        try:
+            offset = os.path.getsize(self._data_path(meta['id']))
+        except FileNotFoundError:
+            # Discarded or completed concurrently
+            return None
+        meta['offset'] = offset
+        meta['complete'] = offset == meta['length']
+        return meta
+
+    def append(self, upload_id, offset, stream):
+        """
+        Append a chunk read from stream at the given offset. The offset must
+        equal the number of bytes already received.
+        """
+        meta = self.get(upload_id)
+        if meta is None:
+            raise UploadError('Upload not found')
+
+        if not os.path.exists(self._data_path(meta['id'])):
+            raise UploadError('Upload not found')
+        with self._locked(meta['id']) as f:
+            current = os.fstat(f.fileno()).st_size
+            if offset != current:
+                raise UploadError(f'Offset mismatch: expected {current}, got {offset}')
+            try:
+                copy_stream(stream, f, max_bytes=meta['length'] - current)
+            except UploadError:
+                # Drop the partial chunk so the client can retry it
+                f.truncate(current)
+                raise
+
+        return self.status(meta['id'])
+
+    def complete(self, upload_id, destination):
+        """Move a fully received upload to destination and forget it"""
+        meta = self.status(upload_id)
+        if meta is None:
+            raise UploadError('Upload not found')
+        if not meta['complete']:
+            raise UploadError(f"Upload incomplete: {meta['offset']} of {meta['length']} bytes received")
+
+        # Not while another process is still writing a (rejected) chunk
+        with self._locked(meta['id']):
+            shutil.move(self._data_path(meta['id']), destination)
+        os.remove(self._meta_path(meta['id']))
+        return destination
+
+    def discard(self, upload_id):
+        """Delete an upload and its data"""
+        upload_id = self._check_id(upload_id)
+        for path in (self._data_path(upload_id), self._meta_path(upload_id)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def expire(self, max_age_seconds=86400):
+        """
+        Delete uploads that received nothing for max_age_seconds, and data or
+        metadata files left without their counterpart. Returns the number of
+        uploads removed.
+        """
+        cutoff = time.time() - max_age_seconds
+        upload_ids = {name.rsplit('.', 1)[0] for name in os.listdir(self.directory)
+                      if name.endswith(('.part', '.json'))}
+        removed = 0
+        for upload_id in upload_ids:
+            paths = [self._data_path(upload_id), self._meta_path(upload_id)]
+            try:
+                last_change = max(os.path.getmtime(path) for path in paths if os.path.exists(path))
+            except ValueError:
+                continue
+            if last_change >= cutoff:
+                continue
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            removed += 1
+        return removed
@@ -0,0 +1,157 @@
+"""
+Configuration objects for create_app().
+
+Every setting is read from the environment (and the .env file) once, when
+this module is imported; create_app() picks one of the classes below and
+applies per-app overrides on top. Paths default to files next to this
+module so the backend behaves the same whatever the working directory.
+"""
+import os
+
+from dotenv import load_dotenv
+
+from db_config import sqlite_settings_from_env
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class Config:
+    SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key')
+    CORS_ORIGINS = ['http://localhost:3000']
+
+    # SQLite database and its tuning (WAL, busy timeout, pool sizing)
+    DATABASE_PATH = os.environ.get('DATABASE_PATH') or os.path.join(BASE_DIR, 'pension.db')
+    SQLITE_SETTINGS = sqlite_settings_from_env()
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    MIGRATIONS_DIR = os.path.join(BASE_DIR, 'migrations')
+
+    # Uploads; bigger request bodies are rejected with 413 before they are read
+    UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER') or os.path.join(BASE_DIR, 'uploads')
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 100 * 1024 * 1024))
+    MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', 20 * 1024 * 1024))
+    # Resumable uploads with no chunk for this long are deleted by --gc-photos
+    UPLOAD_EXPIRY_SECONDS = int(os.environ.get('UPLOAD_EXPIRY_SECONDS', 86400))
+    PHOTO_MAX_DIMENSION = int(os.environ.get('PHOTO_MAX_DIMENSION', 1600))
+    PHOTO_JPEG_QUALITY = int(os.environ.get('PHOTO_JPEG_QUALITY', 90))
+
+    # Pre-screening of verification photos before face matching (see photo_screening.py)
+    PHOTO_SCREENING = os.environ.get('PHOTO_SCREENING', '1') == '1'
+    PHOTO_MIN_BYTES = int(os.environ.get('PHOTO_MIN_BYTES', 2048))
+    PHOTO_MIN_DIMENSION = int(os.environ.get('PHOTO_MIN_DIMENSION', 240))
+    PHOTO_MAX_PIXELS = int(os.environ.get('PHOTO_MAX_PIXELS', 40_000_000))
+    PHOTO_SCREEN_DIMENSION = int(os.environ.get('PHOTO_SCREEN_DIMENSION', 480))
+    PHOTO_MIN_SHARPNESS = float(os.environ.get('PHOTO_MIN_SHARPNESS', 25.0))
+    PHOTO_MIN_BRIGHTNESS = int(os.environ.get('PHOTO_MIN_BRIGHTNESS', 40))
+    PHOTO_MAX_BRIGHTNESS = int(os.environ.get('PHOTO_MAX_BRIGHTNESS', 220))
+    PHOTO_MAX_CLIPPED = float(os.environ.get('PHOTO_MAX_CLIPPED', 0.5))
+    PHOTO_FACE_GATE = os.environ.get('PHOTO_FACE_GATE', '1') == '1'
+
+    # Largest number of offline verifications accepted in one sync request
+    SYNC_BATCH_MAX_ITEMS = int(os.environ.get('SYNC_BATCH_MAX_ITEMS', 500))
+
+    # Response encoding: 'auto' uses orjson when installed, 'stdlib' forces json
+    JSON_ENCODER = os.environ.get('JSON_ENCODER', 'auto')
+
+    # Session user cache
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 10000))
+    USER_CACHE_REDIS_URL = os.environ.get('USER_CACHE_REDIS_URL')
+
+    # Metrics and sampled profiling of slow requests. With several server
+    # processes, metrics are summed through snapshot files in this directory
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(BASE_DIR, 'profiles'))
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_SLOW_SECONDS = float(os.environ.get('PROFILE_SLOW_SECONDS', 1.0))
+
+    # Password hashing pool
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 4))
+    PASSWORD_HASH_MAX_QUEUED = int(os.environ.get('PASSWORD_HASH_MAX_QUEUED', 16))
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 0.5))
+
+    # Bulk pensioner imports; their passwords are hashed on the password
+    # hashing pool, using at most IMPORT_HASH_WORKERS of its workers
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 500))
+    IMPORT_HASH_WORKERS = int(os.environ.get('IMPORT_HASH_WORKERS', 1))
+
+    # Death registry matching (see death_matching.py)
+    DEATH_MATCH_MIN_SCORE = float(os.environ.get('DEATH_MATCH_MIN_SCORE', 0.8))
+    DEATH_MATCH_MAX_CANDIDATES = int(os.environ.get('DEATH_MATCH_MAX_CANDIDATES', 3))
+    DEATH_MATCH_MAX_BLOCK_SIZE = int(os.environ.get('DEATH_MATCH_MAX_BLOCK_SIZE', 1000))
+
+    # Face matching; every server process has its own pool, so by default
+    # the CPUs are split between the WEB_CONCURRENCY processes
+    FACE_MATCH_WORKERS = int(os.environ.get(
+        'FACE_MATCH_WORKERS', max(1, (os.cpu_count() or 1) // int(os.environ.get('WEB_CONCURRENCY', 1)))))
+    FACE_MATCH_TOLERANCE = float(os.environ.get('FACE_MATCH_TOLERANCE', 0.6))
+
+    # Background verification jobs
+    ASYNC_VERIFICATION = os.environ.get('ASYNC_VERIFICATION', '1') == '1'
+    JOB_QUEUE_PATH = os.environ.get('JOB_QUEUE_PATH', os.path.join(BASE_DIR, 'jobs.db'))
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+    # Queued verifications claimed together and face matched as one batch
+    JOB_VERIFY_BATCH_SIZE = int(os.environ.get('JOB_VERIFY_BATCH_SIZE', 8))
+    JOB_BACKOFF_BASE = float(os.environ.get('JOB_BACKOFF_BASE', 2.0))
+    JOB_DRAIN_TIMEOUT = float(os.environ.get('JOB_DRAIN_TIMEOUT', 30))
+    # Running jobs whose heartbeat is older than the timeout are recovered
+    JOB_HEARTBEAT_INTERVAL = float(os.environ.get('JOB_HEARTBEAT_INTERVAL', 30))
+    JOB_HEARTBEAT_TIMEOUT = float(os.environ.get('JOB_HEARTBEAT_TIMEOUT', 120))
+    # Finished and failed jobs are deleted after this many days
+    JOB_RETENTION_DAYS = float(os.environ.get('JOB_RETENTION_DAYS', 7))
+
+    # Re-verification schedule
+    DUE_SCHEDULE_REFRESH = int(os.environ.get('DUE_SCHEDULE_REFRESH', 300))
+
+    # SmartPension contract the chain mirror indexes (defaults match the local Hardhat node)
+    CHAIN_RPC_URL = os.environ.get('CHAIN_RPC_URL', 'http://127.0.0.1:8545')
+    CHAIN_CONTRACT_ADDRESS = os.environ.get('CHAIN_CONTRACT_ADDRESS', '0x0165878A594ca255338adfa4d48449f69242Eb8F')
+    CHAIN_START_BLOCK = int(os.environ.get('CHAIN_START_BLOCK', 0))
+    CHAIN_BATCH_SIZE = int(os.environ.get('CHAIN_BATCH_SIZE', 2000))
+    CHAIN_CONFIRMATIONS = int(os.environ.get('CHAIN_CONFIRMATIONS', 0))
+    CHAIN_POLL_INTERVAL = float(os.environ.get('CHAIN_POLL_INTERVAL', 5))
+    CHAIN_RPC_POOL_SIZE = int(os.environ.get('CHAIN_RPC_POOL_SIZE', 10))
+    CHAIN_READ_WORKERS = int(os.environ.get('CHAIN_READ_WORKERS', 8))
+    CHAIN_BATCH_GET_MAX_IDS = int(os.environ.get('CHAIN_BATCH_GET_MAX_IDS', 500))
+
+    # Payment runs; the period must match the contract's verificationPeriod (default 180 days)
+    PAYMENT_VERIFICATION_PERIOD_DAYS = int(os.environ.get('PAYMENT_VERIFICATION_PERIOD_DAYS', 180))
+    PAYMENT_RUN_DIR = os.environ.get('PAYMENT_RUN_DIR', os.path.join(BASE_DIR, 'payment_runs'))
+    # Refuse to pay from a mirror the indexer has not synced for longer than this
+    PAYMENT_MAX_INDEX_LAG_SECONDS = int(os.environ.get('PAYMENT_MAX_INDEX_LAG_SECONDS', 3600))
+
+
+class DevelopmentConfig(Config):
+    DEBUG = os.environ.get('FLASK_DEBUG', '1') == '1'
+
+
+class ProductionConfig(Config):
+    DEBUG = False
+
+
+class TestingConfig(Config):
+    TESTING = True
+    # Verify inline and hash cheaply so tests do not wait on workers or pbkdf2
+    ASYNC_VERIFICATION = False
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    FACE_MATCH_WORKERS = 1
+
+
+CONFIGS = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig
+}
+
+
+def config_from_name(name=None):
+    """Config class for name, or for the APP_CONFIG environment variable"""
+    name = name or os.environ.get('APP_CONFIG', 'development')
+    try:
+        return CONFIGS[name]
+    except KeyError:
+        raise ValueError(f'Unknown configuration: {name}') from None
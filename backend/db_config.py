@@ -0,0 +1,74 @@
+"""
+SQLite tuning for multi-threaded and multi-process servers.
+
+Every new DBAPI connection gets WAL journaling (readers no longer block the
+writer), a busy timeout (writers wait for the lock instead of failing with
+"database is locked"), a relaxed synchronous level and a memory-mapped read
+window. Pool sizing is passed to SQLAlchemy through engine options.
+"""
+import os
+import sqlite3
+
+from sqlalchemy import event
+
+
+def sqlite_settings_from_env():
+    """Read the tuning parameters from the environment"""
+    return {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -64000)),
+        'temp_store': os.environ.get('SQLITE_TEMP_STORE', 'MEMORY')
+    }
+
+
+def engine_options(settings, pool_size=None, max_overflow=None, pool_timeout=None):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS for a file-based SQLite database shared
+    by the threads of one server process.
+    """
+    return {
+        'pool_size': pool_size or int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': max_overflow or int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': pool_timeout or int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_pre_ping': True,
+        'connect_args': {
+            # sqlite3's own lock wait, in seconds; matches busy_timeout
+            'timeout': settings['busy_timeout'] / 1000.0,
+            # Pooled connections move between request threads
+            'check_same_thread': False
+        }
+    }
+
+
+def apply_pragmas(dbapi_connection, settings):
+    """Apply the connection-level pragmas to a raw sqlite3 connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout={int(settings['busy_timeout'])}")
+        cursor.execute(f"PRAGMA journal_mode={settings['journal_mode']}")
+        cursor.execute(f"PRAGMA synchronous={settings['synchronous']}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings['mmap_size'])}")
+        cursor.execute(f"PRAGMA cache_size={int(settings['cache_size'])}")
+        cursor.execute(f"PRAGMA temp_store={settings['temp_store']}")
+    finally:
+        cursor.close()
+
+
+def configure_sqlite(engine, settings):
+    """Apply the pragmas to every connection the engine opens"""
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        if isinstance(dbapi_connection, sqlite3.Connection):
+            apply_pragmas(dbapi_connection, settings)
+
+    return engine
+
+
+def describe_connection(connection):
+    """Return the effective pragma values of a connection, for diagnostics"""
+    names = ['journal_mode', 'synchronous', 'busy_timeout', 'mmap_size', 'cache_size', 'temp_store']
+    return {name: connection.exec_driver_sql(f'PRAGMA {name}').scalar() for name in names}
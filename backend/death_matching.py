@@ -0,0 +1,362 @@
+"""
+Matching of civil death registry extracts against the pensioner roster.
+
+Comparing every registry record with every pensioner is quadratic, so the
+roster is indexed once under blocking keys and each registry record is
+only compared with the pensioners sharing at least one key:
+
+    date of birth
+    phonetic (Soundex) last name + phonetic first name
+    year of birth + phonetic last name    (typos in day or month)
+    postal code + phonetic last name      (missing date of birth)
+
+Candidates that agree on fewer than two of last name, first name, date of
+birth and postal code are dropped before scoring. The rest are scored
+with Jaro-Winkler similarity on the normalized names plus date of birth
+and postal code agreement, and the best few above a threshold are
+reported for a doctor or admin to confirm; nothing is marked deceased
+automatically.
+
+Registry records are read with bulk_import.iter_records, so CSV and JSONL
+extracts are streamed and the candidate report is written row by row.
+"""
+import csv
+import datetime
+import functools
+import unicodedata
+from collections import defaultdict, namedtuple
+
+# Accepted column names of a registry extract -> attribute
+FIELD_NAMES = {
+    'registryId': 'registry_id',
+    'firstName': 'first_name',
+    'lastName': 'last_name',
+    'dateOfBirth': 'date_of_birth',
+    'postalCode': 'postal_code',
+    'dateOfDeath': 'date_of_death'
+}
+FIELD_NAMES.update({attribute: attribute for attribute in list(FIELD_NAMES.values())})
+
+REQUIRED_FIELDS = ('first_name', 'last_name')
+
+# Score weights; they add up to 1
+WEIGHTS = {'last_name': 0.35, 'first_name': 0.25, 'date_of_birth': 0.3, 'postal_code': 0.1}
+
+SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'), **dict.fromkeys('cgjkqsxz', '2'), **dict.fromkeys('dt', '3'),
+    'l': '4', **dict.fromkeys('mn', '5'), 'r': '6'
+}
+
+# Leading characters that make a spreadsheet read a cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# A normalized person, from the roster (key = user id) or the registry (key = row number)
+Person = namedtuple('Person', 'key first_name last_name date_of_birth postal_code first_code last_code')
+
+
+def normalize_name(value):
+    """Lowercase ASCII letters and single spaces; accents, punctuation and hyphens removed"""
+    if not value:
+        return ''
+    value = unicodedata.normalize('NFKD', str(value)).encode('ascii', 'ignore').decode().lower()
+    value = ''.join(char if char.isalpha() else ' ' for char in value if char not in "'`")
+    return ' '.join(value.split())
+
+
+def spreadsheet_safe(value):
+    """Quote a text cell that a spreadsheet would evaluate as a formula"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def normalize_postal_code(value):
+    return ''.join(char for char in str(value or '').upper() if char.isalnum())
+
+
+def soundex(name):
+    """American Soundex of a normalized name (spaces ignored), '' for an empty name"""
+    letters = name.replace(' ', '')
+    if not letters:
+        return ''
+    code = letters[0].upper()
+    previous = SOUNDEX_CODES.get(letters[0], '')
+    for char in letters[1:]:
+        digit = SOUNDEX_CODES.get(char, '')
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        # h and w do not separate letters with the same code; vowels do
+        if char not in 'hw':
+            previous = digit
+    return code.ljust(4, '0')
+
+
+def jaro_winkler(left, right):
+    """Jaro-Winkler similarity of two strings, between 0 and 1"""
+    if left == right:
+        return 1.0 if left else 0.0
+    if not left or not right:
+        return 0.0
+    window = max(max(len(left), len(right)) // 2 - 1, 0)
+    left_matched = [False] * len(left)
+    right_matched = [False] * len(right)
+    matches = 0
+    for i, char in enumerate(left):
+        for j in range(max(0, i - window), min(len(right), i + window + 1)):
+            if not right_matched[j] and right[j] == char:
+                left_matched[i] = right_matched[j] = True
+                matches += 1
+                break
+    if not matches:
+        return 0.0
+
+    transpositions = 0
+    j = 0
+    for i, char in enumerate(left):
+        if left_matched[i]:
+            while not right_matched[j]:
+                j += 1
+            if char != right[j]:
+                transpositions += 1
+            j += 1
+    jaro = (matches / len(left) + matches / len(right) + (matches - transpositions / 2) / matches) / 3
+
+    prefix = 0
+    for a, b in zip(left[:4], right[:4]):
+        if a != b:
+            break
+        prefix += 1
+    return jaro + prefix * 0.1 * (1 - jaro)
+
+
+def date_of_birth_score(left, right):
+    """1 for equal dates, 0.6 for one differing part or swapped day/month, 0.5 if unknown"""
+    if left is None or right is None:
+        return 0.5
+    if left == right:
+        return 1.0
+    differing = (left.year != right.year) + (left.month != right.month) + (left.day != right.day)
+    swapped = left.year == right.year and left.month == right.day and left.day == right.month
+    return 0.6 if differing == 1 or swapped else 0.0
+
+
+@functools.lru_cache(maxsize=65536)
+def name_key(value):
+    """(normalized name, Soundex); names repeat a lot across a roster and an extract"""
+    name = normalize_name(value)
+    return name, soundex(name)
+
+
+def make_person(key, first_name, last_name, date_of_birth=None, postal_code=None):
+    first_name, first_code = name_key(first_name)
+    last_name, last_code = name_key(last_name)
+    return Person(key, first_name, last_name, date_of_birth, normalize_postal_code(postal_code),
+                  first_code, last_code)
+
+
+def blocking_keys(person):
+    keys = []
+    if person.date_of_birth:
+        keys.append(('dob', person.date_of_birth))
+    if person.last_code:
+        if person.first_code:
+            keys.append(('name', person.last_code, person.first_code))
+        if person.date_of_birth:
+            keys.append(('year', person.date_of_birth.year, person.last_code))
+        if person.postal_code:
+            keys.append(('postal', person.postal_code, person.last_code))
+    return keys
+
+
+def agreements(left, right):
+    """Fields on which two people agree exactly (names phonetically)"""
+    fields = []
+    if left.last_code and left.last_code == right.last_code:
+        fields.append('lastName')
+    if left.first_code and left.first_code == right.first_code:
+        fields.append('firstName')
+    if left.date_of_birth and left.date_of_birth == right.date_of_birth:
+        fields.append('dateOfBirth')
+    if left.postal_code and left.postal_code == right.postal_code:
+        fields.append('postalCode')
+    return fields
+
+
+def match_score(left, right):
+    if left.postal_code and right.postal_code:
+        postal = 1.0 if left.postal_code == right.postal_code else 0.0
+    else:
+        postal = 0.5
+    return (WEIGHTS['last_name'] * jaro_winkler(left.last_name, right.last_name)
+            + WEIGHTS['first_name'] * jaro_winkler(left.first_name, right.first_name)
+            + WEIGHTS['date_of_birth'] * date_of_birth_score(left.date_of_birth, right.date_of_birth)
+            + WEIGHTS['postal_code'] * postal)
+
+
+class RosterIndex:
+    """
+    Pensioners under their blocking keys, with the details reported for
+    a candidate. Blocks larger than max_block_size (very common names,
+    popular dates) are skipped at lookup time; the record's other keys
+    still find its candidates.
+    """
+
+    def __init__(self, max_block_size=1000):
+        self.max_block_size = max_block_size
+        self.people = []
+        self.details = {}
+        self.blocks = defaultdict(list)
+
+    def __len__(self):
+        return len(self.people)
+
+    def add(self, person, details=()):
+        position = len(self.people)
+        self.people.append(person)
+        self.details[person.key] = tuple(details)
+        for key in blocking_keys(person):
+            self.blocks[key].append(position)
+
+    def candidates(self, person):
+        """Pensioners sharing a blocking key with person"""
+        positions = set()
+        for key in blocking_keys(person):
+            block = self.blocks.get(key)
+            if block and len(block) <= self.max_block_size:
+                positions.update(block)
+        return [self.people[position] for position in positions]
+
+
+def parse_registry_record(record):
+    """
+    Convert a raw registry record to attributes. Returns (values, errors);
+    values is None when the record is invalid.
+    """
+    values = {}
+    for name, value in record.items():
+        attribute = FIELD_NAMES.get((name or '').strip())
+        if attribute is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        if value in ('', None):
+            continue
+        values[attribute] = value
+
+    errors = [f'Missing required field: {attribute}' for attribute in REQUIRED_FIELDS
+              if not values.get(attribute)]
+    for attribute in ('date_of_birth', 'date_of_death'):
+        if attribute in values:
+            try:
+                values[attribute] = datetime.date.fromisoformat(str(values[attribute])[:10])
+            except ValueError:
+                errors.append(f'Invalid {attribute}, expected YYYY-MM-DD')
+
+    if errors:
+        return None, errors
+    return values, []
+
+
+class DeathMatchReport:
+    """Counts and invalid rows of one matching run"""
+
+    def __init__(self, max_listed_errors=100):
+        self.total = 0
+        self.matched = 0
+        self.candidates = 0
+        self.errors = []
+        self.max_listed_errors = max_listed_errors
+
+    def add_error(self, row_number, messages):
+        self.errors.append((row_number, '; '.join(messages)))
+
+    def to_dict(self):
+        return {
+            'total': self.total,
+            'matched': self.matched,
+            'candidates': self.candidates,
+            'failed': len(self.errors),
+            'errors': [
+                {'row': row_number, 'error': message}
+                for row_number, message in self.errors[:self.max_listed_errors]
+            ]
+        }
+
+
+class DeathRegistryMatcher:
+    """
+    Ranks roster candidates for the records of a registry extract, as
+    produced by bulk_import.iter_records.
+    """
+
+    CSV_HEADER = [
+        'registryRow', 'registryId', 'registryFirstName', 'registryLastName', 'registryDateOfBirth',
+        'registryPostalCode', 'dateOfDeath', 'rank', 'score', 'matchedOn',
+        'userId', 'pensionerID', 'firstName', 'lastName', 'dateOfBirth', 'postalCode'
+    ]
+
+    def __init__(self, index, min_score=0.8, max_candidates=3):
+        self.index = index
+        self.min_score = min_score
+        self.max_candidates = max_candidates
+
+    def rank(self, person):
+        """[(score, candidate, matched_on)] best first, at most max_candidates"""
+        ranked = []
+        last_code = person.last_code or None
+        first_code = person.first_code or None
+        date_of_birth = person.date_of_birth
+        postal_code = person.postal_code or None
+        for candidate in self.index.candidates(person):
+            # Cheap filter: at least two exactly agreeing fields, as in agreements()
+            shared = ((candidate.last_code == last_code) + (candidate.first_code == first_code)
+                      + (date_of_birth is not None and candidate.date_of_birth == date_of_birth)
+                      + (candidate.postal_code == postal_code))
+            if shared < 2:
+                continue
+            score = match_score(person, candidate)
+            if score >= self.min_score:
+                ranked.append((score, candidate))
+        ranked.sort(key=lambda item: (-item[0], item[1].key))
+        return [(score, candidate, agreements(person, candidate))
+                for score, candidate in ranked[:self.max_candidates]]
+
+    def run(self, records, path):
+        """Match every record and write the ranked candidates to a CSV file"""
+        report = DeathMatchReport()
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.CSV_HEADER)
+            for row_number, record, error in records:
+                report.total += 1
+                if error:
+                    report.add_error(row_number, [error])
+                    continue
+                values, errors = parse_registry_record(record)
+                if errors:
+                    report.add_error(row_number, errors)
+                    continue
+
+                person = make_person(row_number, values['first_name'], values['last_name'],
+                                     values.get('date_of_birth'), values.get('postal_code'))
+                ranked = self.rank(person)
+                if not ranked:
+                    continue
+                report.matched += 1
+                report.candidates += len(ranked)
+
+                registry_columns = [
+                    row_number, values.get('registry_id', ''), values['first_name'], values['last_name'],
+                    values.get('date_of_birth', ''), values.get('postal_code', ''),
+                    values.get('date_of_death', '')
+                ]
+                for rank, (score, candidate, matched_on) in enumerate(ranked, start=1):
+                    row = registry_columns + [
+                        rank, f'{score:.3f}', '+'.join(matched_on), candidate.key,
+                        *self.index.details[candidate.key]
+                    ]
+                    # Registry extracts and user names are untrusted; reviewers open this in a spreadsheet
+                    writer.writerow([spreadsheet_safe(value) for value in row])
+        return report
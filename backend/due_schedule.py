@@ -0,0 +1,133 @@
+"""
+Date-ordered index of pensioners' upcoming re-verification deadlines.
+
+Each pensioner appears once, keyed by the next_verification_date of their
+latest successful verification (pensioners who never verified are due at
+the epoch). Entries are kept sorted so "who is due before X" pages and
+summary counts are bisect lookups instead of scans over all pensioners.
+New verifications update the index incrementally; a periodic full reload
+picks up writes made by other server processes.
+"""
+import time
+import bisect
+import datetime
+import threading
+
+# Due date used for pensioners without any successful verification
+NEVER_VERIFIED = 0.0
+
+
+def to_timestamp(value):
+    """Convert a naive UTC datetime (or None) to a POSIX timestamp"""
+    if value is None:
+        return NEVER_VERIFIED
+    return value.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+def from_timestamp(value):
+    if value == NEVER_VERIFIED:
+        return None
+    return datetime.datetime.utcfromtimestamp(value)
+
+
+class DueSchedule:
+    """
+    Sorted (due_timestamp, user_id) entries plus a user_id -> due map.
+    """
+
+    def __init__(self, loader, refresh_interval=300):
+        self.loader = loader
+        self.refresh_interval = refresh_interval
+        self._entries = []
+        self._due_by_user = {}
+        self._loaded_at = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_interval:
+            self.reload()
+
+    def reload(self):
+        """Rebuild the index from loader(), which yields (user_id, due_datetime)"""
+        due_by_user = {user_id: to_timestamp(due) for user_id, due in self.loader()}
+        entries = sorted((due, user_id) for user_id, due in due_by_user.items())
+        with self._lock:
+            self._due_by_user = due_by_user
+            self._entries = entries
+            self._loaded_at = time.monotonic()
+
+    def update(self, user_id, due):
+        """
+        Record a new due date for a user. Only moves the deadline forward, so
+        an older verification synced late cannot shorten it.
+        """
+        due = to_timestamp(due)
+        with self._lock:
+            if self._loaded_at is None:
+                # Nothing loaded yet; the next access reads the database
+                return
+            current = self._due_by_user.get(user_id)
+            if current is not None:
+                if due <= current:
+                    return
+                position = bisect.bisect_left(self._entries, (current, user_id))
+                if position < len(self._entries) and self._entries[position] == (current, user_id):
+                    del self._entries[position]
+            bisect.insort(self._entries, (due, user_id))
+            self._due_by_user[user_id] = due
+
+    def add_user(self, user_id):
+        """Track a newly registered pensioner as never verified"""
+        with self._lock:
+            if self._loaded_at is None or user_id in self._due_by_user:
+                return
+            bisect.insort(self._entries, (NEVER_VERIFIED, user_id))
+            self._due_by_user[user_id] = NEVER_VERIFIED
+
+    def remove_user(self, user_id):
+        """Stop tracking a user (e.g. deceased)"""
+        with self._lock:
+            current = self._due_by_user.pop(user_id, None)
+            if current is None:
+                return
+            position = bisect.bisect_left(self._entries, (current, user_id))
+            if position < len(self._entries) and self._entries[position] == (current, user_id):
+                del self._entries[position]
+
+    def due_before(self, until, after=None, limit=50):
+        """
+        Return up to limit (user_id, due_datetime) entries due before until,
+        in due order. after is the (timestamp, user_id) cursor of the last
+        entry of the previous page.
+        """
+        self._ensure_loaded()
+        until = to_timestamp(until)
+        with self._lock:
+            start = bisect.bisect_right(self._entries, after) if after else 0
+            end = bisect.bisect_left(self._entries, (until, -1))
+            page = self._entries[start:min(end, start + limit)]
+            has_more = start + limit < end
+        return [(user_id, from_timestamp(due)) for due, user_id in page], has_more
+
+    def summary(self, now=None, horizons=(7, 30)):
+        """Counts of never verified, overdue and soon-due pensioners"""
+        self._ensure_loaded()
+        now = now or datetime.datetime.utcnow()
+        with self._lock:
+            entries = self._entries
+            never = bisect.bisect_right(entries, (NEVER_VERIFIED, float('inf')))
+            overdue = bisect.bisect_left(entries, (to_timestamp(now), -1))
+            counts = {
+                'total': len(entries),
+                'neverVerified': never,
+                'overdue': overdue - never,
+            }
+            for days in horizons:
+                horizon = to_timestamp(now + datetime.timedelta(days=days))
+                counts[f'dueWithin{days}Days'] = bisect.bisect_left(entries, (horizon, -1)) - overdue
+            counts['nextDue'] = (from_timestamp(entries[overdue][0]).isoformat()
+                                 if overdue < len(entries) else None)
+        return counts
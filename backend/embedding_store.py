@@ -0,0 +1,141 @@
+"""
+In-memory nearest-neighbour index over pensioners' reference face encodings.
+
+Encodings are persisted in the face_embedding table (see app.py); this index
+keeps a dense float32 matrix of them so 1:N searches across the whole
+pensioner base are a single vectorized distance computation instead of
+re-decoding image files from UPLOAD_FOLDER.
+
+The table is the source of truth: other processes (gunicorn workers, job
+workers) store encodings too, so app.py extends the index with the rows
+added since its last sync before each search. Per-user reference lookups
+read the table directly and never rely on this index.
+"""
+import threading
+
+import numpy as np
+
+from face_matching import ENCODING_SIZE
+
+
+def encoding_to_bytes(encoding):
+    """Serialize an encoding for storage in a LargeBinary column"""
+    return np.asarray(encoding, dtype=np.float64).reshape(ENCODING_SIZE).tobytes()
+
+
+def encoding_from_bytes(data):
+    """Inverse of encoding_to_bytes"""
+    return np.frombuffer(data, dtype=np.float64).copy()
+
+
+class EmbeddingIndex:
+    """
+    Thread-safe matrix of reference encodings keyed by verification ID.
+
+    Each row is tagged with its verification_id, pensioner_id and user_id so
+    search results can be mapped straight back to database records.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._matrix = np.empty((0, ENCODING_SIZE), dtype=np.float32)
+        self._verification_ids = np.empty(0, dtype=np.int64)
+        self._pensioner_ids = np.empty(0, dtype=np.int64)
+        self._user_ids = np.empty(0, dtype=np.int64)
+        # Highest verification_id in the index; rows are synced in ID order
+        self.synced_through = 0
+
+    def __len__(self):
+        return len(self._verification_ids)
+
+    def extend(self, rows):
+        """
+        Append (verification_id, pensioner_id, user_id, encoding) rows in
+        ascending verification_id order. Rows at or below synced_through are
+        skipped, so concurrent syncs of the same rows do not duplicate them.
+        """
+        with self._lock:
+            rows = [row for row in rows if row[0] > self.synced_through]
+            if not rows:
+                return
+            matrix = np.empty((len(rows), ENCODING_SIZE), dtype=np.float32)
+            for i, row in enumerate(rows):
+                matrix[i] = row[3]
+            count = len(rows)
+            self._matrix = np.vstack([self._matrix, matrix])
+            self._verification_ids = np.concatenate([
+                self._verification_ids, np.fromiter((r[0] for r in rows), dtype=np.int64, count=count)])
+            self._pensioner_ids = np.concatenate([
+                self._pensioner_ids, np.fromiter((r[1] or 0 for r in rows), dtype=np.int64, count=count)])
+            self._user_ids = np.concatenate([
+                self._user_ids, np.fromiter((r[2] for r in rows), dtype=np.int64, count=count)])
+            self.synced_through = int(self._verification_ids[-1])
+
+    def search(self, encoding, k=5, max_distance=None, exclude_user_id=None):
+        """
+        Return up to k nearest reference encodings as dicts, closest first.
+        """
+        query = np.asarray(encoding, dtype=np.float32).reshape(ENCODING_SIZE)
+        with self._lock:
+            matrix = self._matrix
+            verification_ids = self._verification_ids
+            pensioner_ids = self._pensioner_ids
+            user_ids = self._user_ids
+
+        if len(matrix) == 0:
+            return []
+
+        distances = np.linalg.norm(matrix - query, axis=1)
+        candidates = np.ones(len(distances), dtype=bool)
+        if exclude_user_id is not None:
+            candidates &= user_ids != exclude_user_id
+        if max_distance is not None:
+            candidates &= distances <= max_distance
+
+        positions = np.flatnonzero(candidates)
+        if len(positions) > k:
+            nearest = np.argpartition(distances[positions], k)[:k]
+            positions = positions[nearest]
+        positions = positions[np.argsort(distances[positions])]
+
+        return [{
+            'verificationID': int(verification_ids[i]),
+            'pensionerID': int(pensioner_ids[i]),
+            'userID': int(user_ids[i]),
+            'distance': float(distances[i])
+        } for i in positions]
+
+    def find_duplicates(self, max_distance, block_size=1024):
+        """
+        Find pairs of different users whose reference encodings are within
+        max_distance of each other. Distances are computed block by block
+        to bound memory use on large indexes.
+        """
+        with self._lock:
+            matrix = self._matrix
+            user_ids = self._user_ids
+            verification_ids = self._verification_ids
+
+        squared_norms = np.einsum('ij,ij->i', matrix, matrix)
+        duplicates = []
+        for start in range(0, len(matrix), block_size):
+            block = matrix[start:start + block_size]
+            # |a - b|^2 = |a|^2 + |b|^2 - 2ab
+            squared = (squared_norms[start:start + block_size, None]
+                       + squared_norms[None, :]
+                       - 2.0 * block @ matrix.T)
+            distances = np.sqrt(np.maximum(squared, 0.0))
+            rows, cols = np.nonzero(distances <= max_distance)
+            for row, col in zip(rows, cols):
+                i = start + row
+                # Report each pair once and ignore a user's own encodings
+                if col <= i or user_ids[i] == user_ids[col]:
+                    continue
+                duplicates.append({
+                    'userIDs': [int(user_ids[i]), int(user_ids[col])],
+                    'verificationIDs': [int(verification_ids[i]), int(verification_ids[col])],
+                    'distance': float(distances[row, col])
+                })
+
+        duplicates.sort(key=lambda d: d['distance'])
+        return duplicates
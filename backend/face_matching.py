@@ -0,0 +1,148 @@
+"""
+Face matching engine for pensioner verification.
+
+Face encoding (the expensive dlib step) runs in a pool of worker processes so
+it never holds the Flask worker, and the resulting encodings are compared in
+a single vectorized NumPy pass. Verifications are submitted in batches with
+verify_batch() and match_references() to make full use of the pool during
+busy periods.
+NumPy and face_recognition are imported on first use, so importing this
+module stays cheap for processes that never match a face.
+"""
+import os
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Default distance threshold used by face_recognition.compare_faces
+DEFAULT_TOLERANCE = 0.6
+
+# Length of a dlib face encoding
+ENCODING_SIZE = 128
+
+
+def face_library_available():
+    """Check whether face_recognition (and dlib) can be imported"""
+    return importlib.util.find_spec('face_recognition') is not None
+
+
+def encode_face(image_path):
+    """
+    Load an image and return the encoding of the first face found in it.
+    Runs inside a pool worker; returns None if the file has no usable face.
+    """
+    import face_recognition
+    import numpy as np
+
+    try:
+        image = face_recognition.load_image_file(image_path)
+    except (OSError, ValueError) as e:
+        print(f"Failed to load image {image_path}: {e}")
+        return None
+
+    encodings = face_recognition.face_encodings(image)
+    if not encodings:
+        return None
+    return np.asarray(encodings[0], dtype=np.float64)
+
+
+def face_distances(left, right):
+    """
+    Row-wise Euclidean distance between two (N, 128) arrays of encodings.
+    """
+    import numpy as np
+
+    left = np.asarray(left, dtype=np.float64).reshape(-1, ENCODING_SIZE)
+    right = np.asarray(right, dtype=np.float64).reshape(-1, ENCODING_SIZE)
+    return np.linalg.norm(left - right, axis=1)
+
+
+class FaceMatcher:
+    """
+    Batch face matcher backed by a lazily created process pool.
+    """
+
+    def __init__(self, max_workers=None, tolerance=DEFAULT_TOLERANCE):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.tolerance = tolerance
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            # The server process runs threads; forking it could copy a held lock
+            # into the children, so they start from a clean interpreter instead
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+        return self._pool
+
+    def encode_batch(self, image_paths):
+        """Encode many images in parallel, preserving input order"""
+        image_paths = list(image_paths)
+        if not image_paths:
+            return []
+        chunksize = max(1, len(image_paths) // (self.max_workers * 4))
+        return list(self._get_pool().map(encode_face, image_paths, chunksize=chunksize))
+
+    def verify_batch(self, pairs):
+        """
+        Verify a batch of (face_image_path, id_image_path) pairs.
+
+        Returns a list of dicts with 'match', 'distance' and the two encodings
+        for each pair. A pair where either image has no detectable face is
+        never a match and has a distance of None.
+        """
+        import numpy as np
+
+        pairs = list(pairs)
+        if not pairs:
+            return []
+
+        # Encode every image of the batch in one pass over the pool
+        paths = [path for pair in pairs for path in pair]
+        encodings = self.encode_batch(paths)
+        face_encodings = encodings[0::2]
+        id_encodings = encodings[1::2]
+
+        valid = [i for i, (face, id_enc) in enumerate(zip(face_encodings, id_encodings))
+                 if face is not None and id_enc is not None]
+
+        results = [{
+            'match': False,
+            'distance': None,
+            'face_encoding': face,
+            'id_encoding': id_enc
+        } for face, id_enc in zip(face_encodings, id_encodings)]
+        if valid:
+            distances = face_distances(
+                np.stack([face_encodings[i] for i in valid]),
+                np.stack([id_encodings[i] for i in valid])
+            )
+            for i, distance in zip(valid, distances):
+                results[i]['match'] = bool(distance <= self.tolerance)
+                results[i]['distance'] = float(distance)
+        return results
+
+    def match_references(self, face_image_paths, reference_encodings):
+        """
+        Verify face photos against already known reference encodings, so the
+        reference ID photos do not have to be decoded and encoded again.
+        """
+        face_encodings = self.encode_batch(face_image_paths)
+        results = []
+        for face, reference in zip(face_encodings, reference_encodings):
+            if face is None or reference is None:
+                results.append({'match': False, 'distance': None, 'face_encoding': face})
+                continue
+            distance = float(face_distances(face, reference)[0])
+            results.append({
+                'match': distance <= self.tolerance,
+                'distance': distance,
+                'face_encoding': face
+            })
+        return results
+
+    def shutdown(self, wait=True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
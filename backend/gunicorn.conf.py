@@ -0,0 +1,75 @@
+"""
+Gunicorn settings for serving the backend in production.
+
+Pre-fork workers with a thread pool each (gthread), so long face checks
+and uploads do not block other requests on the same worker. Every setting
+can be overridden from the environment. The app is imported separately in
+each worker (no preload), so SQLite connections, the job queue and the
+Redis cache listener are never shared across a fork.
+
+On shutdown or restart a worker stops accepting connections, finishes its
+in-flight requests within graceful_timeout and then drains its background
+verification jobs (JOB_DRAIN_TIMEOUT); jobs that do not finish in time are
+requeued by another worker once their heartbeat expires
+(JOB_HEARTBEAT_TIMEOUT). Keep JOB_DRAIN_TIMEOUT below
+GUNICORN_GRACEFUL_TIMEOUT so the drain is not cut short.
+"""
+import os
+import shutil
+import tempfile
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+workers = int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 2))
+# Workers read these when they import the app: the face matching pool of
+# each worker gets cpu_count // workers processes (FACE_MATCH_WORKERS), and
+# /metrics sums the counts of all workers through this directory
+os.environ['WEB_CONCURRENCY'] = str(workers)
+metrics_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'smartpension-metrics')
+)
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Face verification can take tens of seconds on a cold worker
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 60))
+# Must exceed the reverse proxy's idle timeout for upstream connections
+# (nginx keepalive_timeout in the upstream block, 60 s on common load
+# balancers) so the proxy closes an idle connection first and never reuses
+# one gunicorn has just closed. gthread parks idle connections in its
+# poller, so they do not hold a thread.
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 75))
+
+# Recycle workers to contain memory growth of the imaging libraries (0 = never)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 50))
+
+# Trust X-Forwarded-* headers from the reverse proxy
+forwarded_allow_ips = os.environ.get('FORWARDED_ALLOW_IPS', '127.0.0.1')
+
+# Heartbeat files on tmpfs avoid stalls when /tmp is on a slow disk
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def on_starting(server):
+    # Counts of a previous server run would otherwise be added to this one's
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def post_worker_init(worker):
+    from app import start_background_workers
+    from wsgi import app
+    start_background_workers(app)
+
+
+def worker_exit(server, worker):
+    from app import stop_background_workers
+    from wsgi import app
+    stop_background_workers(app)
@@ -0,0 +1,389 @@
+"""
+SQLite-backed background job queue.
+
+Jobs are stored in their own SQLite file so enqueueing never contends with
+the application database, and claimed atomically so several server
+processes can share one queue. Failed jobs are retried with exponential
+backoff until max_attempts is reached. Kinds registered with
+register_batch() are claimed and handled several jobs at a time, so
+handlers such as face matching can process them as one batch.
+
+A running job is owned by its process (host:pid), which refreshes the
+job's heartbeat while it runs. Jobs whose heartbeat has expired belong to
+a process that died and are requeued, or failed if they have used all
+their attempts. Finished and failed jobs are deleted after the retention
+period.
+"""
+import os
+import json
+import time
+import socket
+import uuid
+import sqlite3
+import threading
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS job (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    run_after REAL NOT NULL,
+    result TEXT,
+    error TEXT,
+    owner TEXT,
+    heartbeat_at REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+'''
+
+# Columns added after the first release, for queue files created before them
+ADDED_COLUMNS = {'owner': 'TEXT', 'heartbeat_at': 'REAL'}
+
+INDEXES = (
+    'CREATE INDEX IF NOT EXISTS ix_job_status_run_after ON job (status, run_after)',
+    # Recovery, pruning and the per-status counts
+    'CREATE INDEX IF NOT EXISTS ix_job_status_updated_at ON job (status, updated_at)'
+)
+
+
+class JobQueue:
+    """
+    Persistent queue with a pool of worker threads.
+
+    Handlers are registered per job kind and called with the job payload;
+    whatever they return (JSON-serializable) is stored as the job result.
+    Raising an exception marks the attempt as failed and schedules a retry.
+    Batch handlers get a list of payloads and return one result per
+    payload, where an exception instance fails that job only.
+    """
+
+    def __init__(self, db_path, workers=2, max_attempts=3, backoff_base=2.0,
+                 backoff_max=300.0, poll_interval=0.5, heartbeat_interval=30.0,
+                 heartbeat_timeout=120.0, retention_days=7):
+        self.db_path = db_path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.retention_days = retention_days
+        self._handlers = {}
+        self._batch_handlers = {}
+        self._threads = []
+        self._heartbeat_thread = None
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        self._local = threading.local()
+        # IDs of the jobs this process is running right now
+        self._active = set()
+        self._active_lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute(SCHEMA)
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(job)')}
+            for column, column_type in ADDED_COLUMNS.items():
+                if column not in columns:
+                    conn.execute(f'ALTER TABLE job ADD COLUMN {column} {column_type}')
+            for index in INDEXES:
+                conn.execute(index)
+
+    @property
+    def owner(self):
+        """Identity of this process in the job table's owner column"""
+        return f'{socket.gethostname()}:{os.getpid()}'
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return _Transaction(conn)
+
+    def register(self, kind, handler):
+        """Register the function that processes jobs of the given kind"""
+        self._handlers[kind] = handler
+
+    def register_batch(self, kind, handler, max_batch=8):
+        """Register handler(payloads) for jobs of kind, claimed up to max_batch at a time"""
+        self._batch_handlers[kind] = (handler, max_batch)
+
+    def enqueue(self, kind, payload, max_attempts=None):
+        """Store a new job and return its ID"""
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO job (id, kind, payload, status, max_attempts, run_after, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (job_id, kind, json.dumps(payload), QUEUED, max_attempts or self.max_attempts, now, now, now)
+            )
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id):
+        """Return a job as a dict, or None if it does not exist"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM job WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def counts(self):
+        """Number of jobs per status"""
+        with self._connect() as conn:
+            rows = conn.execute('SELECT status, COUNT(*) AS n FROM job GROUP BY status').fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+    def _claim(self):
+        """
+        Atomically move the next due job to running and return it in a list,
+        together with more due jobs of the same kind if it has a batch
+        handler. Returns an empty list when nothing is due.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                'SELECT * FROM job WHERE status = ? AND run_after <= ? ORDER BY run_after LIMIT 1',
+                (QUEUED, now)
+            ).fetchone()
+            if row is None:
+                return []
+            rows = [row]
+            batch = self._batch_handlers.get(row['kind'])
+            if batch and batch[1] > 1:
+                rows += conn.execute(
+                    'SELECT * FROM job WHERE status = ? AND run_after <= ? AND kind = ? AND id != ? '
+                    'ORDER BY run_after LIMIT ?',
+                    (QUEUED, now, row['kind'], row['id'], batch[1] - 1)
+                ).fetchall()
+            placeholders = ', '.join('?' * len(rows))
+            conn.execute(
+                f'UPDATE job SET status = ?, attempts = attempts + 1, owner = ?, heartbeat_at = ?, updated_at = ? '
+                f'WHERE id IN ({placeholders})',
+                (RUNNING, self.owner, now, now, *(row['id'] for row in rows))
+            )
+        jobs = []
+        for row in rows:
+            job = dict(row)
+            job['attempts'] += 1
+            job['payload'] = json.loads(job['payload'])
+            jobs.append(job)
+        return jobs
+
+    def _finish(self, job, result):
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE job SET status = ?, result = ?, error = NULL, updated_at = ? WHERE id = ?',
+                (SUCCEEDED, json.dumps(result), time.time(), job['id'])
+            )
+
+    def _fail(self, job, error):
+        now = time.time()
+        if job['attempts'] >= job['max_attempts']:
+            status, run_after = FAILED, now
+        else:
+            delay = min(self.backoff_base ** job['attempts'], self.backoff_max)
+            status, run_after = QUEUED, now + delay
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE job SET status = ?, error = ?, run_after = ?, updated_at = ? WHERE id = ?',
+                (status, error, run_after, now, job['id'])
+            )
+
+    def run_job(self, job):
+        """Run a claimed job through its handler and record the outcome"""
+        handler = self._handlers.get(job['kind'])
+        if handler is None:
+            self._fail(job, f"No handler registered for job kind '{job['kind']}'")
+            return
+        try:
+            result = handler(job['payload'])
+        except Exception as e:
+            print(f"Job {job['id']} ({job['kind']}) attempt {job['attempts']} failed: {str(e)}")
+            self._fail(job, str(e))
+        else:
+            self._finish(job, result)
+
+    def run_jobs(self, jobs):
+        """Run claimed jobs of one kind, as one batch if the kind has a batch handler"""
+        batch = self._batch_handlers.get(jobs[0]['kind'])
+        if batch is None:
+            for job in jobs:
+                self.run_job(job)
+            return
+        try:
+            results = batch[0]([job['payload'] for job in jobs])
+        except Exception as e:
+            results = [e] * len(jobs)
+        for job, result in zip(jobs, results):
+            if isinstance(result, Exception):
+                print(f"Job {job['id']} ({job['kind']}) attempt {job['attempts']} failed: {str(result)}")
+                self._fail(job, str(result))
+            else:
+                self._finish(job, result)
+
+    def _worker(self):
+        while not self._stopping.is_set():
+            try:
+                jobs = self._claim()
+            except sqlite3.OperationalError as e:
+                print(f"Job queue claim error: {str(e)}")
+                jobs = []
+            if not jobs:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            ids = {job['id'] for job in jobs}
+            with self._active_lock:
+                self._active.update(ids)
+            try:
+                self.run_jobs(jobs)
+            finally:
+                with self._active_lock:
+                    self._active.difference_update(ids)
+
+    def heartbeat(self):
+        """Refresh the heartbeat of the jobs this process is running"""
+        with self._active_lock:
+            active = list(self._active)
+        if not active:
+            return 0
+        placeholders = ', '.join('?' * len(active))
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f'UPDATE job SET heartbeat_at = ? WHERE status = ? AND owner = ? AND id IN ({placeholders})',
+                (time.time(), RUNNING, self.owner, *active)
+            )
+        return cursor.rowcount
+
+    def recover(self, stale_after=None):
+        """
+        Requeue jobs left running by a process that died mid-job, i.e. whose
+        heartbeat is older than stale_after seconds (heartbeat_timeout by
+        default). Jobs that have used all their attempts are failed instead.
+        Returns the number of recovered jobs.
+        """
+        now = time.time()
+        cutoff = now - (self.heartbeat_timeout if stale_after is None else stale_after)
+        stale = 'status = ? AND COALESCE(heartbeat_at, updated_at) < ?'
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            failed = conn.execute(
+                f'UPDATE job SET status = ?, error = ?, owner = NULL, updated_at = ? '
+                f'WHERE {stale} AND attempts >= max_attempts',
+                (FAILED, 'Worker stopped while the job was running', now, RUNNING, cutoff)
+            ).rowcount
+            requeued = conn.execute(
+                f'UPDATE job SET status = ?, owner = NULL, run_after = ?, updated_at = ? WHERE {stale}',
+                (QUEUED, now, now, RUNNING, cutoff)
+            ).rowcount
+        return failed + requeued
+
+    def prune(self, older_than_days=None):
+        """Delete succeeded and failed jobs last updated more than the retention period ago"""
+        days = self.retention_days if older_than_days is None else older_than_days
+        cutoff = time.time() - days * 86400
+        with self._connect() as conn:
+            cursor = conn.execute(
+                'DELETE FROM job WHERE status IN (?, ?) AND updated_at < ?',
+                (SUCCEEDED, FAILED, cutoff)
+            )
+        return cursor.rowcount
+
+    def _maintain(self):
+        """Heartbeat of running jobs, recovery of dead workers' jobs, hourly pruning"""
+        last_pruned = 0.0
+        while True:
+            try:
+                self.heartbeat()
+                if self._stopping.is_set():
+                    # Draining: keep the heartbeat of unfinished jobs alive
+                    # until their threads end, but leave other work alone
+                    with self._active_lock:
+                        if not self._active:
+                            return
+                else:
+                    self.recover()
+                    if time.monotonic() - last_pruned >= 3600:
+                        self.prune()
+                        last_pruned = time.monotonic()
+            except sqlite3.OperationalError as e:
+                print(f"Job queue maintenance error: {str(e)}")
+            time.sleep(self.heartbeat_interval)
+
+    def start(self):
+        """Start the worker threads; safe to call more than once"""
+        with self._start_lock:
+            if self._threads:
+                return
+            self._stopping.clear()
+            self.recover()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f'job-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            if self._threads and not (self._heartbeat_thread and self._heartbeat_thread.is_alive()):
+                self._heartbeat_thread = threading.Thread(target=self._maintain, name='job-heartbeat', daemon=True)
+                self._heartbeat_thread.start()
+
+    def stop(self, timeout=None):
+        """Stop the workers after their current job finishes"""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def drain(self, timeout=30):
+        """
+        Stop claiming jobs and wait up to timeout seconds for the running
+        ones to finish. Jobs still unfinished after that stay running under
+        this process and keep their heartbeat while their threads live; if
+        the process exits first, recover() in another process requeues them
+        once the heartbeat expires. Returns the number of unfinished jobs.
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+
+        with self._active_lock:
+            return len(self._active)
+
+
+class _Transaction:
+    """Context manager running statements on an autocommit connection"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.conn.in_transaction:
+            self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
@@ -0,0 +1,315 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Counters and histograms are kept per label set behind a lock and rendered
+in the Prometheus text format (version 0.0.4) on scrape. Alongside the
+registry this module provides the pieces the request middleware in app.py
+builds on: SQL query timing through SQLAlchemy engine events, a per-thread
+record of the current request's query count and DB time, a timing
+decorator for hot paths (photo storage, face checks) and sampled cProfile
+dumps of slow requests.
+
+Under several server processes (gunicorn workers) each process only sees
+its own counts, so a scrape would report whichever worker answered. With
+share() every process writes a snapshot of its counters and histograms to
+a file in a shared directory every few seconds and on exit, and render()
+sums the snapshots of all processes, including exited ones so counters
+never go backwards. Gauges are read by the answering process.
+"""
+import os
+import json
+import time
+import uuid
+import random
+import bisect
+import cProfile
+import functools
+import threading
+
+from sqlalchemy import event
+
+# Latency buckets in seconds, from fast cached reads to face matching
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def render(self, snapshots=None):
+        values = {}
+        for snapshot in snapshots if snapshots is not None else [self.snapshot()]:
+            for key, value in snapshot:
+                values[tuple(key)] = values.get(tuple(key), 0) + value
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        for key, value in sorted(values.items()):
+            lines.append(f'{self.name}{_format_labels(self.labels, key)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][position] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, **labels):
+        """Context manager observing the duration of its block"""
+        return _Timer(self, labels)
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(key), list(counts), total, count] for key, (counts, total, count) in self._values.items()]
+
+    def render(self, snapshots=None):
+        values = {}
+        for snapshot in snapshots if snapshots is not None else [self.snapshot()]:
+            for key, counts, total, count in snapshot:
+                state = values.setdefault(tuple(key), [[0] * (len(self.buckets) + 1), 0.0, 0])
+                state[0] = [a + b for a, b in zip(state[0], counts)]
+                state[1] += total
+                state[2] += count
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for key, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels, key, ('le', _format_value(bound)))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labels, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class Gauge:
+    """Gauge read from a callback at scrape time; the callback returns {label_value: value}"""
+
+    def __init__(self, name, documentation, callback, label=None):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.label = label
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} gauge']
+        try:
+            values = self.callback()
+        except Exception as e:
+            print(f"Metrics gauge {self.name} failed: {str(e)}")
+            return lines
+        if self.label is None:
+            lines.append(f'{self.name} {_format_value(values)}')
+        else:
+            for label_value, value in sorted(values.items()):
+                lines.append(f'{self.name}{_format_labels((self.label,), (label_value,))} {_format_value(value)}')
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._shared_dir = None
+        self._snapshot_path = None
+        self._flush_lock = threading.Lock()
+
+    def counter(self, name, documentation, labels=()):
+        return self._register(Counter(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def gauge(self, name, documentation, callback, label=None):
+        return self._register(Gauge(name, documentation, callback, label))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def share(self, directory, interval=5.0):
+        """
+        Aggregate counters and histograms across processes through snapshot
+        files in directory (see the module docstring). Call once per process,
+        after forking.
+        """
+        if self._shared_dir is not None:
+            return
+        os.makedirs(directory, exist_ok=True)
+        self._shared_dir = directory
+        # Unique per process, so a reused pid never overwrites an exited worker's counts
+        self._snapshot_path = os.path.join(directory, f'{os.getpid()}-{uuid.uuid4().hex}.json')
+
+        def flush_periodically():
+            while True:
+                time.sleep(interval)
+                self.flush()
+
+        threading.Thread(target=flush_periodically, name='metrics-flush', daemon=True).start()
+
+    def flush(self):
+        """Write this process's snapshot file; a no-op unless share() was called"""
+        if self._shared_dir is None:
+            return
+        snapshot = {metric.name: metric.snapshot() for metric in self._metrics if hasattr(metric, 'snapshot')}
+        with self._flush_lock:
+            temporary = f'{self._snapshot_path}.tmp'
+            with open(temporary, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(temporary, self._snapshot_path)
+
+    def _shared_snapshots(self):
+        """{metric name: [snapshot per process]} from every snapshot file"""
+        self.flush()
+        snapshots = {}
+        for name in os.listdir(self._shared_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self._shared_dir, name)) as f:
+                    process_snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for metric_name, snapshot in process_snapshot.items():
+                snapshots.setdefault(metric_name, []).append(snapshot)
+        return snapshots
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        shared = self._shared_snapshots() if self._shared_dir is not None else None
+        lines = []
+        for metric in self._metrics:
+            if shared is not None and hasattr(metric, 'snapshot'):
+                lines.extend(metric.render(shared.get(metric.name, [])))
+            else:
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def timed(histogram, **labels):
+    """Decorator observing the duration of every call of a function"""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Query count and DB time of the request handled by the current thread
+request_state = threading.local()
+
+
+def start_request_state():
+    request_state.queries = 0
+    request_state.db_seconds = 0.0
+
+
+def instrument_engine(engine, query_histogram):
+    """Time every SQL statement of an engine and add it to the current request"""
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before_execute(connection, cursor, statement, parameters, context, executemany):
+        connection.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after_execute(connection, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - connection.info['query_started'].pop()
+        query_histogram.observe(duration, operation=statement.split(None, 1)[0].upper())
+        if getattr(request_state, 'queries', None) is not None:
+            request_state.queries += 1
+            request_state.db_seconds += duration
+
+    return engine
+
+
+class RequestProfiler:
+    """
+    Profiles a random sample_rate fraction of requests and writes the
+    profile of those slower than slow_seconds to directory as .prof files
+    (open with python -m pstats or snakeviz).
+    """
+
+    def __init__(self, directory, sample_rate=0.0, slow_seconds=1.0):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_seconds
+
+    def start(self):
+        """Return a running profiler if this request is sampled, else None"""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active on this thread
+            return None
+        return profiler
+
+    def finish(self, profiler, duration, endpoint):
+        profiler.disable()
+        if duration < self.slow_seconds:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'{int(time.time() * 1000)}-{endpoint}-{int(duration * 1000)}ms.prof')
+        profiler.dump_stats(path)
+        return path
@@ -0,0 +1,63 @@
+"""denormalize user verification dates
+
+Copies each user's latest successful verification dates onto the user row
+and indexes them with the role, so the admin pensioner listing can filter
+and sort without joining the verification history.
+
+Revision ID: 0e0e84a2351c
+Revises: 5d89707857b2
+Create Date: 2026-10-16 21:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0e0e84a2351c'
+down_revision = '5d89707857b2'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_user_role_last_name', ['role', 'last_name']),
+    ('ix_user_role_created_at', ['role', 'created_at']),
+    ('ix_user_role_next_verification_date', ['role', 'next_verification_date']),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    columns = {column['name'] for column in inspector.get_columns('user')}
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        if 'last_verified_at' not in columns:
+            batch_op.add_column(sa.Column('last_verified_at', sa.DateTime(), nullable=True))
+        if 'next_verification_date' not in columns:
+            batch_op.add_column(sa.Column('next_verification_date', sa.DateTime(), nullable=True))
+
+    # Backfill from the latest successful verification of each user
+    op.execute('''
+        UPDATE user SET
+            next_verification_date = (
+                SELECT MAX(v.next_verification_date) FROM verification v
+                WHERE v.user_id = user.id AND v.status IN ('verified', 'approved')
+            ),
+            last_verified_at = (
+                SELECT MAX(v.last_verified_at) FROM verification v
+                WHERE v.user_id = user.id AND v.status IN ('verified', 'approved')
+            )
+    ''')
+
+    existing = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('user')}
+    for name, index_columns in INDEXES:
+        if name not in existing:
+            op.create_index(name, 'user', index_columns)
+
+
+def downgrade():
+    for name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name='user')
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('next_verification_date')
+        batch_op.drop_column('last_verified_at')
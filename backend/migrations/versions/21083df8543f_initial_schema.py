@@ -0,0 +1,114 @@
+"""initial schema
+
+Creates the application tables on an empty database. Tables that already
+exist (databases created by db.create_all() or the old rebuild scripts) are
+left alone so existing installations can be upgraded in place.
+
+Revision ID: 21083df8543f
+Revises: 
+Create Date: 2026-10-16 21:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '21083df8543f'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'user' not in existing:
+        op.create_table(
+            'user',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('password_hash', sa.String(length=256), nullable=True),
+            sa.Column('first_name', sa.String(length=100), nullable=False),
+            sa.Column('last_name', sa.String(length=100), nullable=False),
+            sa.Column('phone', sa.String(length=20), nullable=True),
+            sa.Column('date_of_birth', sa.Date(), nullable=True),
+            sa.Column('address', sa.String(length=200), nullable=True),
+            sa.Column('city', sa.String(length=100), nullable=True),
+            sa.Column('postal_code', sa.String(length=20), nullable=True),
+            sa.Column('country', sa.String(length=100), nullable=True),
+            sa.Column('wallet_address', sa.String(length=42), nullable=True),
+            sa.Column('role', sa.String(length=20), nullable=False),
+            sa.Column('pensioner_id', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('email'),
+            sa.UniqueConstraint('wallet_address')
+        )
+
+    if 'verification' not in existing:
+        op.create_table(
+            'verification',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('pensioner_id', sa.Integer(), nullable=False),
+            sa.Column('wallet_address', sa.String(length=42), nullable=False),
+            sa.Column('id_photo_path', sa.String(length=255), nullable=True),
+            sa.Column('face_photo_path', sa.String(length=255), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('last_verified_at', sa.DateTime(), nullable=True),
+            sa.Column('next_verification_date', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'photo_blob' not in existing:
+        op.create_table(
+            'photo_blob',
+            sa.Column('hash', sa.String(length=64), nullable=False),
+            sa.Column('path', sa.String(length=255), nullable=False),
+            sa.Column('ref_count', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('hash'),
+            sa.UniqueConstraint('path')
+        )
+
+    if 'sync_receipt' not in existing:
+        op.create_table(
+            'sync_receipt',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('client_key', sa.String(length=64), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('verification_id', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+            sa.ForeignKeyConstraint(['verification_id'], ['verification.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('user_id', 'client_key')
+        )
+
+    if 'face_embedding' not in existing:
+        op.create_table(
+            'face_embedding',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('verification_id', sa.Integer(), nullable=False),
+            sa.Column('pensioner_id', sa.Integer(), nullable=True),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('encoding', sa.LargeBinary(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+            sa.ForeignKeyConstraint(['verification_id'], ['verification.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('verification_id')
+        )
+        op.create_index('ix_face_embedding_pensioner_id', 'face_embedding', ['pensioner_id'])
+        op.create_index('ix_face_embedding_user_id', 'face_embedding', ['user_id'])
+
+
+def downgrade():
+    op.drop_table('face_embedding')
+    op.drop_table('sync_receipt')
+    op.drop_table('photo_blob')
+    op.drop_table('verification')
+    op.drop_table('user')
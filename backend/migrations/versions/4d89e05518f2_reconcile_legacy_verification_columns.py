@@ -0,0 +1,48 @@
+"""reconcile legacy verification columns
+
+Databases built by the old rebuild_db.py/reset_db.py scripts have a single
+verification_image column and lack the photo path and verification date
+columns of the Verification model. Move them to the model's layout, keeping
+the stored image as the face photo.
+
+Revision ID: 4d89e05518f2
+Revises: 21083df8543f
+Create Date: 2026-10-16 21:12:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d89e05518f2'
+down_revision = '21083df8543f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('verification')}
+
+    with op.batch_alter_table('verification', schema=None) as batch_op:
+        if 'id_photo_path' not in columns:
+            batch_op.add_column(sa.Column('id_photo_path', sa.String(length=255), nullable=True))
+        if 'face_photo_path' not in columns:
+            batch_op.add_column(sa.Column('face_photo_path', sa.String(length=255), nullable=True))
+        if 'last_verified_at' not in columns:
+            batch_op.add_column(sa.Column('last_verified_at', sa.DateTime(), nullable=True))
+        if 'next_verification_date' not in columns:
+            batch_op.add_column(sa.Column('next_verification_date', sa.DateTime(), nullable=True))
+
+    if 'verification_image' in columns:
+        op.execute(
+            'UPDATE verification SET face_photo_path = verification_image '
+            'WHERE face_photo_path IS NULL'
+        )
+        with op.batch_alter_table('verification', schema=None) as batch_op:
+            batch_op.drop_column('verification_image')
+
+
+def downgrade():
+    # The legacy layout is not restored; the added columns are kept
+    pass
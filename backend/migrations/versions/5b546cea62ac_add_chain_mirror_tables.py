@@ -0,0 +1,56 @@
+"""add chain mirror tables
+
+Local mirror of the SmartPension contract's pensioner records and the
+checkpoint of the last indexed block, written by the chain indexer.
+
+Revision ID: 5b546cea62ac
+Revises: 6e583ae66417
+Create Date: 2026-10-16 22:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b546cea62ac'
+down_revision = '6e583ae66417'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    tables = sa.inspect(op.get_bind()).get_table_names()
+
+    if 'chain_pensioner' not in tables:
+        op.create_table('chain_pensioner',
+            sa.Column('pensioner_id', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('wallet_address', sa.String(length=42), nullable=True),
+            sa.Column('name', sa.String(length=200), nullable=True),
+            sa.Column('pension_amount', sa.String(length=78), nullable=True),
+            sa.Column('last_verification_at', sa.DateTime(), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('is_deceased', sa.Boolean(), nullable=True),
+            sa.Column('deceased_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_block', sa.Integer(), nullable=True),
+            sa.PrimaryKeyConstraint('pensioner_id')
+        )
+        op.create_index('ix_chain_pensioner_wallet_address', 'chain_pensioner', ['wallet_address'])
+        op.create_index('ix_chain_pensioner_status', 'chain_pensioner', ['is_deceased', 'is_active'])
+
+    if 'chain_checkpoint' not in tables:
+        op.create_table('chain_checkpoint',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('contract_address', sa.String(length=42), nullable=False),
+            sa.Column('block_number', sa.Integer(), nullable=False),
+            sa.Column('block_hash', sa.String(length=66), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    op.drop_table('chain_checkpoint')
+    op.drop_index('ix_chain_pensioner_status', table_name='chain_pensioner')
+    op.drop_index('ix_chain_pensioner_wallet_address', table_name='chain_pensioner')
+    op.drop_table('chain_pensioner')
@@ -0,0 +1,44 @@
+"""add verification and user indexes
+
+Indexes for the hot access paths: a user's verification history, lookups
+by pensioner, and due-for-reverification sweeps by status and date.
+
+Revision ID: 5d89707857b2
+Revises: 4d89e05518f2
+Create Date: 2026-10-16 21:14:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d89707857b2'
+down_revision = '4d89e05518f2'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_user_role', 'user', ['role']),
+    ('ix_user_pensioner_id', 'user', ['pensioner_id']),
+    ('ix_verification_user_id_id', 'verification', ['user_id', 'id']),
+    ('ix_verification_pensioner_id_created_at', 'verification', ['pensioner_id', 'created_at']),
+    ('ix_verification_status_next_verification_date', 'verification', ['status', 'next_verification_date']),
+    ('ix_verification_next_verification_date', 'verification', ['next_verification_date']),
+]
+
+
+def _existing_indexes(table):
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,73 @@
+"""add pensioner status and dashboard counters
+
+Adds pension amount and active/deceased status to users, and a single-row
+pension_stats table holding the dashboard counters. The counters are kept
+up to date by User mapper events and backfilled here from the user table.
+
+Revision ID: 6e583ae66417
+Revises: 0e0e84a2351c
+Create Date: 2026-10-16 22:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6e583ae66417'
+down_revision = '0e0e84a2351c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    columns = {column['name'] for column in inspector.get_columns('user')}
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        if 'pension_amount' not in columns:
+            batch_op.add_column(sa.Column('pension_amount', sa.Float(), nullable=True))
+        if 'is_active' not in columns:
+            batch_op.add_column(sa.Column('is_active', sa.Boolean(), nullable=False, server_default=sa.true()))
+        if 'is_deceased' not in columns:
+            batch_op.add_column(sa.Column('is_deceased', sa.Boolean(), nullable=False, server_default=sa.false()))
+        if 'deceased_at' not in columns:
+            batch_op.add_column(sa.Column('deceased_at', sa.DateTime(), nullable=True))
+
+    if 'pension_stats' not in inspector.get_table_names():
+        op.create_table('pension_stats',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('total_pensioners', sa.Integer(), nullable=False),
+            sa.Column('active_pensioners', sa.Integer(), nullable=False),
+            sa.Column('inactive_pensioners', sa.Integer(), nullable=False),
+            sa.Column('deceased_pensioners', sa.Integer(), nullable=False),
+            sa.Column('active_monthly_amount', sa.Float(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    # Backfill the counters row from the current users
+    op.execute('''
+        INSERT OR REPLACE INTO pension_stats (
+            id, total_pensioners, active_pensioners, inactive_pensioners,
+            deceased_pensioners, active_monthly_amount, updated_at
+        )
+        SELECT
+            1,
+            COUNT(*),
+            COALESCE(SUM(CASE WHEN is_deceased = 0 AND is_active = 1 THEN 1 ELSE 0 END), 0),
+            COALESCE(SUM(CASE WHEN is_deceased = 0 AND is_active = 0 THEN 1 ELSE 0 END), 0),
+            COALESCE(SUM(CASE WHEN is_deceased = 1 THEN 1 ELSE 0 END), 0),
+            COALESCE(SUM(CASE WHEN is_deceased = 0 AND is_active = 1 THEN pension_amount ELSE 0 END), 0),
+            CURRENT_TIMESTAMP
+        FROM user WHERE role = 'pensioner'
+    ''')
+
+
+def downgrade():
+    op.drop_table('pension_stats')
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('deceased_at')
+        batch_op.drop_column('is_deceased')
+        batch_op.drop_column('is_active')
+        batch_op.drop_column('pension_amount')
@@ -0,0 +1,69 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Pages are ordered by a sort column plus the primary key as tie-breaker, and
+the cursor carries the (sort value, id) of the last row of the previous page.
+Each page is then an index range scan starting right after that row, so
+fetching page 1000 costs the same as fetching page 1, unlike OFFSET.
+"""
+import json
+import base64
+import datetime
+
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(value, row_id):
+    """Encode the sort value and id of a row as an opaque URL-safe cursor"""
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        value = {'dt': value.isoformat()}
+    payload = json.dumps([value, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if isinstance(value, dict) and 'dt' in value:
+            value = datetime.datetime.fromisoformat(value['dt'])
+        return value, int(row_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def keyset_order(column, id_column, descending=False):
+    """ORDER BY clauses matching keyset_filter"""
+    if descending:
+        return [column.desc(), id_column.desc()]
+    return [column.asc(), id_column.asc()]
+
+
+def keyset_filter(column, id_column, last_value, last_id, descending=False):
+    """
+    WHERE clause selecting rows after (last_value, last_id) in the order of
+    keyset_order. SQLite sorts NULLs first ascending and last descending,
+    which is honoured for nullable sort columns.
+    """
+    if column is id_column:
+        return id_column < last_id if descending else id_column > last_id
+
+    if descending:
+        if last_value is None:
+            return and_(column.is_(None), id_column < last_id)
+        return or_(
+            column < last_value,
+            and_(column == last_value, id_column < last_id),
+            column.is_(None)
+        )
+
+    if last_value is None:
+        return or_(
+            and_(column.is_(None), id_column > last_id),
+            column.isnot(None)
+        )
+    return or_(
+        column > last_value,
+        and_(column == last_value, id_column > last_id)
+    )
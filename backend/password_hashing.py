@@ -0,0 +1,75 @@
+"""
+Bounded executor for password hashing.
+
+Password hashes are deliberately CPU-expensive, so a burst of logins
+hashing on request threads can starve every other endpoint. All hashing
+goes through a fixed pool of worker threads instead (hashlib's pbkdf2 and
+scrypt release the GIL, so the pool really runs in parallel). Callers wait
+for a free slot for at most queue_timeout seconds; when more hashes are
+in flight or queued than the pool accepts, PasswordHasherBusy is raised
+so the request can be answered with 429 instead of piling up.
+
+Background work such as bulk imports hashes on the same pool through
+hash_background(), which waits for one of background_workers slots of its
+own, so an import never holds more than that many pool threads and
+logins keep the rest.
+
+Hashes created with older cost parameters are recognised by needs_rehash()
+so they can be upgraded at the next successful login.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool is saturated"""
+
+
+class PasswordHasher:
+    """
+    Runs generate/check_password_hash on max_workers threads, with at most
+    max_queued further requests waiting for a worker.
+    """
+
+    def __init__(self, method='pbkdf2:sha256:600000', max_workers=4, max_queued=16, queue_timeout=0.5,
+                 background_workers=1):
+        self.method = method
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(max_workers + max_queued)
+        self._background_slots = threading.BoundedSemaphore(max(1, min(background_workers, max_workers - 1)))
+        self._method_prefix = None
+
+    def generate(self, password):
+        """Hash on the calling thread"""
+        return generate_password_hash(password, method=self.method)
+
+    def hash_background(self, password):
+        """Hash for a background job; waits for a background slot instead of raising"""
+        with self._background_slots:
+            return self._executor.submit(self.generate, password).result()
+
+    def _run(self, function, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise PasswordHasherBusy('Password hashing capacity exhausted')
+        try:
+            return self._executor.submit(function, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        """Hash a new password with the configured method"""
+        return self._run(self.generate, password)
+
+    def verify(self, password_hash, password):
+        """Check a password against a stored hash"""
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if the stored hash was made with different cost parameters"""
+        if self._method_prefix is None:
+            # Werkzeug expands short method names ('pbkdf2') with its defaults
+            self._method_prefix = self.generate('').split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != self._method_prefix
@@ -0,0 +1,154 @@
+"""
+Cheap-first pre-screening of verification photos.
+
+Most failed verifications are unusable photos, and each used to cost a
+full decode and dlib face encoding before being rejected. PhotoScreener
+runs an upload through stages ordered by cost and stops at the first one
+that fails:
+
+1. size      - byte length of the upload, without reading it
+2. header    - format and dimensions from the image header, no decode
+3. quality   - sharpness (variance of the Laplacian) and exposure, on a
+               grayscale copy decoded at reduced size (JPEG DCT scaling)
+4. face      - HOG face detection on the same downsampled copy; the live
+               photo must show exactly one face, an ID photo at least one
+
+The first three stages take milliseconds. The face gate only runs when
+face_recognition is installed. NumPy and face_recognition are imported on
+first use, like in face_matching.
+"""
+import os
+
+from face_matching import face_library_available
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; screening then only checks the size
+    Image = None
+
+# Formats accepted for verification photos (see ALLOWED_EXTENSIONS in app.py)
+ACCEPTED_FORMATS = {'JPEG', 'PNG'}
+
+FACE_PHOTO = 'face'
+ID_PHOTO = 'id'
+
+
+def _accepted():
+    return {'accepted': True, 'stage': None, 'message': None}
+
+
+def _rejected(stage, message):
+    return {'accepted': False, 'stage': stage, 'message': message}
+
+
+def _stream_length(stream):
+    position = stream.tell()
+    stream.seek(0, os.SEEK_END)
+    length = stream.tell()
+    stream.seek(position)
+    return length
+
+
+def sharpness(gray):
+    """Variance of the 4-neighbour Laplacian of a 2-D grayscale array"""
+    import numpy as np
+
+    gray = np.asarray(gray, dtype=np.float32)
+    laplacian = (gray[1:-1, :-2] + gray[1:-1, 2:] + gray[:-2, 1:-1] + gray[2:, 1:-1]
+                 - 4 * gray[1:-1, 1:-1])
+    return float(laplacian.var())
+
+
+class PhotoScreener:
+    """
+    Rejects unusable photos before they are stored and face matched.
+    screen() returns a dict with 'accepted', and for rejections the 'stage'
+    that failed and a 'message' for the client.
+    """
+
+    def __init__(self, min_bytes=2048, max_bytes=20 * 1024 * 1024, min_dimension=240,
+                 max_pixels=40_000_000, screen_dimension=480, min_sharpness=25.0,
+                 min_brightness=40, max_brightness=220, max_clipped=0.5, face_gate=True):
+        self.min_bytes = min_bytes
+        self.max_bytes = max_bytes
+        self.min_dimension = min_dimension
+        self.max_pixels = max_pixels
+        self.screen_dimension = screen_dimension
+        self.min_sharpness = min_sharpness
+        self.min_brightness = min_brightness
+        self.max_brightness = max_brightness
+        self.max_clipped = max_clipped
+        self.face_gate = face_gate
+
+    def screen(self, stream, kind=FACE_PHOTO):
+        """
+        Screen a seekable binary stream; it is rewound afterwards so the
+        caller can store it.
+        """
+        try:
+            return self._screen(stream, kind)
+        finally:
+            stream.seek(0)
+
+    def _screen(self, stream, kind):
+        length = _stream_length(stream)
+        if length < self.min_bytes:
+            return _rejected('size', 'Photo file is too small')
+        if length > self.max_bytes:
+            return _rejected('size', 'Photo file is too large')
+        if Image is None:
+            return _accepted()
+
+        try:
+            with Image.open(stream) as image:
+                # Only the header has been read at this point
+                width, height = image.size
+                if image.format not in ACCEPTED_FORMATS:
+                    return _rejected('header', 'Photo must be a JPEG or PNG image')
+                if min(width, height) < self.min_dimension:
+                    return _rejected('header', 'Photo resolution is too low')
+                if width * height > self.max_pixels:
+                    return _rejected('header', 'Photo resolution is too high')
+                preview = self._preview(image)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            return _rejected('header', 'Photo is not a readable image')
+
+        rejection = self._check_quality(preview)
+        if rejection is None and self.face_gate and face_library_available():
+            rejection = self._check_faces(preview, kind)
+        return rejection or _accepted()
+
+    def _preview(self, image):
+        """Small RGB copy, decoded at reduced scale where the format allows it"""
+        size = (self.screen_dimension, self.screen_dimension)
+        image.draft('RGB', size)
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(size)
+        return image.convert('RGB')
+
+    def _check_quality(self, preview):
+        import numpy as np
+
+        gray = np.asarray(preview.convert('L'))
+        brightness = float(gray.mean())
+        clipped = float(np.count_nonzero((gray <= 5) | (gray >= 250))) / gray.size
+        if brightness < self.min_brightness:
+            return _rejected('quality', 'Photo is too dark')
+        if brightness > self.max_brightness:
+            return _rejected('quality', 'Photo is overexposed')
+        if clipped > self.max_clipped:
+            return _rejected('quality', 'Photo exposure is clipped')
+        if sharpness(gray) < self.min_sharpness:
+            return _rejected('quality', 'Photo is too blurry')
+        return None
+
+    def _check_faces(self, preview, kind):
+        import face_recognition
+        import numpy as np
+
+        faces = len(face_recognition.face_locations(np.asarray(preview)))
+        if faces == 0:
+            return _rejected('face', 'No face found in the photo')
+        if kind == FACE_PHOTO and faces > 1:
+            return _rejected('face', 'Photo must show exactly one face')
+        return None
@@ -0,0 +1,167 @@
+"""
+Content-addressed photo store for verification uploads.
+
+Uploads are streamed to a temporary file, normalized (EXIF orientation
+applied and downscaled to a bounded resolution) and then stored under the
+SHA-256 of the stored bytes, so identical photos - typically retried
+uploads - occupy disk space only once. The database keeps a reference
+count per blob (see PhotoBlob in app.py) and unreferenced blobs are removed
+by collect_garbage().
+"""
+import os
+import time
+import uuid
+import shutil
+import hashlib
+
+from chunked_upload import copy_stream
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; photos are then stored as uploaded
+    Image = None
+
+# Sub-directory of the upload folder that holds content-addressed blobs
+BLOB_DIR = 'blobs'
+
+# Formats stored as-is when they are already within the size bound
+PASSTHROUGH_FORMATS = {'JPEG': 'jpg', 'PNG': 'png'}
+
+
+def file_sha256(path, block_size=64 * 1024):
+    """Hash a file without reading it into memory at once"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_from_path(path):
+    """Return the content hash encoded in a blob path, or None for legacy files"""
+    parts = path.replace('\\', '/').split('/')
+    if len(parts) != 3 or parts[0] != BLOB_DIR:
+        return None
+    return os.path.splitext(parts[2])[0]
+
+
+class PhotoStore:
+    """
+    Stores photos in <root>/blobs/<first two hash chars>/<hash>.<ext> and
+    returns paths relative to root, ready to be saved on a Verification.
+    """
+
+    def __init__(self, root, max_dimension=1600, jpeg_quality=90):
+        self.root = root
+        self.max_dimension = max_dimension
+        self.jpeg_quality = jpeg_quality
+        self.tmp_dir = os.path.join(root, '.tmp')
+        os.makedirs(os.path.join(root, BLOB_DIR), exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def _tmp_path(self):
+        return os.path.join(self.tmp_dir, str(uuid.uuid4()))
+
+    def ingest_stream(self, stream):
+        """Store the contents of a readable binary stream"""
+        tmp_path = self._tmp_path()
+        with open(tmp_path, 'wb') as f:
+            copy_stream(stream, f)
+        return self._store(tmp_path)
+
+    def ingest_bytes(self, data):
+        """Store a photo that is already in memory"""
+        tmp_path = self._tmp_path()
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        return self._store(tmp_path)
+
+    def ingest_path(self, path):
+        """Store a photo file, taking ownership of (moving) it"""
+        tmp_path = self._tmp_path()
+        shutil.move(path, tmp_path)
+        return self._store(tmp_path)
+
+    def _normalize(self, path):
+        """
+        Downscale and re-encode the photo at path if needed. Returns the path
+        of the file to store and its extension.
+        """
+        if Image is None:
+            return path, 'jpg'
+
+        try:
+            with Image.open(path) as image:
+                # Only the header has been read at this point
+                image_format = image.format
+                width, height = image.size
+                orientation = image.getexif().get(0x0112, 1)
+
+                needs_resize = max(width, height) > self.max_dimension
+                if image_format in PASSTHROUGH_FORMATS and not needs_resize and orientation == 1:
+                    return path, PASSTHROUGH_FORMATS[image_format]
+
+                image = ImageOps.exif_transpose(image)
+                image.thumbnail((self.max_dimension, self.max_dimension))
+                if image.mode not in ('RGB', 'L'):
+                    image = image.convert('RGB')
+
+                normalized_path = self._tmp_path()
+                image.save(normalized_path, 'JPEG', quality=self.jpeg_quality, optimize=True)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            # Not a readable image; keep the bytes so the face check can reject it
+            print(f"Photo normalization skipped: {e}")
+            return path, 'jpg'
+
+        os.remove(path)
+        return normalized_path, 'jpg'
+
+    def _store(self, tmp_path):
+        stored_path, extension = self._normalize(tmp_path)
+        content_hash = file_sha256(stored_path)
+
+        relative_path = '/'.join([BLOB_DIR, content_hash[:2], f'{content_hash}.{extension}'])
+        final_path = os.path.join(self.root, *relative_path.split('/'))
+        if os.path.exists(final_path):
+            # Identical photo already stored; refresh its age for the GC grace period
+            os.remove(stored_path)
+            os.utime(final_path)
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(stored_path, final_path)
+        return relative_path
+
+    def iter_blobs(self):
+        """Yield (relative_path, absolute_path) for every stored blob"""
+        blob_root = os.path.join(self.root, BLOB_DIR)
+        for prefix in os.listdir(blob_root):
+            prefix_dir = os.path.join(blob_root, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                yield '/'.join([BLOB_DIR, prefix, name]), os.path.join(prefix_dir, name)
+
+    def collect_garbage(self, referenced_paths, grace_seconds=86400):
+        """
+        Delete blobs that are not in referenced_paths and are older than the
+        grace period (so photos of in-flight verification jobs survive), and
+        leftover temporary files. Returns the number of files removed.
+        """
+        referenced_paths = set(referenced_paths)
+        cutoff = time.time() - grace_seconds
+        removed = 0
+
+        for relative_path, absolute_path in self.iter_blobs():
+            if relative_path in referenced_paths:
+                continue
+            if os.path.getmtime(absolute_path) < cutoff:
+                os.remove(absolute_path)
+                removed += 1
+
+        for name in os.listdir(self.tmp_dir):
+            tmp_path = os.path.join(self.tmp_dir, name)
+            if os.path.getmtime(tmp_path) < cutoff:
+                os.remove(tmp_path)
+                removed += 1
+
+        return removed
@@ -0,0 +1,56 @@
+"""
+Per-application services built on first use.
+
+create_app() registers a factory for each service (photo store, job queue,
+face matcher, ...) instead of building them at import time, so importing
+the backend and creating an app stay cheap: a worker that never matches a
+face never starts the process pool or imports numpy. Module-level proxies
+from service() resolve to the instance belonging to the current app.
+"""
+import threading
+
+from flask import current_app
+from werkzeug.local import LocalProxy
+
+EXTENSION_NAME = 'smartpension_services'
+
+
+class ServiceRegistry:
+    """
+    Factories and the instances they created, for one Flask app.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._factories = {}
+        self._instances = {}
+        self._lock = threading.Lock()
+        app.extensions[EXTENSION_NAME] = self
+
+    def register(self, name, factory):
+        """Register factory(app) as the constructor of service name"""
+        self._factories[name] = factory
+
+    def get(self, name):
+        """Return the service, creating it on the first call"""
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = self._factories[name](self.app)
+                    self._instances[name] = instance
+        return instance
+
+    def created(self, name):
+        """Return the service if it has been created, without creating it"""
+        return self._instances.get(name)
+
+
+def get_services(app=None):
+    return (app or current_app).extensions[EXTENSION_NAME]
+
+
+def service(name):
+    """Proxy to service name of the current app"""
+    return LocalProxy(lambda: get_services().get(name))
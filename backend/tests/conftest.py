@@ -0,0 +1,63 @@
+import pytest
+from werkzeug.security import generate_password_hash
+
+import app as backend
+from app import create_app, db, stop_background_workers
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing', overrides={
+        'DATABASE_PATH': str(tmp_path / 'pension.db'),
+        'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+        'JOB_QUEUE_PATH': str(tmp_path / 'jobs.db'),
+        'PROFILE_DIR': str(tmp_path / 'profiles'),
+        'PAYMENT_RUN_DIR': str(tmp_path / 'payment_runs')
+    })
+    with app.app_context():
+        db.create_all()
+    yield app
+    stop_background_workers(app, timeout=5)
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    """Create a user and return its id; the password is 'secret'"""
+    counter = iter(range(1, 1_000_000))
+
+    def make(role='pensioner', **values):
+        number = next(counter)
+        values.setdefault('email', f'{role}{number}@example.org')
+        values.setdefault('first_name', 'Test')
+        values.setdefault('last_name', f'User{number}')
+        with app.app_context():
+            user = backend.User(
+                role=role,
+                password_hash=generate_password_hash('secret', method=app.config['PASSWORD_HASH_METHOD']),
+                **values
+            )
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+
+    return make
+
+
+@pytest.fixture
+def login(client, app):
+    def login_as(user_id):
+        with app.app_context():
+            email = db.session.get(backend.User, user_id).email
+        response = client.post('/api/login', json={'email': email, 'password': 'secret'})
+        assert response.status_code == 200, response.get_json()
+        return response
+
+    return login_as
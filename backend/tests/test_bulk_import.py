@@ -0,0 +1,52 @@
+import csv
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bulk_import import BulkImporter
+from password_hashing import PasswordHasher
+
+
+def records(count):
+    for number in range(1, count + 1):
+        # Every other row lacks an email and is rejected
+        email = f'user{number}@example.org' if number % 2 else ''
+        yield number, {'firstName': 'Test', 'lastName': f'User{number}', 'email': email,
+                       'password': 'secret'}, None
+
+
+def test_rejected_rows_are_streamed_to_the_report(tmp_path):
+    importer = BulkImporter(lambda emails, wallets: (set(), set()), lambda rows: {},
+                            lambda password: 'hash', chunk_size=10)
+    report_path = tmp_path / 'errors.csv'
+    report = importer.run(records(500), report_path=str(report_path))
+
+    assert report.imported == 250 and report.failed == 250
+    assert len(report.errors) == report.max_listed_errors
+    with open(report_path, newline='') as f:
+        rows = list(csv.reader(f))
+    assert len(rows) == 251 and rows[1][0] == '2'
+
+
+def test_background_hashing_keeps_pool_workers_for_logins():
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    class SlowHasher(PasswordHasher):
+        def generate(self, password):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+            return 'hash'
+
+    hasher = SlowHasher(max_workers=4, background_workers=1)
+    with ThreadPoolExecutor(max_workers=8) as import_threads:
+        list(import_threads.map(hasher.hash_background, ['secret'] * 16))
+    assert peak == 1
+    # A login still hashes right away
+    assert hasher.hash('secret') == 'hash'
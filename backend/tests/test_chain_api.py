@@ -0,0 +1,51 @@
+import pytest
+
+import app as backend
+from app import db
+
+
+@pytest.fixture
+def mirror(app):
+    with app.app_context():
+        for pensioner_id in (1, 2, 3):
+            db.session.add(backend.ChainPensioner(pensioner_id=pensioner_id, name=f'Pensioner {pensioner_id}',
+                                                  is_active=True, is_deceased=False))
+        db.session.commit()
+
+
+@pytest.fixture
+def admin(make_user, login):
+    login(make_user('admin'))
+
+
+def test_chain_routes_require_a_session(client, mirror):
+    assert client.get('/api/chain/pensioners').status_code == 403
+    assert client.get('/api/chain/pensioners/1').status_code == 401
+    assert client.get('/api/chain/status').status_code == 401
+
+
+def test_chain_listing_is_admin_only(client, mirror, make_user, login):
+    login(make_user())
+    assert client.get('/api/chain/pensioners').status_code == 403
+    assert client.get('/api/chain/pensioners/1').status_code == 200
+    assert client.get('/api/chain/status').get_json()['totalPensioners'] == 3
+
+
+def test_chain_listing_pages_with_cursor(client, mirror, admin):
+    first = client.get('/api/chain/pensioners?limit=2').get_json()
+    assert [item['pensionerID'] for item in first['items']] == [1, 2]
+    second = client.get(f"/api/chain/pensioners?limit=2&cursor={first['nextCursor']}").get_json()
+    assert [item['pensionerID'] for item in second['items']] == [3]
+    assert second['nextCursor'] is None
+
+
+def test_chain_listing_serialization_error_is_a_500(client, mirror, admin, monkeypatch):
+    def compiled(fields):
+        def serialize(row):
+            raise RuntimeError('broken row')
+        return serialize
+
+    monkeypatch.setattr(backend.chain_pensioner_serializer, 'compiled', compiled)
+    response = client.get('/api/chain/pensioners')
+    assert response.status_code == 500
+    assert response.get_json()['success'] is False
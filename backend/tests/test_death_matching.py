@@ -0,0 +1,30 @@
+import csv
+import datetime
+
+from death_matching import DeathRegistryMatcher, RosterIndex, make_person, spreadsheet_safe
+
+
+def test_spreadsheet_safe_quotes_formula_cells():
+    for value in ('=1+1', '+1', '-1', '@SUM(A1)', '\tx'):
+        assert spreadsheet_safe(value) == "'" + value
+    assert spreadsheet_safe('Smith') == 'Smith'
+    assert spreadsheet_safe(-1) == -1
+
+
+def test_candidate_report_does_not_write_formulas(tmp_path):
+    born = datetime.date(1940, 5, 1)
+    index = RosterIndex()
+    index.add(make_person(7, 'John', 'Smith', born, '1000'),
+              details=('=HYPERLINK("http://x")', 'John', 'Smith', born.isoformat(), '1000'))
+    records = [(2, {'registryId': '@cmd', 'firstName': 'John', 'lastName': 'Smith',
+                    'dateOfBirth': '1940-05-01', 'postalCode': '1000'}, None)]
+    path = tmp_path / 'candidates.csv'
+
+    report = DeathRegistryMatcher(index).run(records, str(path))
+
+    assert report.matched == 1
+    with open(path, newline='', encoding='utf-8') as f:
+        [row] = list(csv.DictReader(f))
+    assert row['registryId'] == "'@cmd"
+    assert row['pensionerID'] == '\'=HYPERLINK("http://x")'
+    assert row['lastName'] == 'Smith'
@@ -0,0 +1,69 @@
+import numpy as np
+
+import app as backend
+from app import db
+
+
+def store_embedding(app, user_id, encoding):
+    with app.app_context():
+        verification = backend.Verification(
+            pensioner_id=1, wallet_address='0xabc', status='verified', user_id=user_id
+        )
+        db.session.add(verification)
+        db.session.flush()
+        backend.store_reference_embedding(verification, encoding)
+        db.session.commit()
+
+
+def test_face_only_verification_uses_reference_stored_by_another_process(app, make_user, monkeypatch):
+    user_id = make_user()
+    with app.app_context():
+        # This process loads its (empty) search index first...
+        backend.get_face_index()
+    # ...then another worker stores the user's reference encoding
+    store_embedding(app, user_id, np.ones(128))
+
+    compared = []
+
+    def match_verification_photos(pairs, references):
+        compared.extend(reference for _, reference in references)
+        return [], [{'match': False, 'distance': 1.0, 'face_encoding': None} for _ in references]
+
+    monkeypatch.setattr(backend, 'match_verification_photos', match_verification_photos)
+    with app.app_context():
+        result = backend.process_verification({
+            'user_id': user_id,
+            'pensioner_id': '1',
+            'wallet_address': '0xabc',
+            'id_photo_path': None,
+            'face_photo_path': 'face.jpg'
+        })
+
+    assert len(compared) == 1 and np.allclose(compared[0], 1.0)
+    assert result['success'] is False
+
+
+def test_face_search_sees_embeddings_from_other_processes(app, client, make_user, login):
+    admin_id = make_user('admin')
+    first, second = make_user(), make_user()
+    store_embedding(app, first, np.zeros(128))
+    with app.app_context():
+        backend.get_face_index()
+    store_embedding(app, second, np.full(128, 0.01))
+
+    login(admin_id)
+    body = client.get(f'/api/admin/face-search/{first}').get_json()
+    assert [match['userID'] for match in body['matches']] == [second]
+
+
+def test_face_search_limit_is_at_least_one(app, client, make_user, login):
+    admin_id = make_user('admin')
+    first, second = make_user(), make_user()
+    store_embedding(app, first, np.zeros(128))
+    store_embedding(app, second, np.full(128, 0.01))
+
+    login(admin_id)
+    for limit in (0, -3):
+        response = client.get(f'/api/admin/face-search/{first}?limit={limit}')
+        assert response.status_code == 200
+        assert len(response.get_json()['matches']) == 1
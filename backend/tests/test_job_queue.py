@@ -0,0 +1,125 @@
+import numpy as np
+
+import app as backend
+from app import db
+from job_queue import FAILED, JobQueue, QUEUED, RUNNING, SUCCEEDED
+
+
+def make_queue(tmp_path):
+    # No worker threads; the tests claim and run jobs themselves
+    return JobQueue(str(tmp_path / 'jobs.db'), workers=0)
+
+
+def test_batch_handler_gets_jobs_of_its_kind_together(tmp_path):
+    queue = make_queue(tmp_path)
+    batches = []
+
+    def handle(payloads):
+        batches.append([payload['n'] for payload in payloads])
+        return [payload['n'] * 2 for payload in payloads]
+
+    queue.register_batch('double', handle, max_batch=3)
+    queue.register('other', lambda payload: None)
+    ids = [queue.enqueue('double', {'n': n}) for n in range(4)]
+    other_id = queue.enqueue('other', {})
+
+    jobs = queue._claim()
+    assert [job['kind'] for job in jobs] == ['double'] * 3
+    queue.run_jobs(jobs)
+
+    assert batches == [[0, 1, 2]]
+    assert [queue.get(job_id)['result'] for job_id in ids[:3]] == [0, 2, 4]
+    assert queue.get(ids[3])['status'] == QUEUED
+    assert queue.get(other_id)['status'] == QUEUED
+
+
+def test_batch_failure_only_fails_its_own_job(tmp_path):
+    queue = make_queue(tmp_path)
+
+    def handle(payloads):
+        return [ValueError('bad') if payload['bad'] else 'ok' for payload in payloads]
+
+    queue.register_batch('check', handle)
+    good = queue.enqueue('check', {'bad': False})
+    bad = queue.enqueue('check', {'bad': True}, max_attempts=1)
+
+    queue.run_jobs(queue._claim())
+
+    assert queue.get(good)['status'] == SUCCEEDED
+    assert queue.get(bad)['status'] == FAILED
+    assert queue.get(bad)['error'] == 'bad'
+
+
+def test_queued_verifications_are_face_matched_in_one_batch(app, make_user, monkeypatch):
+    user_ids = [make_user() for _ in range(3)]
+    calls = []
+
+    def match_verification_photos(pairs, references):
+        calls.append(len(pairs))
+        results = [{'match': True, 'distance': 0.1, 'face_encoding': None, 'id_encoding': np.ones(128)}
+                   for _ in pairs]
+        return results, []
+
+    monkeypatch.setattr(backend, 'match_verification_photos', match_verification_photos)
+    queue = backend.create_job_queue(app)
+    queue.workers = 0
+    job_ids = [queue.enqueue('verify_pensioner', {
+        'user_id': user_id,
+        'pensioner_id': str(user_id),
+        'wallet_address': '0xabc',
+        'id_photo_path': 'id.jpg',
+        'face_photo_path': 'face.jpg'
+    }) for user_id in user_ids]
+
+    queue.run_jobs(queue._claim())
+
+    assert calls == [3]
+    for job_id in job_ids:
+        job = queue.get(job_id)
+        assert job['status'] == SUCCEEDED and job['result']['success'] is True
+    with app.app_context():
+        assert db.session.query(backend.FaceEmbedding).count() == 3
+
+
+def test_recover_skips_live_jobs_and_fails_exhausted_ones(tmp_path):
+    queue = make_queue(tmp_path)
+    retried = queue.enqueue('work', {})
+    exhausted = queue.enqueue('work', {}, max_attempts=1)
+    live = queue.enqueue('work', {})
+    queue._claim(), queue._claim(), queue._claim()
+
+    # The owners of the first two jobs stopped sending heartbeats
+    with queue._connect() as conn:
+        conn.execute('UPDATE job SET heartbeat_at = 0 WHERE id IN (?, ?)', (retried, exhausted))
+
+    assert queue.recover() == 2
+    assert queue.get(retried)['status'] == QUEUED
+    assert queue.get(exhausted)['status'] == FAILED
+    assert queue.get(live)['status'] == RUNNING
+
+
+def test_drain_leaves_unfinished_jobs_running(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.enqueue('work', {})
+    [job] = queue._claim()
+    queue._active.add(job_id)
+
+    assert queue.drain(timeout=0) == 1
+    job = queue.get(job_id)
+    assert job['status'] == RUNNING and job['attempts'] == 1
+
+
+def test_prune_deletes_old_finished_jobs(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.register('work', lambda payload: 'done')
+    old, recent, queued = (queue.enqueue('work', {}) for _ in range(3))
+    for job in queue._claim() + queue._claim():
+        queue.run_job(job)
+    with queue._connect() as conn:
+        conn.execute('UPDATE job SET updated_at = 0 WHERE id = ?', (old,))
+        conn.execute('UPDATE job SET updated_at = 0 WHERE id = ?', (queued,))
+
+    assert queue.prune(older_than_days=1) == 1
+    assert queue.get(old) is None
+    assert queue.get(recent)['status'] == SUCCEEDED
+    assert queue.get(queued)['status'] == QUEUED
@@ -0,0 +1,44 @@
+from metrics import MetricsRegistry
+
+
+def make_registry(directory):
+    registry = MetricsRegistry()
+    requests = registry.counter('requests_total', 'Requests', ('status',))
+    latency = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+    registry.share(str(directory), interval=3600)
+    return registry, requests, latency
+
+
+def test_shared_metrics_are_summed_across_processes(tmp_path):
+    # Two registries stand in for two worker processes
+    first, first_requests, first_latency = make_registry(tmp_path)
+    second, second_requests, second_latency = make_registry(tmp_path)
+    first_requests.inc(status='200')
+    second_requests.inc(2, status='200')
+    second_requests.inc(status='500')
+    first_latency.observe(0.05)
+    second_latency.observe(0.5)
+    second.flush()
+
+    lines = first.render().splitlines()
+    assert 'requests_total{status="200"} 3' in lines
+    assert 'requests_total{status="500"} 1' in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 2' in lines
+    assert 'latency_seconds_count 2' in lines
+
+
+def test_unshared_registry_renders_its_own_counts():
+    registry = MetricsRegistry()
+    registry.counter('requests_total', 'Requests').inc(4)
+    assert 'requests_total 4' in registry.render().splitlines()
+
+
+def test_user_cache_lookups_are_a_counter(client, make_user, login):
+    login(make_user())
+    client.get('/api/user')
+    client.get('/api/user')
+
+    lines = client.get('/metrics').get_data(as_text=True).splitlines()
+    assert '# TYPE user_cache_lookups_total counter' in lines
+    assert any(line.startswith('user_cache_lookups_total{result="hit"}') for line in lines)
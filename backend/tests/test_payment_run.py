@@ -0,0 +1,50 @@
+import datetime
+
+import pytest
+
+import app as backend
+from app import db
+from payment_run import MirrorLagError
+
+
+@pytest.fixture
+def mirror(app):
+    with app.app_context():
+        db.session.add(backend.ChainPensioner(
+            pensioner_id=1, wallet_address='0x' + '1' * 40, name='Test', pension_amount='1000',
+            last_verification_at=datetime.datetime.utcnow(), is_active=True, is_deceased=False
+        ))
+        db.session.commit()
+
+
+def set_checkpoint(app, synced_seconds_ago, block_number=42):
+    with app.app_context():
+        db.session.add(backend.ChainCheckpoint(
+            id=backend.CHECKPOINT_ROW_ID, contract_address='0xabc', block_number=block_number,
+            block_hash='0x' + '0' * 64,
+            updated_at=datetime.datetime.utcnow() - datetime.timedelta(seconds=synced_seconds_ago)
+        ))
+        db.session.commit()
+
+
+def test_payment_run_refuses_a_mirror_that_was_never_indexed(app, mirror):
+    with app.app_context(), pytest.raises(MirrorLagError):
+        backend.run_payments()
+
+
+def test_payment_run_refuses_a_lagging_mirror_unless_overridden(app, mirror):
+    set_checkpoint(app, synced_seconds_ago=app.config['PAYMENT_MAX_INDEX_LAG_SECONDS'] + 60)
+    with app.app_context():
+        with pytest.raises(MirrorLagError):
+            backend.run_payments()
+        summary = backend.run_payments(allow_stale=True)
+    assert summary['indexedBlock'] == 42
+
+
+def test_payment_run_records_the_indexed_block(app, mirror):
+    set_checkpoint(app, synced_seconds_ago=10)
+    with app.app_context():
+        summary = backend.run_payments()
+    assert summary['eligible'] == 1
+    assert summary['indexedBlock'] == 42 and summary['indexedAt']
+    assert summary['disbursementFile'].endswith('-block42.csv')
@@ -0,0 +1,75 @@
+import pytest
+
+import app as backend
+from app import db
+
+
+@pytest.fixture
+def pensioner(app, make_user, login):
+    user_id = make_user(wallet_address='0x' + '2' * 40, pension_amount=2.25)
+    with app.app_context():
+        for _ in range(3):
+            db.session.add(backend.Verification(
+                pensioner_id=7, wallet_address='0x' + '2' * 40, status='verified', user_id=user_id
+            ))
+        db.session.commit()
+    login(user_id)
+    return user_id
+
+
+@pytest.mark.parametrize('limit', [0, -1, -100])
+def test_limit_below_one_returns_one_verification(client, pensioner, limit):
+    response = client.get(f'/api/pensioner-data?limit={limit}')
+    assert response.status_code == 200
+    body = response.get_json()['pensioner']
+    assert len(body['verifications']) == 1
+    assert body['verificationsNextCursor']
+
+
+def test_cursor_pages_through_history(client, pensioner):
+    seen = []
+    cursor = None
+    while True:
+        url = '/api/pensioner-data?limit=2' + (f'&cursor={cursor}' if cursor else '')
+        body = client.get(url).get_json()['pensioner']
+        seen += [verification['id'] for verification in body['verifications']]
+        cursor = body['verificationsNextCursor']
+        if not cursor:
+            break
+    assert seen == sorted(seen, reverse=True) and len(seen) == 3
+
+
+@pytest.mark.parametrize('cursor', ['garbage', 'eyJ4IjoxfQ', '!!!'])
+def test_invalid_cursor_is_bad_request(client, pensioner, cursor):
+    assert client.get(f'/api/pensioner-data?cursor={cursor}').status_code == 400
+
+
+def test_unknown_field_is_bad_request(client, pensioner):
+    assert client.get('/api/pensioner-data?fields=nope').status_code == 400
+
+
+def test_serves_stored_pension_amount(client, pensioner):
+    assert client.get('/api/pensioner-data').get_json()['pensioner']['pensionAmount'] == '2.25'
+
+
+def test_profile_change_invalidates_cached_copy(app, client, pensioner):
+    first = client.get('/api/pensioner-data')
+    assert 'Last-Modified' not in first.headers
+    etag = first.headers['ETag']
+    assert client.get('/api/pensioner-data', headers={'If-None-Match': etag}).status_code == 304
+
+    with app.app_context():
+        db.session.get(backend.User, pensioner).pension_amount = 3.5
+        db.session.commit()
+        backend.user_cache.invalidate(pensioner)
+
+    response = client.get('/api/pensioner-data', headers={
+        'If-None-Match': etag,
+        'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'
+    })
+    assert response.status_code == 200
+    assert response.get_json()['pensioner']['pensionAmount'] == '3.5'
+    # If-Modified-Since alone can never produce a stale 304
+    assert client.get('/api/pensioner-data', headers={
+        'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'
+    }).status_code == 200
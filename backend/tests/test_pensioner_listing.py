@@ -0,0 +1,80 @@
+import datetime
+
+import pytest
+
+from pagination import decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def admin(make_user, login):
+    admin_id = make_user('admin')
+    login(admin_id)
+    return admin_id
+
+
+def list_pensioners(client, **params):
+    response = client.get('/api/admin/pensioners', query_string=params)
+    return response.status_code, response.get_json()
+
+
+def test_limit_is_at_least_one(client, make_user, admin):
+    make_user()
+    make_user()
+    for limit in (0, -1):
+        status, body = list_pensioners(client, limit=limit)
+        assert status == 200
+        assert len(body['items']) == 1 and body['nextCursor']
+
+
+def test_cursor_pages_through_every_pensioner_once(client, make_user, admin):
+    ids = [make_user() for _ in range(5)]
+    seen, cursor = [], None
+    while True:
+        params = {'limit': 2, 'sort': 'lastName'}
+        if cursor:
+            params['cursor'] = cursor
+        status, body = list_pensioners(client, **params)
+        assert status == 200
+        seen += [item['id'] for item in body['items']]
+        cursor = body['nextCursor']
+        if not cursor:
+            break
+    assert sorted(seen) == sorted(ids)
+
+
+def test_search_wildcards_match_literally(client, make_user, admin):
+    make_user(last_name='Smith')
+    underscored = make_user(last_name='S_mith')
+    make_user(last_name='Percy')
+    percent = make_user(last_name='%Percy')
+
+    status, body = list_pensioners(client, q='S_')
+    assert status == 200 and [item['id'] for item in body['items']] == [underscored]
+
+    status, body = list_pensioners(client, q='%')
+    assert status == 200 and [item['id'] for item in body['items']] == [percent]
+
+
+@pytest.mark.parametrize('cursor', ['not-a-cursor', encode_cursor('x', None), encode_cursor({'dt': 5}, 1)])
+def test_invalid_cursor_is_rejected(client, make_user, admin, cursor):
+    make_user()
+    status, body = list_pensioners(client, cursor=cursor)
+    assert status == 400 and body['success'] is False
+
+
+def test_cursor_round_trips_datetimes():
+    moment = datetime.datetime(2024, 6, 1, 12, 30)
+    assert decode_cursor(encode_cursor(moment, 7)) == (moment, 7)
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(1, [2]))
+
+
+def test_due_verifications_limit_is_at_least_one(client, make_user, admin):
+    overdue = datetime.datetime.utcnow() - datetime.timedelta(days=1)
+    make_user(next_verification_date=overdue)
+    make_user(next_verification_date=overdue)
+    for limit in (0, -1):
+        response = client.get('/api/admin/due-verifications', query_string={'limit': limit})
+        body = response.get_json()
+        assert response.status_code == 200
+        assert len(body['items']) == 1 and body['nextCursor']
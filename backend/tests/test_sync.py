@@ -0,0 +1,81 @@
+import base64
+import io
+import json
+
+import pytest
+from PIL import Image
+
+import app as backend
+from app import db
+
+
+@pytest.fixture
+def pensioner(make_user, login):
+    user_id = make_user(wallet_address='0x' + '1' * 40)
+    login(user_id)
+    return user_id
+
+
+def photo_data_url():
+    buffer = io.BytesIO()
+    Image.new('RGB', (32, 32), 'gray').save(buffer, 'JPEG')
+    return 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
+def item(key, **values):
+    return {'clientKey': key, 'firstName': 'Test', 'lastName': 'User',
+            'walletAddress': '0x' + '1' * 40, **values}
+
+
+def verification_count(app):
+    with app.app_context():
+        return db.session.query(backend.Verification).count()
+
+
+def test_item_whose_photo_cannot_be_stored_fails(app, client, pensioner):
+    response = client.post('/api/sync-verifications', json={'verifications': [
+        item('missing-upload', facePhotoUploadId='7f1c1b2e-9a55-4a8e-9a54-0f3b1c0f1d11'),
+        item('malformed-upload', facePhotoUploadId='not-a-uuid'),
+        item('bad-data-url', facePhoto='data:image/jpeg;base64,@@@'),
+        item('no-photo'),
+        item('ok', facePhoto=photo_data_url())
+    ]})
+    results = response.get_json()['results']
+    assert [result['success'] for result in results] == [False, False, False, False, True]
+    assert verification_count(app) == 1
+
+
+def test_failed_item_can_be_synced_again(app, client, pensioner):
+    failed = client.post('/api/sync-verifications', json=[item('retry', facePhoto='data:image/png;base64,')])
+    assert failed.get_json()['results'][0]['success'] is False
+
+    synced = client.post('/api/sync-verifications', json=[item('retry', facePhoto=photo_data_url())])
+    result = synced.get_json()['results'][0]
+    assert result['success'] is True and result['duplicate'] is False
+    assert result['verification']['facePhotoPath']
+
+
+def test_single_sync_without_stored_photo_is_rejected(app, client, pensioner):
+    response = client.post('/api/sync-verification', json=item('single', idPhotoUploadId='not-a-uuid'))
+    assert response.status_code == 400
+    assert verification_count(app) == 0
+
+
+def test_multipart_batch_stores_indexed_photo_parts(app, client, pensioner):
+    photo = base64.b64decode(photo_data_url().partition(',')[2])
+    response = client.post('/api/sync-verifications', content_type='multipart/form-data', data={
+        'metadata': json.dumps([item('first'), item('second')]),
+        'facePhoto_0': (io.BytesIO(photo), 'facePhoto_0'),
+        'idPhoto_1': (io.BytesIO(photo), 'idPhoto_1')
+    })
+    results = response.get_json()['results']
+    assert [result['success'] for result in results] == [True, True]
+    assert results[0]['verification']['facePhotoPath'] and not results[0]['verification']['idPhotoPath']
+    assert results[1]['verification']['idPhotoPath'] and not results[1]['verification']['facePhotoPath']
+
+
+def test_legacy_endpoint_rejects_batches(app, client, pensioner):
+    response = client.post('/api/sync-verification', json=[item(f'legacy-{n}', facePhoto=photo_data_url())
+                                                           for n in range(3)])
+    assert response.status_code == 400
+    assert verification_count(app) == 0
@@ -0,0 +1,90 @@
+import io
+import os
+import threading
+
+import pytest
+
+from chunked_upload import ChunkedUploadStore, fcntl
+
+
+@pytest.fixture
+def pensioner(make_user, login):
+    user_id = make_user()
+    login(user_id)
+    return user_id
+
+
+def create_upload(client, length=10):
+    response = client.post('/api/uploads', json={'length': length, 'filename': 'face.jpg'})
+    assert response.status_code == 201
+    return response.get_json()['upload']['id']
+
+
+@pytest.mark.parametrize('method', ['get', 'patch', 'delete'])
+@pytest.mark.parametrize('upload_id', ['not-a-uuid', '1234', '00000000-0000-0000-0000-00000000000g'])
+def test_malformed_upload_id_is_not_found(client, pensioner, method, upload_id):
+    response = getattr(client, method)(f'/api/uploads/{upload_id}', data=b'abc',
+                                       headers={'Upload-Offset': '0'})
+    assert response.status_code == 404
+    assert response.get_json()['success'] is False
+
+
+def test_unknown_upload_id_is_not_found(client, pensioner):
+    response = client.patch('/api/uploads/7f1c1b2e-9a55-4a8e-9a54-0f3b1c0f1d11', data=b'abc',
+                            headers={'Upload-Offset': '0'})
+    assert response.status_code == 404
+
+
+def test_upload_of_another_user_is_not_found(client, app, make_user, login, pensioner):
+    upload_id = create_upload(client)
+    login(make_user())
+    assert client.get(f'/api/uploads/{upload_id}').status_code == 404
+
+
+def test_chunks_are_appended_in_order(client, pensioner):
+    upload_id = create_upload(client, length=6)
+    response = client.patch(f'/api/uploads/{upload_id}', data=b'abc', headers={'Upload-Offset': '0'})
+    assert response.status_code == 200
+    assert response.headers['Upload-Offset'] == '3'
+
+    response = client.patch(f'/api/uploads/{upload_id}', data=b'def', headers={'Upload-Offset': '0'})
+    assert response.status_code == 409
+    assert response.headers['Upload-Offset'] == '3'
+
+    response = client.patch(f'/api/uploads/{upload_id}', data=b'def', headers={'Upload-Offset': '3'})
+    assert response.get_json()['upload']['complete'] is True
+
+
+def test_invalid_upload_length_is_rejected(client, pensioner):
+    assert client.post('/api/uploads', json={'length': 0}).status_code == 400
+    assert client.post('/api/uploads', json={'length': 'x'}).status_code == 400
+
+
+def test_expire_removes_abandoned_uploads(tmp_path):
+    store = ChunkedUploadStore(str(tmp_path))
+    abandoned = store.create(10)['id']
+    active = store.create(10)['id']
+    orphan = tmp_path / 'c0ffee00-0000-4000-8000-000000000000.part'
+    orphan.write_bytes(b'x')
+    for path in (tmp_path / f'{abandoned}.part', tmp_path / f'{abandoned}.json', orphan):
+        os.utime(path, (0, 0))
+
+    assert store.expire(max_age_seconds=3600) == 2
+    assert store.get(abandoned) is None and not orphan.exists()
+    assert store.status(active)['offset'] == 0
+
+
+@pytest.mark.skipif(fcntl is None, reason='flock is not available')
+def test_append_waits_for_the_lock_held_by_another_process(tmp_path):
+    store = ChunkedUploadStore(str(tmp_path))
+    upload_id = store.create(10)['id']
+    # Another worker process holds the lock while it writes a chunk
+    with open(tmp_path / f'{upload_id}.part', 'ab') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        writer = threading.Thread(target=store.append, args=(upload_id, 0, io.BytesIO(b'x' * 5)))
+        writer.start()
+        writer.join(0.2)
+        assert writer.is_alive()
+        fcntl.flock(f, fcntl.LOCK_UN)
+    writer.join(5)
+    assert store.status(upload_id)['offset'] == 5
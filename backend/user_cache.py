@@ -0,0 +1,123 @@
+"""
+In-process cache of serialized users with TTL and LRU eviction.
+
+Dashboard endpoints look up the session user on every call; this cache
+serves those lookups from memory. Values are plain dicts (User.to_dict()),
+never ORM instances, so they are safe to share between requests and threads.
+
+With several worker processes, pass a Redis URL to share cached users and to
+broadcast invalidations, so a write in one process evicts the entry
+everywhere. Redis is optional and only imported when configured.
+"""
+import json
+import time
+import threading
+from collections import OrderedDict
+
+INVALIDATION_CHANNEL = 'smartpension:user-cache:invalidate'
+KEY_PREFIX = 'smartpension:user:'
+
+
+class UserCache:
+    """
+    Cache mapping user IDs to serialized user dicts.
+    """
+
+    def __init__(self, ttl=60, max_size=10000, redis_url=None, on_lookup=None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        self.hits = 0
+        self.misses = 0
+        # Called with 'hit' or 'miss' on every lookup, e.g. to count them in metrics
+        self._on_lookup = on_lookup
+
+        if redis_url:
+            import redis
+            self._redis = redis.Redis.from_url(redis_url)
+            self._start_invalidation_listener()
+
+    def _start_invalidation_listener(self):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{INVALIDATION_CHANNEL: self._on_invalidation})
+        pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def _on_invalidation(self, message):
+        try:
+            self._evict_local(int(message['data']))
+        except (TypeError, ValueError):
+            pass
+
+    def _evict_local(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def _get_local(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return value
+
+    def _set_local(self, user_id, value):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get(self, user_id, loader):
+        """
+        Return the cached user dict, calling loader(user_id) on a miss.
+        A loader result of None (unknown user) is not cached.
+        """
+        value = self._get_local(user_id)
+        if value is not None:
+            self._record('hit')
+            return value
+
+        if self._redis is not None:
+            shared = self._redis.get(f'{KEY_PREFIX}{user_id}')
+            if shared is not None:
+                value = json.loads(shared)
+                self._set_local(user_id, value)
+                self._record('hit')
+                return value
+
+        self._record('miss')
+        value = loader(user_id)
+        if value is not None:
+            self.set(user_id, value)
+        return value
+
+    def _record(self, result):
+        if result == 'hit':
+            self.hits += 1
+        else:
+            self.misses += 1
+        if self._on_lookup is not None:
+            self._on_lookup(result)
+
+    def set(self, user_id, value):
+        """Store a user dict locally and in the shared backend"""
+        self._set_local(user_id, value)
+        if self._redis is not None:
+            self._redis.set(f'{KEY_PREFIX}{user_id}', json.dumps(value), ex=self.ttl)
+
+    def invalidate(self, user_id):
+        """Drop a user everywhere after it was written"""
+        self._evict_local(user_id)
+        if self._redis is not None:
+            self._redis.delete(f'{KEY_PREFIX}{user_id}')
+            self._redis.publish(INVALIDATION_CHANNEL, str(user_id))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
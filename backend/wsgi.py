@@ -0,0 +1,15 @@
+"""
+WSGI entry point for production servers:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Each server worker imports this module, and so creates the app, once.
+APP_CONFIG selects the configuration (production by default here).
+"""
+import os
+
+from app import create_app
+
+app = create_app(os.environ.get('APP_CONFIG', 'production'))
+
+application = app
@@ -8,6 +8,68 @@ const OfflineContext = createContext();
 const DB_NAME = 'smart_pension_offline_db';
 const VERIFICATION_STORE = 'verification_queue';
 
+// Sync requests stay well below the server's SYNC_BATCH_MAX_ITEMS and MAX_CONTENT_LENGTH
+const SYNC_BATCH_MAX_ITEMS = 50;
+const SYNC_BATCH_MAX_BYTES = 8 * 1024 * 1024;
+const PHOTO_FIELDS = ['idPhoto', 'facePhoto'];
+
+const isDataUrl = (value) => typeof value === 'string' && value.startsWith('data:image');
+
+// Decoded size of a base64 data URL, without decoding it
+const dataUrlBytes = (dataUrl) => (
+  isDataUrl(dataUrl) ? Math.floor((dataUrl.length - dataUrl.indexOf(',') - 1) * 3 / 4) : 0
+);
+
+const dataUrlToBlob = (dataUrl) => {
+  const [header, data] = dataUrl.split(',');
+  const type = (header.match(/^data:([^;]+)/) || [])[1] || 'application/octet-stream';
+  const binary = atob(data);
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i++) {
+    bytes[i] = binary.charCodeAt(i);
+  }
+  return new Blob([bytes], { type });
+};
+
+// Split queued verifications into batches capped by item count and photo bytes
+const splitIntoBatches = (verifications) => {
+  const batches = [];
+  let batch = [];
+  let batchBytes = 0;
+  verifications.forEach(verification => {
+    const bytes = PHOTO_FIELDS.reduce((total, field) => total + dataUrlBytes(verification[field]), 0);
+    if (batch.length && (batch.length >= SYNC_BATCH_MAX_ITEMS || batchBytes + bytes > SYNC_BATCH_MAX_BYTES)) {
+      batches.push(batch);
+      batch = [];
+      batchBytes = 0;
+    }
+    batch.push(verification);
+    batchBytes += bytes;
+  });
+  if (batch.length) {
+    batches.push(batch);
+  }
+  return batches;
+};
+
+// Multipart body: the items as a JSON 'metadata' field, photos as <field>_<index> file parts
+const buildSyncBody = (batch) => {
+  const formData = new FormData();
+  const metadata = batch.map((verification, index) => {
+    // The client key makes retried batches idempotent on the server
+    const item = { ...verification, clientKey: `offline-${verification.id}-${verification.timestamp}` };
+    PHOTO_FIELDS.forEach(field => {
+      if (isDataUrl(item[field])) {
+        formData.append(`${field}_${index}`, dataUrlToBlob(item[field]), `${field}_${index}`);
+        delete item[field];
+      }
+    });
+    return item;
+  });
+  formData.append('metadata', JSON.stringify(metadata));
+  return formData;
+};
+
 export const OfflineProvider = ({ children }) => {
   const [isOnline, setIsOnline] = useState(navigator.onLine);
   const [pendingVerifications, setPendingVerifications] = useState([]);
@@ -140,48 +202,60 @@ export const OfflineProvider = ({ children }) => {
     try {
       toast.info(`Syncing ${pendingVerifications.length} pending verifications...`);
       
-      // Process each pending verification
-      for (const verification of pendingVerifications) {
-        try {
-          // Call API to sync verification
-          const response = await fetch(`${process.env.REACT_APP_API_URL || 'http://localhost:5000/api'}/sync-verification`, {
-            method: 'POST',
-            headers: {
-              'Content-Type': 'application/json'
-            },
-            body: JSON.stringify(verification),
-            credentials: 'include'
-          });
+      let synced = 0;
+      let interrupted = false;
+      for (const batch of splitIntoBatches(pendingVerifications)) {
+        const response = await fetch(`${process.env.REACT_APP_API_URL || 'http://localhost:5000/api'}/sync-verifications`, {
+          method: 'POST',
+          body: buildSyncBody(batch),
+          credentials: 'include'
+        });
+        
+        const data = await response.json().catch(() => null);
+        if (!response.ok || !data || !Array.isArray(data.results)) {
+          // The batch was rejected as a whole (413, auth or server error);
+          // keep it and the rest queued without spending their attempts
+          console.error(`Verification sync batch rejected with status ${response.status}`);
+          interrupted = true;
+          break;
+        }
+        
+        const transaction = db.transaction(VERIFICATION_STORE, 'readwrite');
+        const store = transaction.objectStore(VERIFICATION_STORE);
+        
+        batch.forEach((verification, index) => {
+          const result = data.results[index];
+          if (!result) return;
           
-          if (response.ok) {
+          if (result.success) {
             // Update status to 'completed' in IndexedDB
-            const transaction = db.transaction(VERIFICATION_STORE, 'readwrite');
-            const store = transaction.objectStore(VERIFICATION_STORE);
             verification.status = 'completed';
-            store.put(verification);
+            synced += 1;
           } else {
-            // Increment attempt count and update in IndexedDB
-            const transaction = db.transaction(VERIFICATION_STORE, 'readwrite');
-            const store = transaction.objectStore(VERIFICATION_STORE);
+            // Increment attempt count
             verification.attempts = (verification.attempts || 0) + 1;
             
             // If too many attempts, mark as failed
             if (verification.attempts >= 3) {
               verification.status = 'failed';
             }
-            
-            store.put(verification);
           }
-        } catch (error) {
-          console.error(`Failed to sync verification ${verification.id}:`, error);
-        }
+          
+          store.put(verification);
+        });
       }
       
       // Reload pending verifications
       loadPendingVerifications(db);
-      toast.success('Verification sync completed');
+      if (interrupted) {
+        toast.warning(`Synced ${synced} of ${pendingVerifications.length} verifications; the rest will be retried`);
+      } else {
+        toast.success('Verification sync completed');
+      }
     } catch (error) {
+      // Network failure; the unsynced verifications stay queued as they were
       console.error('Failed to sync verifications:', error);
+      loadPendingVerifications(db);
       toast.error('Failed to sync some verifications');
     } finally {
       setSyncing(false);